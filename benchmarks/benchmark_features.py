@@ -0,0 +1,225 @@
+"""Benchmarks for optional containerlog features.
+
+Unlike the other benchmark scripts, these are not compared against the
+standard logger. They measure the overhead of opt-in Logger features
+relative to a Logger with no optional features enabled.
+"""
+
+import io
+
+import pyperf
+
+import containerlog
+from containerlog import recorder, renderers, sampling, schemas, tracebacks
+
+MSG_BASIC = "some message to log"
+
+
+def bench_basic(loops, logger):
+    # use fast local vars
+    m = MSG_BASIC
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+
+    return pyperf.perf_counter() - t0
+
+
+def bench_batch(loops, logger):
+    # The same events as bench_basic, logged as a single batch.
+    events = [(MSG_BASIC, {})] * 10
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        logger.log_many(containerlog.WARN, events)
+
+    return pyperf.perf_counter() - t0
+
+
+def bench_silent(loops, logger):
+    # use fast local vars
+    m = MSG_BASIC
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+        logger.debug(m)
+
+    return pyperf.perf_counter() - t0
+
+
+def bench_fields(loops, logger):
+    # use fast local vars
+    m = MSG_BASIC
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+        logger.warning(m, route="/items", status=200, duration_ms=12.5)
+
+    return pyperf.perf_counter() - t0
+
+
+def bench_fields_schema(loops, logger):
+    # The same event as bench_fields, pre-declared as a schema.
+    emit = schemas.event(logger, containerlog.WARN, MSG_BASIC, ("route", "status", "duration_ms"))
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+        emit("/items", 200, 12.5)
+
+    return pyperf.perf_counter() - t0
+
+
+def _raise():
+    raise ValueError(MSG_BASIC)
+
+
+def bench_exception(loops, logger):
+    # use fast local vars
+    m = MSG_BASIC
+    f = _raise
+    range_loops = range(loops)
+    dt = 0.0
+
+    # Only the exception() calls are timed, not raising the exception.
+    for _ in range_loops:
+        try:
+            f()
+        except ValueError:
+            t0 = pyperf.perf_counter()
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            logger.exception(m)
+            dt += pyperf.perf_counter() - t0
+
+    return dt
+
+
+def setup_default(logger):
+    pass
+
+
+def setup_callsite(logger):
+    logger.callsite = True
+
+
+def setup_sampled(logger):
+    logger.sampler = sampling.EveryN(10)
+
+
+def setup_recorder(logger):
+    logger.recorder = recorder.FlightRecorder()
+
+
+def setup_exc_structured(logger):
+    logger.exc_renderer = tracebacks.StructuredRenderer(fingerprint=True)
+
+
+def setup_renderer(renderer):
+    """Get a setup function which sets a renderer on the logger."""
+
+    def setup(logger):
+        logger.renderer = renderer
+
+    return setup
+
+
+# The renderers to benchmark. Each one is run through the basic benchmark.
+RENDERERS = {
+    "kv": renderers.KeyValueRenderer(),
+    "logfmt": renderers.LogfmtRenderer(),
+    "compact": renderers.CompactRenderer(),
+}
+
+# Each feature benchmark is a 2-tuple of the benchmark function and a function
+# which configures the feature on the logger being benchmarked.
+BENCHMARKS = {
+    "basic": (bench_basic, setup_default),
+    "basic-callsite": (bench_basic, setup_callsite),
+    "basic-sampled": (bench_basic, setup_sampled),
+    "batch": (bench_batch, setup_default),
+    "exception": (bench_exception, setup_default),
+    "fields": (bench_fields, setup_default),
+    "fields-schema": (bench_fields_schema, setup_default),
+    "exception-structured": (bench_exception, setup_exc_structured),
+    "silent": (bench_silent, setup_default),
+    "silent-recorded": (bench_silent, setup_recorder),
+}
+BENCHMARKS.update(
+    {f"basic-render-{name}": (bench_basic, setup_renderer(r)) for name, r in RENDERERS.items()}
+)
+
+
+if __name__ == "__main__":
+    runner = pyperf.Runner()
+    runner.metadata["description"] = "Test the performance of optional containerlog features."
+
+    # Note: StringIO performance will impact the results
+    stream = io.StringIO()
+
+    for name, (fn, setup) in BENCHMARKS.items():
+        # Truncate the stream before each benchmark.
+        stream.seek(0)
+        stream.truncate()
+
+        # Setup a logger for the benchmark.
+        log = containerlog.get_logger(f"bench-{name}")
+        log.level = containerlog.WARN
+        log.writeout = stream.write
+        log.writeerr = stream.write
+        setup(log)
+
+        runner.bench_time_func(
+            name,
+            fn,
+            log,
+            inner_loops=10,
+        )
@@ -0,0 +1,65 @@
+"""Benchmarks for looking up loggers with containerlog.get_logger."""
+
+import pyperf
+
+import containerlog
+
+
+def bench_get_logger_name(loops):
+    # use fast local vars
+    get_logger = containerlog.get_logger
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+        get_logger("bench-get-logger")
+
+    return pyperf.perf_counter() - t0
+
+
+def bench_get_logger_no_name(loops):
+    # use fast local vars
+    get_logger = containerlog.get_logger
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+        get_logger()
+
+    return pyperf.perf_counter() - t0
+
+
+BENCHMARKS = {
+    "get-logger-name": bench_get_logger_name,
+    "get-logger-no-name": bench_get_logger_no_name,
+}
+
+
+if __name__ == "__main__":
+    runner = pyperf.Runner()
+    runner.metadata["description"] = "Test the performance of containerlog.get_logger."
+
+    for name, fn in BENCHMARKS.items():
+        runner.bench_time_func(
+            name,
+            fn,
+            inner_loops=10,
+        )
@@ -0,0 +1,84 @@
+"""Benchmarks for containerlog file sinks.
+
+These measure logging throughput to a file through each file sink, relative
+to writing to `sys.stdout` redirected to a file (i.e. a block buffered text
+file), which is how logs reach a file without a sink.
+"""
+
+import os
+import sys
+import tempfile
+
+import pyperf
+
+import containerlog
+from containerlog import sinks
+
+MSG_BASIC = "some message to log"
+
+
+def bench_basic(loops, logger):
+    # use fast local vars
+    m = MSG_BASIC
+    range_loops = range(loops)
+    t0 = pyperf.perf_counter()
+
+    for _ in range_loops:
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+        logger.warning(m)
+
+    return pyperf.perf_counter() - t0
+
+
+def sink_stdout(path):
+    # Redirect stdout to the file, as e.g. `python app.py > app.log` does.
+    sys.stdout = open(path, "a")
+    return sinks.StdSink("stdout")
+
+
+# Each sink benchmark is a function which creates the sink writing to the
+# given path.
+SINKS = {
+    "stdout-file": sink_stdout,
+    "file": sinks.FileSink,
+    "append-file": sinks.AppendFileSink,
+    "append-file-rotated": lambda path: sinks.AppendFileSink(path, max_bytes=1024 * 1024),
+    "append-file-preallocated": lambda path: sinks.AppendFileSink(
+        path, max_bytes=1024 * 1024, preallocate=1024 * 1024
+    ),
+    "compressed-gzip": sinks.CompressedFileSink,
+    "compressed-lzma": lambda path: sinks.CompressedFileSink(path, compression="lzma"),
+}
+
+
+if __name__ == "__main__":
+    runner = pyperf.Runner()
+    runner.metadata["description"] = "Test the throughput of containerlog file sinks."
+
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make_sink in SINKS.items():
+            sink = make_sink(os.path.join(tmp, f"{name}.log"))
+            containerlog.add_sink(name, sink)
+
+            # Setup a logger for the benchmark.
+            log = containerlog.get_logger(f"bench-{name}")
+            log.level = containerlog.WARN
+            log.set_sink(sink)
+
+            sys.stdout = stdout
+            runner.bench_time_func(
+                name,
+                bench_basic,
+                log,
+                inner_loops=10,
+            )
+            sink.close()
@@ -6,14 +6,23 @@ container.
 """
 
 import datetime
-import fnmatch
-import inspect
-import io
+import os
 import sys
-import traceback
-from typing import Dict, Iterable, List, Optional
-
-from .types import ContextProcessor, EventContext
+import threading
+import weakref
+from functools import partial
+from types import CodeType, FrameType
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Tuple, Union
+
+from . import rules
+from .adaptive import Boost
+from .budget import Budget
+from .dedup import Deduplicator
+from .recorder import FlightRecorder
+from .renderers import KeyValueRenderer, Renderer, RenderFn
+from .sinks import Sink, StdSink, WriteFn
+from .tracebacks import ExceptionRenderer, ExcInfo, TextRenderer
+from .types import ContextProcessor, EventContext, Sampler
 
 # Project attributes
 __title__ = "containerlog"
@@ -34,6 +43,49 @@ ERROR = 4
 CRITICAL = 5
 
 
+def _option_fields(
+    kwargs: Dict[str, Any], sampler: Any, exc_info: Any, stacklevel: Any
+) -> Tuple[Optional[Sampler], Union[None, bool, BaseException, ExcInfo], int]:
+    """Move values passed for the per-call options of a log call which are not
+    valid values for the option into the event's fields.
+
+    The option names (`sampler`, `exc_info`, and `stacklevel`) may also be
+    used as field names, so a value which is not a Sampler, an exception
+    argument, or an int, respectively, is logged as a field instead.
+
+    Args:
+        kwargs: The fields of the event. Fields are added to it.
+        sampler: The value passed for `sampler`.
+        exc_info: The value passed for `exc_info`.
+        stacklevel: The value passed for `stacklevel`.
+
+    Returns:
+        The sampler, exc_info, and stacklevel options, set to their defaults
+        if the value passed was moved to the fields.
+    """
+    if sampler is not None and not isinstance(sampler, Sampler):
+        kwargs["sampler"] = sampler
+        sampler = None
+    if exc_info is not None and not (
+        isinstance(exc_info, (bool, BaseException))
+        or (isinstance(exc_info, tuple) and len(exc_info) == 3)
+    ):
+        kwargs["exc_info"] = exc_info
+        exc_info = None
+    if type(stacklevel) is not int:
+        kwargs["stacklevel"] = stacklevel
+        stacklevel = 1
+    return sampler, exc_info, stacklevel
+
+
+def _noop(msg, **kwargs) -> None:
+    """A no-op used in place of Logger level methods for disabled levels.
+
+    This takes a single positional argument, matching the level methods,
+    rather than *args, as that is measurably faster to call.
+    """
+
+
 class Logger:
     """A named logging channel.
 
@@ -48,25 +100,79 @@ class Logger:
             defaults to DEBUG (1) - better to collect more logs than no logs.
             This can be modified on the logger instance itself, or the logging
             level may be set for all loggers globally via `set_level`.
+        callsite: Whether to add the module, function, and line number of the
+            log call to each log event. This is disabled by default.
+        sampler: A sampler used to drop some of the Logger's log events
+            (see `containerlog.sampling`). By default, nothing is sampled.
+        dedup: A Deduplicator used to suppress repeated identical log events
+            (see `containerlog.dedup`). By default, nothing is suppressed.
+        budget: A Budget limiting the lines and/or bytes the Logger may log
+            per second (see `containerlog.budget`). By default, there is no
+            limit.
+        recorder: A FlightRecorder which captures events below the Logger's
+            log level and writes them out when an error is logged (see
+            `containerlog.recorder`). By default, nothing is recorded.
+        boost: A Boost which temporarily lowers the Logger's log level after
+            it logs an error (see `containerlog.adaptive`). By default, the
+            log level is not changed.
+        exc_renderer: The ExceptionRenderer used to render exceptions logged
+            with `exception` or passed via `exc_info` (see
+            `containerlog.tracebacks`). By default, a TextRenderer appends
+            the full traceback after the log event.
+        renderer: The Renderer used to format log events as log lines (see
+            `containerlog.renderers`). It is compiled for the Logger when it
+            is set. By default, events are rendered in the key='value' format.
+
+    The level methods (trace, debug, info, warn/warning, error, critical,
+    and exception) are set on each instance whenever the log level changes.
+    Methods for levels which are enabled log the message, passing through
+    any keyword arguments as additional structured data for the log entry.
+    Methods for levels which are not enabled are swapped out for a shared
+    no-op, so a call below the log level costs no more than an empty
+    function call.
+
+    Each level also has a corresponding guard attribute (trace_enabled,
+    debug_enabled, info_enabled, warn_enabled, error_enabled, and
+    critical_enabled), which is kept in sync with the log level. These can
+    be checked to skip building expensive log data entirely, e.g.
+
+        if logger.debug_enabled:
+            logger.debug("state dump", state=expensive_dump())
     """
 
     __slots__ = (
         "name",
         "manager",
-        "level",
+        "callsite",
+        "sampler",
+        "dedup",
+        "budget",
+        "exc_renderer",
         "utcnow",
-        "writeout",
-        "writeerr",
-        "_previous_level",
-    )
-
-    _level_lookup = (
         "trace",
         "debug",
         "info",
         "warn",
+        "warning",
         "error",
         "critical",
+        "exception",
+        "trace_enabled",
+        "debug_enabled",
+        "info_enabled",
+        "warn_enabled",
+        "error_enabled",
+        "critical_enabled",
+        "_level",
+        "_renderer",
+        "_render",
+        "_writers",
+        "_recorder",
+        "_boost",
+        "_boost_until",
+        "_boost_last",
+        "_previous_level",
+        "__weakref__",
     )
 
     def __init__(
@@ -74,18 +180,188 @@ class Logger:
         name: str,
         manager: "Manager",
         level: Optional[int] = None,
+        callsite: bool = False,
+        sampler: Optional[Sampler] = None,
+        dedup: Optional[Deduplicator] = None,
+        budget: Optional[Budget] = None,
+        recorder: Optional[FlightRecorder] = None,
+        boost: Optional[Boost] = None,
+        exc_renderer: Optional[ExceptionRenderer] = None,
+        renderer: Optional[Renderer] = None,
     ) -> None:
         self.name: str = name
-        self.level: int = DEBUG if level is None else level
+        self._recorder: Optional[FlightRecorder] = recorder
+        self._boost: Optional[Boost] = boost
+        self._boost_last: float = float("-inf")
+        self.level = DEBUG if level is None else level
+        self.callsite: bool = callsite
+        self.sampler: Optional[Sampler] = sampler
+        self.dedup: Optional[Deduplicator] = dedup
+        self.budget: Optional[Budget] = budget
+        self.exc_renderer: ExceptionRenderer = (
+            TextRenderer() if exc_renderer is None else exc_renderer
+        )
         self._previous_level: Optional[int] = None
         self.manager: Manager = manager
+        self.renderer = _default_renderer if renderer is None else renderer
 
         # Proxy module functions being used into the class scope. This
         # speeds things up by making what would otherwise be a LOAD_GLOBAL
         # (plus any additional LOAD_ATTRs) into a LOAD_FAST.
         self.utcnow = datetime.datetime.utcnow
-        self.writeout = sys.stdout.write
-        self.writeerr = sys.stderr.write
+
+        # The write function for each log level. Levels below ERROR write to
+        # stdout, and ERROR and above to stderr, unless routed to other sinks.
+        self._writers: List[WriteFn] = [sys.stdout.write] * 4 + [sys.stderr.write] * 2
+
+    @property
+    def level(self) -> int:
+        """The log level of the Logger."""
+        return self._level
+
+    @level.setter
+    def level(self, level: int) -> None:
+        # An explicitly set level supersedes any active boost.
+        self._boost_until: float = 0.0
+        self._level = level
+        self._set_level_methods()
+
+    def _set_level_methods(self) -> None:
+        """Set the level methods for the Logger based on its current log level.
+
+        Enabled levels get a partial of `_log` with the level pre-bound, so
+        there is no level check when logging. Disabled levels get a no-op, or
+        a partial of `_record` if they are recorded by a flight recorder.
+        The level guard attributes are updated along with the methods.
+
+        The partials hold the Logger's bound methods, so (as does its compiled
+        renderer) they make each Logger a reference cycle, which is freed by
+        the cyclic garbage collector rather than by reference counting. This
+        is what keeps the level methods as cheap as a direct call.
+        """
+        level = self._level
+        log = self._log
+
+        # If the Logger has a flight recorder, levels which are not enabled but
+        # which are at or above the recorder's level are recorded instead. A
+        # disabled Logger does not record anything.
+        recorder = self._recorder
+        if recorder is None or level > 5:
+            off = [_noop] * 6
+        else:
+            record = self._record
+            off = [partial(record, n) if n >= recorder.level else _noop for n in range(6)]
+
+        self.trace_enabled: bool = level <= 0
+        self.debug_enabled: bool = level <= 1
+        self.info_enabled: bool = level <= 2
+        self.warn_enabled: bool = level <= 3
+        self.error_enabled: bool = level <= 4
+        self.critical_enabled: bool = level <= 5
+        self.trace = partial(log, 0) if level <= 0 else off[0]
+        self.debug = partial(log, 1) if level <= 1 else off[1]
+        self.info = partial(log, 2) if level <= 2 else off[2]
+        self.warn = partial(log, 3) if level <= 3 else off[3]
+        self.warning = self.warn
+        self.error = partial(log, 4) if level <= 4 else off[4]
+        self.critical = partial(log, 5) if level <= 5 else off[5]
+        self.exception = partial(log, 4, exc=True) if level <= 4 else off[4]
+
+    @property
+    def writeout(self) -> WriteFn:
+        """The write function for events below ERROR level.
+
+        Setting this sets the write function for all levels below ERROR. If
+        those levels are routed to different sinks, this is the write function
+        for INFO level.
+        """
+        return self._writers[INFO]
+
+    @writeout.setter
+    def writeout(self, write: WriteFn) -> None:
+        self._writers[:ERROR] = [write] * ERROR
+
+    @property
+    def writeerr(self) -> WriteFn:
+        """The write function for events at ERROR level and above.
+
+        Setting this sets the write function for ERROR and CRITICAL levels.
+        """
+        return self._writers[ERROR]
+
+    @writeerr.setter
+    def writeerr(self, write: WriteFn) -> None:
+        self._writers[ERROR:] = [write] * (CRITICAL - ERROR + 1)
+
+    def set_sink(self, sink: Sink, min_level: int = TRACE, max_level: int = CRITICAL) -> None:
+        """Write events in a range of log levels to a sink.
+
+        The sink's write function is resolved once, here, so writing an event
+        to it costs no more than writing to the default output.
+
+        Args:
+            sink: The sink to write to (see `containerlog.sinks`).
+            min_level: The lowest log level to write to the sink.
+            max_level: The highest log level to write to the sink.
+        """
+        write = sink.writer()
+        for level in range(max(min_level, TRACE), min(max_level, CRITICAL) + 1):
+            self._writers[level] = write
+
+    @property
+    def renderer(self) -> Renderer:
+        """The renderer used to format the Logger's log events."""
+        return self._renderer
+
+    @renderer.setter
+    def renderer(self, renderer: Renderer) -> None:
+        self._renderer = renderer
+        self._render: RenderFn = renderer.compile(self)
+
+    @property
+    def recorder(self) -> Optional[FlightRecorder]:
+        """The flight recorder for events below the Logger's log level, if any."""
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder: Optional[FlightRecorder]) -> None:
+        self._recorder = recorder
+        self._set_level_methods()
+
+    @property
+    def boost(self) -> Optional[Boost]:
+        """The policy for lowering the Logger's log level after an error, if any."""
+        return self._boost
+
+    @boost.setter
+    def boost(self, boost: Optional[Boost]) -> None:
+        if self._boost_until:
+            self._end_boost()
+        self._boost = boost
+
+    def _start_boost(self) -> None:
+        """Lower the log level to the boost level, if a boost is allowed.
+
+        The configured level is held in `_previous_level` until the boost ends.
+        """
+        boost = self._boost
+        if boost is None or self._boost_until or boost.level >= self._level:
+            return
+        now = boost._clock()
+        if now - self._boost_last < boost.cooldown:
+            return
+
+        self._boost_last = now
+        self._boost_until = now + boost.duration
+        self._previous_level = self._level
+        self._level = boost.level
+        self._set_level_methods()
+
+    def _end_boost(self) -> None:
+        """Return to the configured log level from a boost."""
+        self._boost_until = 0.0
+        self._level = DEBUG if self._previous_level is None else self._previous_level
+        self._set_level_methods()
 
     @property
     def disabled(self) -> bool:
@@ -100,6 +376,8 @@ class Logger:
         than the supported log levels.
         """
         if self.level != 99:
+            if self._boost_until:
+                self._end_boost()
             self._previous_level = self.level
             self.level = 99
 
@@ -113,134 +391,309 @@ class Logger:
         if self.level > 5:  # 5 = critical, highest log level
             self.level = DEBUG if self._previous_level is None else self._previous_level
 
-    def _log(self, loglevel: int, msg: str, exc: bool = False, **kwargs) -> None:
+    def flush_suppressed(self) -> None:
+        """Log any events with suppressed duplicates which are still pending.
+
+        When a burst of duplicate events ends, the count of events suppressed
+        in the final window is held until the window ends, and is then logged
+        with the Logger's next event. This logs each such event immediately,
+        with its suppressed count, e.g. before the application exits.
+        """
+        if self.dedup is not None:
+            for loglevel, msg, suppressed in self.dedup.drain(self.name):
+                self._log(loglevel, msg, suppressed=suppressed)
+
+    def _log(
+        self,
+        loglevel: int,
+        msg: str,
+        exc: bool = False,
+        sampler: Optional[Sampler] = None,
+        exc_info: Union[None, bool, BaseException, ExcInfo] = None,
+        stacklevel: int = 1,
+        **kwargs,
+    ) -> None:
         """Log a message to console.
 
         The underlying log function. All higher-level convenience methods
-        (debug, info, error, ...) call this to do the actual logging.
+        (debug, info, error, ...) are partials of this which do the actual
+        logging.
 
         Args:
             loglevel: The level to log the message at.
             msg: The message to log.
             exc: Whether or not to include an exception traceback.
+            sampler: A sampler to use for this log call. If not set, the
+                Logger's sampler is used, if it has one.
+            exc_info: The exception to include, overriding `exc`. This may be
+                True, for the exception currently being handled, an exception
+                instance, or an exc_info tuple. This allows an exception to be
+                logged from outside of its handler, e.g. in a task callback.
+            stacklevel: The frame of the log call's callsite, as with the
+                standard library logger: 1 (the default) is the caller of the
+                level method. Wrappers around the level methods, such as the
+                standard library logger proxy, pass a higher level so the
+                callsite, and per-callsite sampling, are those of their caller.
             **kwargs: Additional structured data to add to the log entry.
-        """
-        # Since log message are output in the format: event='message', any single
-        # quotes within the message should be escaped.
-        if "'" in msg:
-            msg = msg.replace("'", "\\'")
-
-        # If any of the reserved keys are in the kwargs, update the kwargs
-        # dict so the colliding key is prefixed with an underscore. This is
-        # done one at a time instead of a loop, as this was measured to be
-        # slightly more performant.
-        if "timestamp" in kwargs:
-            kwargs["_timestamp"] = kwargs["timestamp"]
-            del kwargs["timestamp"]
-        if "logger" in kwargs:
-            kwargs["_logger"] = kwargs["logger"]
-            del kwargs["logger"]
-        if "level" in kwargs:
-            kwargs["_level"] = kwargs["level"]
-            del kwargs["level"]
-        if "event" in kwargs:
-            kwargs["_event"] = kwargs["event"]
-            del kwargs["event"]
-
-        fields: EventContext = {}
-        for processor in self.manager.context_processors:
-            processor.merge(fields)
-
-        fields.update(kwargs)
-
-        # For extra kv items, if the value is a string, wrap it in single quotes.
-        # Otherwise let the object's __str__ or __repr__ deal with it.
-        def fmt_val(v):
-            if isinstance(v, str):
-                return f"'{v}'"
-            return v
-
-        # Format the log message entry.
-        extras = " ".join(f"{k}={fmt_val(v)}" for k, v in fields.items())
-        entry = f"timestamp='{self.utcnow().isoformat('T')}Z' logger='{self.name}' level='{self._level_lookup[loglevel]}' event='{msg}' {extras}\n"  # noqa
-
-        if exc:
-            exc_info = sys.exc_info()
-            buf = io.StringIO()
-            traceback.print_exception(exc_info[0], exc_info[1], exc_info[2], None, buf)
-            s = buf.getvalue()
-            buf.close()
-            if s[-1] != "\n":
-                s += "\n"
-            entry += s
-
-        # Log to stderr if at level error or greater, otherwise log to stdout.
-        (loglevel >= 4 and self.writeerr(entry)) or self.writeout(entry)
-
-    def trace(self, msg, **kwargs):
-        """Log a message at TRACE level.
 
-        Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
+        A value for `sampler`, `exc_info`, or `stacklevel` which is not valid
+        for the option (e.g. `sampler="round-robin"`) is logged as a field.
         """
-        self.level <= 0 and self._log(0, msg, **kwargs)
-
-    def debug(self, msg, **kwargs):
-        """Log a message at DEBUG level.
+        if sampler is not None or exc_info is not None or type(stacklevel) is not int:
+            sampler, exc_info, stacklevel = _option_fields(kwargs, sampler, exc_info, stacklevel)
+
+        # If the Logger is boosted and the boost has expired, return to the
+        # configured level, dropping the event if it is now below it.
+        boost_until = self._boost_until
+        if boost_until and self._boost._clock() >= boost_until:  # type: ignore
+            self._end_boost()
+            if loglevel < self._level:
+                return
+
+        # Check for duplicate events and sample the event before doing any
+        # formatting, so suppressed and dropped events are cheap.
+        dedup = self.dedup
+        if dedup is not None:
+            suppressed = dedup.check(self.name, loglevel, msg, kwargs)
+            # Log the counts of bursts which ended in a window that has since
+            # ended, so they are not held until the event occurs again.
+            for due in dedup.due(self.name):
+                self._log(due[0], due[1], suppressed=due[2])
+            if suppressed < 0:
+                return
+            if suppressed:
+                kwargs["suppressed"] = suppressed
+
+        if sampler is None:
+            sampler = self.sampler
+        if sampler is not None:
+            if sampler.by_callsite:
+                caller = sys._getframe(stacklevel)
+                rate = sampler.sample((caller.f_code, caller.f_lineno))
+                del caller
+            else:
+                rate = sampler.sample(msg)
+            if not rate:
+                return
+            if rate < 1:
+                kwargs["sampled"] = rate
+
+        # Check the line budgets before rendering. Exempt events do not consume
+        # the budget.
+        budget = self.budget
+        if budget is not None and loglevel < budget.exempt_level and not budget.allow_line():
+            self._budget_exceeded(budget, "logger")
+            return
+        global_budget = self.manager.budget
+        if (
+            global_budget is not None
+            and loglevel < global_budget.exempt_level
+            and not global_budget.allow_line()
+        ):
+            self._budget_exceeded(global_budget, "global")
+            return
+
+        # If enabled, get the frame of the log call for its callsite. The level
+        # methods are partials, which do not add a frame, so at the default
+        # stacklevel this is the caller's frame.
+        frame: Optional[FrameType] = sys._getframe(stacklevel) if self.callsite else None
+
+        entry = self._render(loglevel, msg, exc if exc_info is None else exc_info, frame, kwargs)
+        del frame
+
+        # Check the byte budgets before writing.
+        if budget is not None and loglevel < budget.exempt_level:
+            if not budget.allow_bytes(len(entry)):
+                self._budget_exceeded(budget, "logger")
+                return
+        if global_budget is not None and loglevel < global_budget.exempt_level:
+            if not global_budget.allow_bytes(len(entry)):
+                self._budget_exceeded(global_budget, "global")
+                return
+
+        # Report events dropped since the last report, if a report is due, so
+        # the counts for a burst which has stopped are not held indefinitely.
+        if budget is not None and budget.dropped_lines:
+            self._budget_exceeded(budget, "logger")
+        if global_budget is not None and global_budget.dropped_lines:
+            self._budget_exceeded(global_budget, "global")
+
+        # Write to the sink for the level: by default, stderr if at level error
+        # or greater, otherwise stdout. Any events held by the flight recorder
+        # are written ahead of an error.
+        if loglevel >= 4:
+            if self._recorder is not None:
+                self._write_recorded()
+            self._writers[loglevel](entry)
+            if self._boost is not None:
+                self._start_boost()
+        else:
+            self._writers[loglevel](entry)
+
+    def log_many(self, loglevel: int, events: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Log a batch of events at the same level in a single write.
+
+        The batch is rendered with one timestamp, taken when rendering starts,
+        and one merge of the context processor fields. The rendered lines are
+        written in the order of the events, with a single call to the Logger's
+        write function for the level (by default, writeout, or writeerr at
+        ERROR level and above), so lines from a batch are never interleaved
+        with other events from the Logger. Whether the write itself is atomic
+        with respect to other writers depends on the sink.
+
+        Each event is still subject to the Logger's duplicate suppression,
+        sampler, and budgets. If enabled, the callsite of every event is the
+        call to `log_many`. If the level is not enabled, the events are dropped,
+        or recorded by the Logger's flight recorder.
 
         Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
-        """
-        self.level <= 1 and self._log(1, msg, **kwargs)
-
-    def info(self, msg, **kwargs):
-        """Log a message at INFO level.
+            loglevel: The level to log the events at.
+            events: The events to log, as (message, fields) tuples. The fields
+                are the keyword arguments that would be passed to e.g. `info`.
+                The dicts are not modified.
 
-        Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
+        Raises:
+            ValueError: The level is not a valid log level.
         """
-        self.level <= 2 and self._log(2, msg, **kwargs)
+        if not TRACE <= loglevel <= CRITICAL:
+            raise ValueError(f"invalid log level: {loglevel}")
+
+        boost_until = self._boost_until
+        if boost_until and self._boost._clock() >= boost_until:  # type: ignore
+            self._end_boost()
+
+        if loglevel < self._level:
+            recorder = self._recorder
+            if recorder is not None and self._level <= 5 and loglevel >= recorder.level:
+                timestamp = self.utcnow()
+                for msg, kwargs in events:
+                    recorder.record(self, timestamp, loglevel, msg, dict(kwargs))
+            return
+
+        frame: Optional[FrameType] = sys._getframe(1) if self.callsite else None
+        sampler = self.sampler
+        sample_key: Any = None
+        if sampler is not None and sampler.by_callsite:
+            caller = sys._getframe(1)
+            sample_key = (caller.f_code, caller.f_lineno)
+            del caller
+
+        dedup = self.dedup
+        budget = self.budget
+        if budget is not None and loglevel >= budget.exempt_level:
+            budget = None
+        global_budget = self.manager.budget
+        if global_budget is not None and loglevel >= global_budget.exempt_level:
+            global_budget = None
+
+        context: EventContext = {}
+        for processor in self.manager.context_processors:
+            processor.merge(context)
+        stamp = self._renderer.timestamp(self.utcnow())
+        render = self._render
+        lines: List[str] = []
+
+        for msg, kwargs in events:
+            # Fields added to an event are added to a copy of its fields, so
+            # the caller's dict is not modified.
+            if dedup is not None:
+                suppressed = dedup.check(self.name, loglevel, msg, kwargs)
+                if suppressed < 0:
+                    continue
+                if suppressed:
+                    kwargs = {**kwargs, "suppressed": suppressed}
+
+            if sampler is not None:
+                rate = sampler.sample(sample_key if sampler.by_callsite else msg)
+                if not rate:
+                    continue
+                if rate < 1:
+                    kwargs = {**kwargs, "sampled": rate}
+
+            if budget is not None and not budget.allow_line():
+                self._budget_exceeded(budget, "logger")
+                continue
+            if global_budget is not None and not global_budget.allow_line():
+                self._budget_exceeded(global_budget, "global")
+                continue
+
+            entry = render(loglevel, msg, False, frame, kwargs, None, context, stamp)
+
+            if budget is not None and not budget.allow_bytes(len(entry)):
+                self._budget_exceeded(budget, "logger")
+                continue
+            if global_budget is not None and not global_budget.allow_bytes(len(entry)):
+                self._budget_exceeded(global_budget, "global")
+                continue
+            lines.append(entry)
+        del frame
+        if dedup is not None:
+            for due in dedup.due(self.name):
+                self._log(due[0], due[1], suppressed=due[2])
+
+        if not lines:
+            return
+        if budget is not None and budget.dropped_lines:
+            self._budget_exceeded(budget, "logger")
+        if global_budget is not None and global_budget.dropped_lines:
+            self._budget_exceeded(global_budget, "global")
+        if loglevel >= 4:
+            if self._recorder is not None:
+                self._write_recorded()
+            self._writers[loglevel]("".join(lines))
+            if self._boost is not None:
+                self._start_boost()
+        else:
+            self._writers[loglevel]("".join(lines))
+
+    def _record(
+        self,
+        loglevel: int,
+        msg: str,
+        exc: bool = False,
+        sampler: Optional[Sampler] = None,
+        exc_info: Union[None, bool, BaseException, ExcInfo] = None,
+        stacklevel: int = 1,
+        **kwargs,
+    ) -> None:
+        """Record a log event below the Logger's level with its flight recorder.
 
-    def warn(self, msg, **kwargs):
-        """Log a message at WARN level.
+        Level methods for levels which are not enabled are partials of this
+        when the Logger has a flight recorder. The event is stored unrendered.
 
         Args:
+            loglevel: The level to log the message at.
             msg: The message to log.
+            exc: Unused. Exception tracebacks are not recorded.
+            sampler: Unused. Recorded events are not sampled.
+            exc_info: Unused. Exception tracebacks are not recorded.
+            stacklevel: Unused. The callsite is not recorded.
             **kwargs: Additional structured data to add to the log entry.
         """
-        self.level <= 3 and self._log(3, msg, **kwargs)
+        if sampler is not None or exc_info is not None or type(stacklevel) is not int:
+            _option_fields(kwargs, sampler, exc_info, stacklevel)
+        self._recorder.record(self, self.utcnow(), loglevel, msg, kwargs)  # type: ignore
 
-    warning = warn
-
-    def error(self, msg, **kwargs):
-        """Log a message at ERROR level.
-
-        Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
+    def _write_recorded(self) -> None:
+        """Render and write out the events held by the flight recorder for the
+        current thread, clearing them from the recorder.
         """
-        self.level <= 4 and self._log(4, msg, **kwargs)
+        for logger, timestamp, loglevel, msg, kwargs in self._recorder.drain():  # type: ignore
+            logger._writers[loglevel](logger._render(loglevel, msg, False, None, kwargs, timestamp))
 
-    def critical(self, msg, **kwargs):
-        """Log a message at CRITICAL level.
+    def _budget_exceeded(self, budget: Budget, scope: str) -> None:
+        """Log a status line for a budget which has dropped events, if one is due.
 
-        Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
-        """
-        self.level <= 5 and self._log(5, msg, **kwargs)
-
-    def exception(self, msg, **kwargs):
-        """Log a message at ERROR level with an exception stack trace.
+        The status line is written directly, so it is not subject to the budget.
 
         Args:
-            msg: The message to log.
-            **kwargs: Additional structured data to add to the log entry.
+            budget: The budget which has dropped events.
+            scope: The scope of the budget, either "logger" or "global".
         """
-        self.level <= 4 and self._log(4, msg, exc=True, **kwargs)
+        report = budget.report()
+        if report is not None:
+            fields = {"budget": scope, "dropped_lines": report[0], "dropped_bytes": report[1]}
+            self._writers[WARN](self._render(WARN, "log budget exceeded", False, None, fields))
 
 
 class Manager:
@@ -249,46 +702,381 @@ class Manager:
     This acts as a container for existing Loggers and allows global
     operations on those configured loggers.
 
+    Lookups of existing loggers are lock-free. The Manager's lock is only
+    taken when a new logger is created and when loggers are reconfigured
+    globally, so that a logger is never created twice for the same name
+    and global changes apply to every tracked logger.
+
     Args:
         level: The global log level to apply to all Loggers on initialization.
+        weak: Track loggers by weak reference, so loggers which are no longer
+            referenced anywhere else are evicted from the Manager. This is
+            disabled by default.
     """
 
     __slots__ = (
         "level",
         "loggers",
         "context_processors",
+        "budget",
+        "boost",
+        "renderer",
+        "sinks",
+        "rules",
+        "_previous_level",
+        "_disabled_seq",
+        "_lock",
     )
 
-    def __init__(self, level: int = DEBUG) -> None:
+    def __init__(self, level: int = DEBUG, weak: bool = False) -> None:
         self.level: int = level
-        self.loggers: Dict[str, Logger] = {}
+        self._previous_level: Optional[int] = None
+        self.loggers: MutableMapping[str, Logger] = weakref.WeakValueDictionary() if weak else {}
 
         self.context_processors: List[ContextProcessor] = []
 
+        # A global budget limiting the output of all loggers.
+        self.budget: Optional[Budget] = None
+
+        # A boost applied to all loggers, unless overridden by a rule.
+        self.boost: Optional[Boost] = None
+
+        # The renderer for all loggers.
+        self.renderer: Renderer = _default_renderer
+
+        # The sinks loggers may be routed to, by name. By default, loggers
+        # write to the "stdout" and "stderr" sinks.
+        self.sinks: Dict[str, Sink] = {"stdout": StdSink("stdout"), "stderr": StdSink("stderr")}
+
+        # Rules configuring loggers by name or glob. These are kept so they
+        # can be applied to loggers created after the rule was added.
+        self.rules: rules.RuleTable = rules.RuleTable()
+
+        # The position of the last global disable in the order of the rules,
+        # so rules added before it are overridden by it, and rules added after
+        # it are applied over it, for loggers created while disabled.
+        self._disabled_seq: int = -1
+
+        # A re-entrant lock is used so global operations (e.g. `set_level`)
+        # can hold the lock while calling other Manager methods which take it.
+        self._lock = threading.RLock()
+
+    @property
+    def disabled(self) -> bool:
+        """Check whether or not the Manager is globally disabled."""
+        return self.level == 99
+
+    def use_weak_registry(self) -> None:
+        """Track loggers by weak reference.
+
+        Once enabled, loggers which are no longer referenced outside of the
+        Manager are evicted from it. This keeps loggers with dynamic names
+        (e.g. per-job or per-tenant loggers) from accumulating for the life
+        of the process. Global configuration (log level, global disable) is
+        held by the Manager, so it is still applied to loggers created after
+        an eviction, but any configuration made directly on an evicted Logger
+        instance is lost.
+
+        Each Logger is a reference cycle (see `Logger._set_level_methods`), so
+        an unreferenced Logger is evicted when the cyclic garbage collector
+        next collects it, not as soon as its last reference is dropped. Until
+        then, `get_logger` returns the same instance.
+        """
+        with self._lock:
+            if not isinstance(self.loggers, weakref.WeakValueDictionary):
+                self.loggers = weakref.WeakValueDictionary(self.loggers)
+
+    def new_logger(self, name: str) -> Logger:
+        """Create a new Logger, configured with the Manager's global settings.
+
+        This does not track the Logger with the Manager. Use `get_logger` to
+        get or create a tracked Logger.
+
+        Args:
+            name: The name of the logger to create.
+
+        Returns:
+            A new Logger with the provided name.
+        """
+        disabled = self.disabled
+        level = self._previous_level if disabled else self.level
+        logger = Logger(name=name, level=level, manager=self, renderer=self.renderer)
+        logger.boost = self.boost
+        self._route_default(logger)
+
+        # Rules are applied in the order they were added. A global disable
+        # supersedes the rules added before it (e.g. a level rule for the
+        # logger), but not those added after it.
+        for rule in self.rules.match(name):
+            if disabled and rule.seq > self._disabled_seq:
+                logger.disable()
+                disabled = False
+            rule.apply(logger)
+        if disabled:
+            logger.disable()
+        return logger
+
+    def add_sink(self, name: str, sink: Sink) -> None:
+        """Register a sink by name, so loggers can be routed to it.
+
+        If a sink is already registered with the name, it is replaced, and
+        loggers routed to it are routed to the new sink. The replaced sink is
+        not closed.
+
+        Args:
+            name: The name of the sink.
+            sink: The sink (see `containerlog.sinks`).
+        """
+        with self._lock:
+            replaced = name in self.sinks
+            self.sinks[name] = sink
+            if replaced:
+                self.reroute()
+
+    def reroute(self) -> None:
+        """Resolve the routing of all tracked loggers to sinks.
+
+        This only needs to be called explicitly after replacing `sys.stdout`
+        or `sys.stderr`. Any write functions set directly on tracked loggers
+        are replaced by those of their routed sinks.
+        """
+        with self._lock:
+            for name, logger in self.loggers.items():
+                self._route_default(logger)
+                for rule in self.rules.match(name):
+                    if rule.action == rules.ROUTE:
+                        rule.apply(logger)
+
+    def clear_routes(self) -> None:
+        """Remove all route rules, routing all loggers to the default sinks."""
+        with self._lock:
+            self.rules.clear(rules.ROUTE)
+            self.reroute()
+
+    def _route_default(self, logger: Logger) -> None:
+        """Route a logger to the default sinks."""
+        logger.set_sink(self.sinks["stdout"], TRACE, WARN)
+        logger.set_sink(self.sinks["stderr"], ERROR, CRITICAL)
+
+    def add_rule(self, rule: rules.Rule) -> None:
+        """Add a rule and apply it to all tracked loggers it matches.
+
+        The rule is also applied to matching loggers created later on.
+
+        Args:
+            rule: The rule to add.
+        """
+        with self._lock:
+            self.rules.add(rule)
+            if rule.prefix is None and rule.regex is None:
+                logger = self.loggers.get(rule.pattern)
+                if logger is not None:
+                    rule.apply(logger)
+            else:
+                for name, logger in self.loggers.items():
+                    if rule.matches(name):
+                        rule.apply(logger)
+
     def set_levels(self) -> None:
-        """Set the log level for each tracked logger."""
-        for logger in self.loggers.values():
-            logger.level = self.level
+        """Set the log level for each tracked logger.
+
+        This supersedes all level and enable/disable rules, so they are cleared.
+        """
+        with self._lock:
+            self.rules.clear(rules.LEVEL)
+            self.rules.clear(rules.STATE)
+            for logger in self.loggers.values():
+                logger.level = self.level
+
+    def disable(self) -> None:
+        """Disable all tracked loggers, as well as any created later on.
+
+        This supersedes any enable/disable rules, so they are cleared. Level
+        rules are kept, to be applied once re-enabled, but loggers created
+        while disabled are disabled regardless of them.
+        """
+        with self._lock:
+            self.rules.clear(rules.STATE)
+            if self.level != 99:
+                self._previous_level = self.level
+                self.level = 99
+            self._disabled_seq = self.rules.mark()
+            for logger in self.loggers.values():
+                logger.disable()
+
+    def enable(self) -> None:
+        """Enable all tracked loggers, reverting a global disable if one is set.
 
+        This supersedes any enable/disable rules, so they are cleared.
+        """
+        with self._lock:
+            self.rules.clear(rules.STATE)
+            if self.level > 5:  # 5 = critical, highest log level
+                self.level = DEBUG if self._previous_level is None else self._previous_level
+            for logger in self.loggers.values():
+                logger.enable()
+
+    def _before_fork(self) -> None:
+        """Flush all sinks, and hold the Manager's lock across a fork.
+
+        Flushing keeps the child from writing out lines the parent buffered
+        (e.g. in a block buffered `sys.stdout`) a second time. Loggers writing
+        to streams set directly as their `writeout` or `writeerr`, rather than
+        through a sink, are not flushed.
+        """
+        self._lock.acquire()
+        for sink in self.sinks.values():
+            try:
+                sink.flush()
+            except (OSError, ValueError):
+                # A failed flush (e.g. of a closed stream) must not keep the
+                # process from forking.
+                pass
+
+    def _after_fork_in_parent(self) -> None:
+        """Release the Manager's lock after a fork."""
+        self._lock.release()
+
+    def _after_fork_in_child(self) -> None:
+        """Replace the Manager's lock, held when the process forked, in the child."""
+        self._lock = threading.RLock()
+
+
+# The default renderer for all Loggers. It is shared so its callsite cache is
+# shared as well.
+_default_renderer: Renderer = KeyValueRenderer()
 
 # A global manager instance. This should be the only place Manager
 # is used so there is a central authority on all logger instances.
 manager = Manager()
 
+# Keep the global Manager consistent across forks, e.g. in prefork servers.
+# os.register_at_fork is not available on Windows, or before Python 3.7.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=lambda: manager._before_fork(),
+        after_in_parent=lambda: manager._after_fork_in_parent(),
+        after_in_child=lambda: manager._after_fork_in_child(),
+    )
+
+# Caches the static parts of a caller name (module name, code name, and whether
+# a "self" local may be present) per code object, for use by `_caller_name`.
+_caller_cache: Dict[CodeType, Tuple[Optional[str], Optional[str], bool]] = {}
+
 
-def set_level(level: int) -> None:
-    """Set the global logging level for all Loggers.
+def set_level(level: int, *loggers: str) -> None:
+    """Set the logging level for Loggers.
+
+    If no loggers are specified, the level is set globally for all Loggers,
+    including those created later on.
+
+    Loggers may be specified explicitly by name, e.g. 'foo', or using a
+    glob match, e.g. 'foo.*'. The level is set on all matching loggers,
+    including any matching loggers created later on.
 
     Args:
         level: The log level to set.
+        loggers: The string or glob-names of the loggers to set the level for.
+            This may be left unspecified to set the level for all loggers.
     """
-    manager.level = level
-    manager.set_levels()
+    if len(loggers) == 0:
+        with manager._lock:
+            manager.level = level
+            manager.set_levels()
+    else:
+        for glob in loggers:
+            manager.add_rule(rules.Rule(glob, rules.LEVEL, level))
+
+
+def set_renderer(renderer: Renderer) -> None:
+    """Set the renderer used to format log events for all Loggers.
+
+    This includes Loggers created later on. The renderer is compiled for
+    each Logger when it is set.
+
+    Args:
+        renderer: The renderer to set (see `containerlog.renderers`).
+    """
+    with manager._lock:
+        manager.renderer = renderer
+        for logger in manager.loggers.values():
+            logger.renderer = renderer
+
+
+def set_boost(boost: Optional[Boost], *loggers: str) -> None:
+    """Set the policy for temporarily lowering the level of Loggers after an error.
+
+    If no loggers are specified, the boost is set globally for all Loggers,
+    including those created later on. This supersedes any boost rules.
+
+    Loggers may be specified explicitly by name, e.g. 'foo', or using a
+    glob match, e.g. 'foo.*'. The boost is set on all matching loggers,
+    including any matching loggers created later on.
+
+    Args:
+        boost: The boost to set (see `containerlog.adaptive`), or None to
+            stop boosting.
+        loggers: The string or glob-names of the loggers to set the boost for.
+            This may be left unspecified to set the boost for all loggers.
+    """
+    if len(loggers) == 0:
+        with manager._lock:
+            manager.boost = boost
+            manager.rules.clear(rules.BOOST)
+            for logger in manager.loggers.values():
+                logger.boost = boost
+    else:
+        for glob in loggers:
+            manager.add_rule(rules.Rule(glob, rules.BOOST, boost=boost))
+
+
+def add_sink(name: str, sink: Sink) -> None:
+    """Register a sink by name, so Loggers can be routed to it with `route`.
+
+    Registering a sink under the name of an existing sink replaces it. This
+    includes the default "stdout" and "stderr" sinks, e.g. to send all output
+    to a file.
+
+    Args:
+        name: The name of the sink.
+        sink: The sink (see `containerlog.sinks`).
+    """
+    manager.add_sink(name, sink)
+
+
+def route(sink: str, *loggers: str, min_level: int = TRACE, max_level: int = CRITICAL) -> None:
+    """Route the output of Loggers in a range of log levels to a sink.
+
+    Loggers may be specified explicitly by name, e.g. 'foo', or using a
+    glob match, e.g. 'foo.*'. If no loggers are specified, all Loggers are
+    routed. Matching loggers created later on are routed as well. Levels
+    outside the range keep their current routing.
+
+    Routing is resolved when it is configured, so it adds no cost to logging.
+
+    Args:
+        sink: The name of a sink registered with `add_sink`, or "stdout" or
+            "stderr".
+        loggers: The string or glob-names of the loggers to route. This may be
+            left unspecified to route all loggers.
+        min_level: The lowest log level to route to the sink.
+        max_level: The highest log level to route to the sink.
+    """
+    if sink not in manager.sinks:
+        raise ValueError(f"unknown sink: {sink}")
+    for glob in loggers or ("*",):
+        manager.add_rule(rules.Rule(glob, rules.ROUTE, sink=sink, levels=(min_level, max_level)))
 
 
 def _caller_name(skip=2):
     """Get the name of the module for the caller of the function.
 
+    This walks frames directly via ``sys._getframe`` rather than using
+    ``inspect.stack()``, which would build a ``FrameInfo`` (and read source
+    lines from disk) for every frame on the stack. The parts of the name
+    which are static for a given code object are cached, so repeated lookups
+    from the same call site only need to resolve the bound class, if any.
+
     Args:
         skip: The number of stack frames to skip when looking back.
             By default this is 2 so we skip the frame for this function
@@ -301,22 +1089,33 @@ def _caller_name(skip=2):
     Returns:
         The full module name for the caller of a function.
     """
-    stack = inspect.stack()
-    start = 0 + skip
-    if len(stack) < start + 1:
+    try:
+        frame = sys._getframe(skip)
+    except ValueError:
         return ""
-    pframe = stack[start][0]
 
+    code = frame.f_code
+    cached = _caller_cache.get(code)
+    if cached is None:
+        modname = frame.f_globals.get("__name__")
+        codename = None if code.co_name == "<module>" else code.co_name
+        has_self = (
+            "self" in code.co_varnames or "self" in code.co_cellvars or "self" in code.co_freevars
+        )
+        cached = (modname, codename, has_self)
+        _caller_cache[code] = cached
+
+    modname, codename, has_self = cached
     name = []
-    mod = inspect.getmodule(pframe)
-    if mod:
-        name.append(mod.__name__)
-    if "self" in pframe.f_locals:
-        name.append(pframe.f_locals["self"].__class__.__name__)
-    codename = pframe.f_code.co_name
-    if codename != "<module>":
+    if modname:
+        name.append(modname)
+    if has_self:
+        obj = frame.f_locals.get("self")
+        if obj is not None:
+            name.append(obj.__class__.__name__)
+    if codename:
         name.append(codename)
-    del pframe
+    del frame
     return ".".join(name)
 
 
@@ -336,12 +1135,13 @@ def get_logger(name: Optional[str] = None) -> Logger:
     name = name or _caller_name()
     logger = manager.loggers.get(name, None)
     if not logger:
-        logger = Logger(
-            name=name,
-            level=manager.level,
-            manager=manager,
-        )
-        manager.loggers[name] = logger
+        # Check again once the lock is held, as another thread may have
+        # created the logger while this one was waiting on the lock.
+        with manager._lock:
+            logger = manager.loggers.get(name, None)
+            if not logger:
+                logger = manager.new_logger(name)
+                manager.loggers[name] = logger
 
     return logger
 
@@ -351,7 +1151,8 @@ def disable(*loggers: str) -> None:
 
     Loggers may be specified explicitly by name, e.g. 'foo', or using a
     glob match, e.g. 'foo.*'. Specified loggers will be updated in the
-    logger.Manager.
+    logger.Manager, and the names/globs are kept as rules so that matching
+    loggers created later on are also disabled.
 
     If no loggers are specified, this will disable all loggers currently tracked
     within the logging.Manager, and the manager log level will be set to the
@@ -366,13 +1167,10 @@ def disable(*loggers: str) -> None:
             be left unspecified to disable all loggers.
     """
     if len(loggers) == 0:
-        for logger in manager.loggers.values():
-            logger.disable()
+        manager.disable()
     else:
         for glob in loggers:
-            filtered = fnmatch.filter(manager.loggers.keys(), glob)
-            for name in filtered:
-                manager.loggers[name].disable()
+            manager.add_rule(rules.Rule(glob, rules.DISABLE))
 
 
 def enable(*loggers: str) -> None:
@@ -380,7 +1178,8 @@ def enable(*loggers: str) -> None:
 
     Loggers may be specified explicitly by name, e.g. 'foo', or using a
     glob match, e.g. 'foo.*'. Specified loggers will be updated in the
-    logger.Manager.
+    logger.Manager, and the names/globs are kept as rules so that matching
+    loggers created later on are also enabled.
 
     If a logger is already enabled, no changes are made to it or its log level.
 
@@ -397,13 +1196,10 @@ def enable(*loggers: str) -> None:
             be left unspecified to enable all loggers.
     """
     if len(loggers) == 0:
-        for logger in manager.loggers.values():
-            logger.enable()
+        manager.enable()
     else:
         for glob in loggers:
-            filtered = fnmatch.filter(manager.loggers.keys(), glob)
-            for name in filtered:
-                manager.loggers[name].enable()
+            manager.add_rule(rules.Rule(glob, rules.ENABLE))
 
 
 def enable_contextvars() -> None:
@@ -424,6 +1220,10 @@ def setup(
     disable: Optional[Iterable[str]] = None,
     level: Optional[int] = None,
     with_contextvars: bool = False,
+    weak_registry: bool = False,
+    budget: Optional[Budget] = None,
+    renderer: Optional[Renderer] = None,
+    sinks: Optional[Dict[str, Sink]] = None,
 ) -> None:
     """Convenience method to set up containerlog in a single call.
 
@@ -432,12 +1232,28 @@ def setup(
         disable: The string or glob-names of the loggers to disable.
         level: The log level to set.
         with_contextvars: Enable the contextvar processor for the configured logger(s).
+        weak_registry: Track loggers by weak reference, so unreferenced loggers
+            are evicted from the manager.
+        budget: A global budget limiting the output of all loggers.
+        renderer: The renderer used to format log events for all loggers.
+        sinks: Sinks to register by name, for routing loggers to with `route`.
     """
+    if weak_registry:
+        manager.use_weak_registry()
+    # The global level is set first, since setting it clears enable/disable
+    # rules, and the rules added here should apply to loggers created later.
+    if level:
+        set_level(level)
     if enable:
         globals()["enable"](*enable)
     if disable:
         globals()["disable"](*disable)
-    if level:
-        set_level(level)
     if with_contextvars:
         globals()["enable_contextvars"]()
+    if budget:
+        manager.budget = budget
+    if renderer:
+        set_renderer(renderer)
+    if sinks:
+        for name, sink in sinks.items():
+            add_sink(name, sink)
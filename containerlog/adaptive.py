@@ -0,0 +1,48 @@
+"""Adaptive verbosity: temporarily lower a logger's level after an error.
+
+Running at INFO level keeps log volume down, but once something has gone
+wrong, DEBUG events are often what is needed to understand it. A Boost set
+on a Logger drops the logger to a more verbose level for a period of time
+after it logs an error, then returns it to its configured level.
+
+    logger.boost = adaptive.Boost(level=containerlog.DEBUG, duration=60.0)
+    containerlog.set_boost(adaptive.Boost(), 'db.*')
+
+To stay safe during error storms, a logger is boosted at most once per
+cooldown period, and errors logged while a logger is already boosted do not
+extend the boost. With the defaults, a logger spends at most one minute in
+every five at the boosted level.
+
+Setting the level of a boosted logger (e.g. via `set_level`) ends the boost;
+the explicitly set level is kept.
+"""
+
+import time
+
+__all__ = [
+    "Boost",
+]
+
+
+class Boost:
+    """A policy for temporarily lowering a logger's level after an error.
+
+    Args:
+        level: The log level to drop to after an error. Defaults to DEBUG (1).
+        duration: The number of seconds to stay at the boosted level.
+        cooldown: The minimum number of seconds between the starts of two
+            boosts of the same logger. This caps how often a logger can be
+            boosted during an error storm.
+    """
+
+    def __init__(self, level: int = 1, duration: float = 60.0, cooldown: float = 300.0) -> None:
+        if duration <= 0:
+            raise ValueError(f"duration must be greater than 0, got: {duration}")
+        if cooldown < duration:
+            raise ValueError(
+                f"cooldown must be at least the duration ({duration}), got: {cooldown}"
+            )
+        self.level: int = level
+        self.duration: float = duration
+        self.cooldown: float = cooldown
+        self._clock = time.monotonic
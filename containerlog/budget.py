@@ -0,0 +1,172 @@
+"""Log budgets, enforced with token buckets.
+
+A Budget limits the number of lines and/or bytes a logger may write per
+second. A budget may be set on a single Logger, so a noisy logger cannot
+starve the others, or globally on the Manager, to cap the total output
+of all loggers.
+
+    logger.budget = budget.Budget(lines_per_second=100)
+    containerlog.manager.budget = budget.Budget(bytes_per_second=64 * 1024)
+
+The line budget is checked before an event is rendered, so dropped events
+cost very little. The byte budget is checked after an event is rendered,
+before it is written. Events at or above the budget's exempt level (ERROR,
+by default) are never dropped and do not consume the budget.
+
+When events are dropped, a status line reporting the number of dropped
+lines and bytes is logged at WARN level, at most once per report interval.
+A due report is checked both when an event is dropped and when one is
+logged, so the counts for a burst which has stopped are still reported
+with the next logged event. The status line itself is not subject to the
+budget.
+
+A single event larger than the byte budget's burst capacity is allowed
+when the bucket is full, emptying it, rather than never being allowed.
+
+Budgets are not locked. Under concurrent use from multiple threads, a
+budget may be slightly over- or under-spent.
+"""
+
+import time
+from typing import Optional, Tuple
+
+__all__ = [
+    "Budget",
+    "TokenBucket",
+]
+
+
+class TokenBucket:
+    """A token bucket rate limiter.
+
+    The bucket holds up to `capacity` tokens and is refilled continuously
+    at `rate` tokens per second. Taking tokens fails if there are not
+    enough tokens in the bucket. Taking more tokens than the bucket's
+    capacity succeeds only when the bucket is full, and empties it.
+
+    Args:
+        rate: The number of tokens added to the bucket per second.
+        capacity: The maximum number of tokens the bucket can hold. This
+            determines how large a burst is allowed. Defaults to `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be greater than 0, got: {rate}")
+        self.rate: float = rate
+        self.capacity: float = rate if capacity is None else capacity
+        self.tokens: float = self.capacity
+        self._clock = time.monotonic
+        self._last: float = self._clock()
+
+    def take(self, amount: float = 1) -> bool:
+        """Take tokens from the bucket.
+
+        Args:
+            amount: The number of tokens to take.
+
+        Returns:
+            True if the tokens were taken, False if there were not enough
+            tokens in the bucket.
+        """
+        now = self._clock()
+        tokens = self.tokens + (now - self._last) * self.rate
+        if tokens > self.capacity:
+            tokens = self.capacity
+        self._last = now
+
+        # An amount over capacity could never be taken, so it is clamped
+        # to capacity: it is taken from a full bucket.
+        if amount > self.capacity:
+            amount = self.capacity
+        if tokens >= amount:
+            self.tokens = tokens - amount
+            return True
+        self.tokens = tokens
+        return False
+
+
+class Budget:
+    """A limit on the lines and/or bytes logged per second.
+
+    Args:
+        lines_per_second: The number of lines which may be logged per second.
+            If not set, lines are not limited.
+        bytes_per_second: The number of bytes which may be logged per second.
+            This is measured as the length of the rendered log line, which is
+            the byte count for ASCII output. If not set, bytes are not limited.
+        burst: The number of seconds worth of budget which may be used in a
+            single burst.
+        exempt_level: Events at or above this log level are never dropped.
+            Defaults to ERROR (4).
+        report_interval: The minimum number of seconds between status lines
+            reporting dropped events.
+    """
+
+    def __init__(
+        self,
+        lines_per_second: Optional[float] = None,
+        bytes_per_second: Optional[float] = None,
+        burst: float = 1.0,
+        exempt_level: int = 4,
+        report_interval: float = 10.0,
+    ) -> None:
+        self.lines: Optional[TokenBucket] = None
+        if lines_per_second is not None:
+            self.lines = TokenBucket(lines_per_second, lines_per_second * burst)
+
+        self.bytes: Optional[TokenBucket] = None
+        if bytes_per_second is not None:
+            self.bytes = TokenBucket(bytes_per_second, bytes_per_second * burst)
+
+        self.exempt_level: int = exempt_level
+        self.report_interval: float = report_interval
+        self.dropped_lines: int = 0
+        self.dropped_bytes: int = 0
+        self._clock = time.monotonic
+
+        # The first report is due as soon as any event is dropped.
+        self._last_report: float = float("-inf")
+
+    def allow_line(self) -> bool:
+        """Check whether a line is within the budget, consuming it if so."""
+        if self.lines is None or self.lines.take():
+            return True
+        self.dropped_lines += 1
+        return False
+
+    def allow_bytes(self, size: int) -> bool:
+        """Check whether a rendered line is within the budget, consuming it if so.
+
+        Args:
+            size: The size of the rendered line.
+        """
+        if self.bytes is None or self.bytes.take(size):
+            return True
+        self.dropped_lines += 1
+        self.dropped_bytes += size
+        return False
+
+    def report(self) -> Optional[Tuple[int, int]]:
+        """Get the dropped line and byte counts, if a report is due.
+
+        A report is due if events have been dropped and the report interval
+        has elapsed since the last report. Getting a report resets the counts.
+        This is checked when an event is dropped and when an event is logged
+        while dropped counts are pending.
+
+        Returns:
+            A tuple of (dropped lines, dropped bytes) if a report is due,
+            otherwise None.
+        """
+        if not self.dropped_lines:
+            return None
+        now = self._clock()
+        if now - self._last_report < self.report_interval:
+            return None
+
+        report = (self.dropped_lines, self.dropped_bytes)
+        self.dropped_lines = 0
+        self.dropped_bytes = 0
+        self._last_report = now
+        return report
@@ -0,0 +1,166 @@
+"""Suppression of duplicate log events.
+
+When something fails repeatedly, the same log event can be emitted many
+times per second. A Deduplicator set on a Logger emits the first
+occurrence of an event and suppresses identical events for the rest of
+a time window. The first occurrence after the window ends is emitted with
+a `suppressed` field holding the number of events suppressed in the
+previous window, so during a sustained burst the event is logged about
+once per window along with a count of what was dropped.
+
+    logger.dedup = dedup.Deduplicator(window=5.0)
+
+Events are identified by logger name, level, and message (and optionally
+the keys, but not values, of the event's keyword arguments). This check
+is a single dict lookup, which is much cheaper than rendering the event.
+
+When a burst ends, the count suppressed in its last window is emitted
+once that window has ended, with the next event logged by the Logger,
+rather than waiting for the event to occur again. Pending counts can also
+be emitted immediately with `Logger.flush_suppressed()`.
+"""
+
+import math
+import time
+from typing import Dict, List, Tuple
+
+__all__ = [
+    "Deduplicator",
+]
+
+
+class Deduplicator:
+    """Suppress identical log events within a time window.
+
+    Args:
+        window: The length of the suppression window, in seconds.
+        by_keys: Whether to also include the keyword argument keys of an
+            event when identifying duplicates. By default, only the logger
+            name, level, and message are used.
+        max_events: The maximum number of distinct events to track. When
+            exceeded, events whose window has ended are dropped from tracking.
+    """
+
+    def __init__(self, window: float = 1.0, by_keys: bool = False, max_events: int = 10000) -> None:
+        if window <= 0:
+            raise ValueError(f"window must be greater than 0, got: {window}")
+        self.window: float = window
+        self.by_keys: bool = by_keys
+        self.max_events: int = max_events
+        self._clock = time.monotonic
+
+        # Maps each event key to a list of: the start time of the event's
+        # window, and the number of events suppressed in that window.
+        self._events: Dict[tuple, List] = {}
+
+        # The earliest time at which the window of an event with a suppressed
+        # count ends, or infinity if no counts are pending.
+        self._next_due: float = math.inf
+
+    def check(self, name: str, level: int, msg: str, kwargs: Dict) -> int:
+        """Check whether a log event is a duplicate.
+
+        Args:
+            name: The name of the logger.
+            level: The log level of the event.
+            msg: The event message.
+            kwargs: The event's keyword arguments.
+
+        Returns:
+            -1 if the event should be suppressed. Otherwise, the number of
+            duplicate events suppressed in the previous window.
+        """
+        if self.by_keys:
+            key: tuple = (name, level, msg, frozenset(kwargs))
+        else:
+            key = (name, level, msg)
+
+        now = self._clock()
+        event = self._events.get(key)
+        if event is None:
+            if len(self._events) >= self.max_events:
+                self._prune(now)
+            self._events[key] = [now, 0]
+            return 0
+
+        if now - event[0] < self.window:
+            if not event[1]:
+                due = event[0] + self.window
+                if due < self._next_due:
+                    self._next_due = due
+            event[1] += 1
+            return -1
+
+        suppressed = event[1]
+        event[0] = now
+        event[1] = 0
+        return suppressed
+
+    def due(self, name: str) -> List[Tuple[int, str, int]]:
+        """Stop tracking events for a logger whose window has ended with a
+        suppressed count pending.
+
+        Such an event did not occur again after its window, so its count
+        would otherwise not be emitted until it next occurs. When no counts
+        are pending, this returns without checking the clock.
+
+        Args:
+            name: The name of the logger to get due events for.
+
+        Returns:
+            A list of (level, message, suppressed count) for each due event.
+        """
+        if self._next_due == math.inf:
+            return []
+        now = self._clock()
+        if now < self._next_due:
+            return []
+
+        window = self.window
+        due = []
+        next_due = math.inf
+        for key, event in list(self._events.items()):
+            if not event[1]:
+                continue
+            end = event[0] + window
+            if now >= end:
+                if key[0] == name:
+                    due.append((key[1], key[2], event[1]))
+                    self._events.pop(key, None)
+                    continue
+                # Due for another logger sharing the Deduplicator; check again
+                # after a window rather than on every event.
+                end = now + window
+            if end < next_due:
+                next_due = end
+        self._next_due = next_due
+        return due
+
+    def drain(self, name: str) -> List[Tuple[int, str, int]]:
+        """Stop tracking all events for a logger which have suppressed counts.
+
+        Args:
+            name: The name of the logger to drain events for.
+
+        Returns:
+            A list of (level, message, suppressed count) for each drained event.
+        """
+        drained = []
+        for key, event in list(self._events.items()):
+            if key[0] == name and event[1]:
+                drained.append((key[1], key[2], event[1]))
+                del self._events[key]
+        return drained
+
+    def _prune(self, now: float) -> None:
+        """Stop tracking events whose window has ended.
+
+        Events with suppressed counts are kept so their count is not lost,
+        unless nothing else can be pruned.
+        """
+        window = self.window
+        expired = [k for k, e in list(self._events.items()) if now - e[0] >= window and not e[1]]
+        for key in expired:
+            del self._events[key]
+        if len(self._events) >= self.max_events:
+            self._events.clear()
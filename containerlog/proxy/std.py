@@ -181,6 +181,36 @@ class StdLoggerProxy(Logger):
         self.level = _normalize_level(level)
         self.containerlog.level = _map_level(level)
 
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether the underlying containerlog.Logger is enabled for
+        the given logging log level.
+        """
+        return self.containerlog.level <= _map_level(level)
+
+    @property
+    def trace_enabled(self) -> bool:
+        return self.containerlog.trace_enabled
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.containerlog.debug_enabled
+
+    @property
+    def info_enabled(self) -> bool:
+        return self.containerlog.info_enabled
+
+    @property
+    def warn_enabled(self) -> bool:
+        return self.containerlog.warn_enabled
+
+    @property
+    def error_enabled(self) -> bool:
+        return self.containerlog.error_enabled
+
+    @property
+    def critical_enabled(self) -> bool:
+        return self.containerlog.critical_enabled
+
     @property
     def writeout(self):
         return self.containerlog.writeout
@@ -210,7 +240,7 @@ class StdLoggerProxy(Logger):
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.trace(msg, **extras)
+        self.containerlog.trace(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     def debug(self, msg, *args, **kwargs):
         """Log a message at DEBUG level."""
@@ -219,7 +249,7 @@ class StdLoggerProxy(Logger):
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.debug(msg, **extras)
+        self.containerlog.debug(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     def info(self, msg, *args, **kwargs):
         """Log a message at INFO level."""
@@ -228,7 +258,7 @@ class StdLoggerProxy(Logger):
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.info(msg, **extras)
+        self.containerlog.info(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     def warning(self, msg, *args, **kwargs):
         """Log a message at WARN level."""
@@ -237,27 +267,42 @@ class StdLoggerProxy(Logger):
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.warn(msg, **extras)
+        self.containerlog.warn(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     warn = warning
 
     def error(self, msg, *args, **kwargs):
-        """Log a message at ERROR level."""
+        """Log a message at ERROR level.
+
+        If `exc_info` is set, the exception is included, as with the
+        standard logger.
+        """
         extras = {}
         if "extra" in kwargs:
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.error(msg, **extras)
+        if kwargs.get("exc_info"):
+            self.containerlog.error(
+                msg, exc_info=kwargs["exc_info"], stacklevel=_stacklevel(kwargs), **extras
+            )
+        else:
+            self.containerlog.error(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     def exception(self, msg, *args, **kwargs):
-        """Log a message at ERROR level with exception traceback."""
+        """Log a message at ERROR level with exception traceback.
+
+        The exception may be passed explicitly via `exc_info`, as with the
+        standard logger.
+        """
         extras = {}
         if "extra" in kwargs:
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.exception(msg, **extras)
+        self.containerlog.exception(
+            msg, exc_info=kwargs.get("exc_info", True), stacklevel=_stacklevel(kwargs), **extras
+        )
 
     def critical(self, msg, *args, **kwargs):
         """Log a message at CRITICAL level."""
@@ -266,7 +311,7 @@ class StdLoggerProxy(Logger):
             extras = kwargs["extra"]
         if args:
             msg = msg % args
-        self.containerlog.critical(msg, **extras)
+        self.containerlog.critical(msg, stacklevel=_stacklevel(kwargs), **extras)
 
     fatal = critical
 
@@ -275,9 +320,23 @@ class StdLoggerProxy(Logger):
         name = _get_level_name(level)
         if not name:
             return
+        # The level method adds a frame between the caller and the Logger.
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
         getattr(self, name)(msg, *args, **kwargs)
 
 
+def _stacklevel(kwargs):
+    """Get the stacklevel to pass to the containerlog.Logger for a log call
+    made via a StdLoggerProxy method.
+
+    The proxy method adds a frame between the caller and the Logger, so the
+    level is one more than the caller's (1, by default, as with the standard
+    logger). This keeps the callsite of events, and per-callsite sampling,
+    attributed to the caller rather than to the proxy.
+    """
+    return kwargs.get("stacklevel", 1) + 1
+
+
 def _get_level_name(level):
     """Get the name of the log method to use for the StdLoggerProxy based
     on the logging log level provided.
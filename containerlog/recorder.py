@@ -0,0 +1,115 @@
+"""A flight recorder for log events below a logger's log level.
+
+Running at INFO level keeps log volume down, but when an error happens the
+DEBUG events leading up to it are often what is needed to understand it.
+A FlightRecorder set on a Logger captures events which are below the
+logger's level (but at or above the recorder's level) in a bounded,
+per-thread ring buffer. The events are stored raw, without rendering, so
+recording one costs little more than appending a tuple to a deque.
+
+When the logger logs at ERROR level or above (including `exception()`),
+the recorded events for the current thread are rendered and written out
+ahead of the error, and the buffer is cleared.
+
+    logger.level = containerlog.INFO
+    logger.recorder = recorder.FlightRecorder(capacity=100)
+
+A recorder may be shared by multiple loggers, in which case an error on
+any of them writes out the recorded events from all of them. Since events
+are rendered when they are written out rather than when they are recorded,
+mutable values passed as keyword arguments are rendered as they are at the
+time of the error, and context processor fields (e.g. contextvars) are
+those bound at the time of the error.
+
+In a process forked from one with a recorder (e.g. a prefork server
+worker), the recorder starts out empty.
+"""
+
+import collections
+import os
+import threading
+import weakref
+from typing import Any, Deque, Dict, List, Tuple
+
+__all__ = [
+    "FlightRecorder",
+]
+
+# A recorded log event: the logger, timestamp, log level, message, and kwargs.
+Record = Tuple[Any, Any, int, str, Dict[str, Any]]
+
+
+class FlightRecorder:
+    """A bounded, per-thread ring buffer of unrendered log events.
+
+    Args:
+        capacity: The maximum number of events to keep per thread. Once full,
+            the oldest events are evicted as new ones are recorded.
+        level: The lowest log level to record. Defaults to DEBUG (1).
+    """
+
+    def __init__(self, capacity: int = 256, level: int = 1) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got: {capacity}")
+        self.capacity: int = capacity
+        self.level: int = level
+        self._local = threading.local()
+        _recorders.add(self)
+
+    def _buffer(self) -> Deque[Record]:
+        """Get the ring buffer for the current thread, creating it if needed."""
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer: Deque[Record] = collections.deque(maxlen=self.capacity)
+            self._local.buffer = buffer
+            return buffer
+
+    def record(
+        self, logger: Any, timestamp: Any, level: int, msg: str, kwargs: Dict[str, Any]
+    ) -> None:
+        """Record a log event for the current thread.
+
+        Args:
+            logger: The containerlog.Logger the event was logged to.
+            timestamp: The time the event was logged.
+            level: The log level of the event.
+            msg: The event message.
+            kwargs: The event's keyword arguments.
+        """
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._buffer()
+        buffer.append((logger, timestamp, level, msg, kwargs))
+
+    def drain(self) -> List[Record]:
+        """Get and clear all recorded events for the current thread.
+
+        Returns:
+            The recorded events, oldest first.
+        """
+        buffer = self._buffer()
+        records = list(buffer)
+        buffer.clear()
+        return records
+
+    def clear(self) -> None:
+        """Clear all recorded events for the current thread."""
+        self._buffer().clear()
+
+
+# Recorders, so their buffers can be reset when the process forks.
+_recorders: "weakref.WeakSet[FlightRecorder]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    # Events recorded before the fork are the parent's, so an error in the
+    # child should not write them out again.
+    for recorder in _recorders:
+        recorder._local = threading.local()
+
+
+# os.register_at_fork is not available on Windows, or before Python 3.7.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
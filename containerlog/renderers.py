@@ -0,0 +1,572 @@
+"""Renderers which format log events as log lines.
+
+A Renderer defines the parts of a log line: the timestamp, a prefix holding
+the logger name and level, the event message, the callsite, the fields, and
+any exception text. When a Renderer is set on a Logger, it is compiled into
+a single closure for that logger. Everything which is static for the logger
+(e.g. the rendered logger name and level for each log level) is rendered at
+compile time, and the parts which vary per event are bound as locals, so
+there is no per-event dispatch on the renderer's configuration.
+
+    logger.renderer = MyRenderer()
+    containerlog.set_renderer(MyRenderer())
+
+The built-in key='value' format is implemented by KeyValueRenderer, which is
+the default. It is compiled in the same way as any other renderer, so a
+custom renderer which implements the same parts is just as fast.
+
+LogfmtRenderer renders strict logfmt, which standard logfmt parsers can
+parse without falling back to heuristics. CompactRenderer renders logfmt
+with short keys, to reduce log shipping bandwidth and storage.
+"""
+
+import datetime
+import re
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, FrozenSet, List, Match, Optional, Tuple
+
+from .tracebacks import get_exc_info
+from .types import EventContext
+
+__all__ = [
+    "COMPACT_KEYS",
+    "COMPACT_LEVELS",
+    "CompactRenderer",
+    "KeyValueRenderer",
+    "LogfmtRenderer",
+    "RenderFn",
+    "Renderer",
+]
+
+# The level names, indexed by log level.
+LEVEL_NAMES = ("trace", "debug", "info", "warn", "error", "critical")
+
+# The default short keys used by CompactRenderer, by full key.
+COMPACT_KEYS = {
+    "timestamp": "ts",
+    "logger": "lg",
+    "level": "lv",
+    "event": "msg",
+    "module": "mod",
+    "func": "fn",
+    "line": "ln",
+}
+
+# The single-character level names used by CompactRenderer, indexed by log level.
+COMPACT_LEVELS = ("T", "D", "I", "W", "E", "C")
+
+# A compiled renderer. It takes the log level, message, exception (see
+# `tracebacks.get_exc_info`), the frame of the log call if the callsite is
+# to be rendered, and the event's keyword arguments. Optionally, it also takes
+# a timestamp, which defaults to the current time, the context processor
+# fields, which default to those merged from the Logger's manager, and the
+# already rendered timestamp, which is used in place of the timestamp. It
+# returns the rendered log line.
+RenderFn = Callable[..., str]
+
+# The maximum number of entries to keep in each renderer cache.
+_MAX_CACHE_SIZE = 10000
+
+# Matches the characters which require a logfmt value to be quoted: spaces,
+# control characters, and logfmt syntax.
+_needs_quote = re.compile(r'[\x00-\x20\x7f\s="\\]').search
+
+# Matches the characters which must be escaped in a quoted logfmt value.
+_needs_escape = re.compile(r'[\x00-\x1f\x7f\\"]').search
+
+# Matches the control characters without a short escape in a quoted logfmt
+# value, which are escaped as \u00XX so they cannot reach a terminal as-is.
+_control_chars = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+# Matches the characters which are not valid in a logfmt key.
+_invalid_key_chars = re.compile(r'[\x00-\x20\x7f\s="\\]')
+
+
+def _escape(s: str) -> str:
+    """Escape a string so it renders as a single-line, single-quoted value."""
+    if "\\" in s:
+        s = s.replace("\\", "\\\\")
+    if "'" in s:
+        s = s.replace("'", "\\'")
+    if "\n" in s:
+        s = s.replace("\n", "\\n")
+    if "\r" in s:
+        s = s.replace("\r", "\\r")
+    return s
+
+
+def _logfmt_quote(s: str) -> str:
+    """Quote and escape a logfmt value."""
+    if not _needs_escape(s):
+        return f'"{s}"'
+    if "\\" in s:
+        s = s.replace("\\", "\\\\")
+    if '"' in s:
+        s = s.replace('"', '\\"')
+    if "\n" in s:
+        s = s.replace("\n", "\\n")
+    if "\r" in s:
+        s = s.replace("\r", "\\r")
+    if "\t" in s:
+        s = s.replace("\t", "\\t")
+    s = _control_chars.sub(_unicode_escape, s)
+    return f'"{s}"'
+
+
+def _unicode_escape(match: Match[str]) -> str:
+    """Escape a matched character as \\u00XX."""
+    return f"\\u{ord(match.group()):04x}"
+
+
+def _logfmt_value(s: str) -> str:
+    """Render a string as a logfmt value, quoting it only if needed."""
+    if not s or _needs_quote(s):
+        return _logfmt_quote(s)
+    return s
+
+
+class Renderer:
+    """Base class for log line renderers.
+
+    Subclasses implement each part of the log line. The parts are joined
+    without separators, so each part is responsible for its own spacing:
+
+        {timestamp}{prefix}{message}{callsite}{fields}{end}
+
+    where {end} is a newline, or for events with an exception, the result of
+    the `exception` part.
+
+    Subclasses may also override `compile` to change how the parts are
+    assembled, though the compiled closure is then responsible for the whole
+    event, including context processors and exceptions.
+    """
+
+    # The keys of the built-in parts of the log line. Fields with these keys
+    # are prefixed with an underscore, so they do not collide.
+    reserved: FrozenSet[str] = frozenset(("timestamp", "logger", "level", "event"))
+
+    # The keys of the callsite. These are only reserved if the callsite is
+    # rendered.
+    callsite_keys: FrozenSet[str] = frozenset(("module", "func", "line"))
+
+    def __init__(self) -> None:
+        # Caches the static parts of the rendered callsite per code object.
+        self._callsite_cache: Dict[CodeType, Tuple[str, str]] = {}
+
+    def timestamp(self, ts: datetime.datetime) -> str:
+        """Render the timestamp of a log event.
+
+        Args:
+            ts: The time of the log event.
+        """
+        raise NotImplementedError
+
+    def prefix(self, name: str, level: int) -> str:
+        """Render the static text between the timestamp and the message.
+
+        This is rendered once per level when the renderer is compiled.
+
+        Args:
+            name: The name of the logger.
+            level: The log level.
+        """
+        raise NotImplementedError
+
+    def message(self, msg: str) -> str:
+        """Render the message of a log event.
+
+        Args:
+            msg: The message.
+        """
+        raise NotImplementedError
+
+    def callsite(self, module: str, func: str) -> Tuple[str, str]:
+        """Render the static parts of a callsite.
+
+        This is rendered once per code object, and cached.
+
+        Args:
+            module: The module name of the log call.
+            func: The function name of the log call.
+
+        Returns:
+            The text which goes before and after the line number.
+        """
+        raise NotImplementedError
+
+    def fields(self, fields: EventContext) -> str:
+        """Render the fields of a log event.
+
+        Args:
+            fields: The merged context processor fields and keyword arguments
+                of the event.
+        """
+        raise NotImplementedError
+
+    def key(self, key: str, first: bool) -> str:
+        """Render the static text which goes before the value of a field.
+
+        This is only used for pre-declared event schemas (see `schemas`), which
+        render the keys of their fields once, when the schema is declared.
+
+        Args:
+            key: The key of the field.
+            first: Whether this is the first field of the event.
+        """
+        raise NotImplementedError
+
+    def value(self, value: Any) -> str:
+        """Render the value of a field.
+
+        This is only used for pre-declared event schemas (see `schemas`). It
+        must render values as `fields` does.
+
+        Args:
+            value: The value of the field.
+        """
+        raise NotImplementedError
+
+    def exception_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare the fields from the Logger's exception renderer.
+
+        Exception renderers return raw values (e.g. an exception message may
+        contain quotes and newlines), which are rendered as event fields. By
+        default, they are rendered like any other field.
+
+        Args:
+            fields: The fields from the Logger's exception renderer.
+        """
+        return fields
+
+    def exception(self, text: str) -> str:
+        """Render the end of the log line for an event with an exception.
+
+        Events without an exception end with a newline. For events with an
+        exception, this renders the end of the line, including the newline.
+        By default, the exception text is appended after the newline.
+
+        Args:
+            text: The text from the Logger's exception renderer. This may be
+                empty, e.g. if the exception is rendered as fields.
+        """
+        return f"\n{text}"
+
+    def compile(self, logger: Any) -> RenderFn:
+        """Compile the renderer into a closure for a logger.
+
+        Configuration which may be changed on the Logger after it is compiled
+        (its manager, clock, and exception renderer) is read when each event
+        is rendered.
+
+        Args:
+            logger: The containerlog.Logger to compile the renderer for.
+
+        Returns:
+            The compiled renderer.
+        """
+        timestamp = self.timestamp
+        prefixes = tuple(self.prefix(logger.name, level) for level in range(len(LEVEL_NAMES)))
+        message = self.message
+        render_callsite = self.callsite
+        render_fields = self.fields
+        exception = self.exception
+        exception_fields = self.exception_fields
+        callsite_cache = self._callsite_cache
+        reserved = self.reserved
+        reserved_callsite = reserved | self.callsite_keys
+
+        def render(
+            loglevel: int,
+            msg: str,
+            exc: Any,
+            frame: Optional[FrameType],
+            kwargs: Dict[str, Any],
+            ts: Optional[datetime.datetime] = None,
+            context: Optional[EventContext] = None,
+            stamp: Optional[str] = None,
+        ) -> str:
+            # The context processor fields may be merged once for a batch of
+            # events, in which case they are copied for each event.
+            if context is None:
+                fields: EventContext = {}
+                for processor in logger.manager.context_processors:
+                    processor.merge(fields)
+            else:
+                fields = dict(context)
+
+            fields.update(kwargs)
+
+            # Render the exception. Depending on the exception renderer, it
+            # may be rendered as fields of the event and/or as text at the end
+            # of the event.
+            end = "\n"
+            if exc:
+                exc_type, exc_value, tb = get_exc_info(exc)
+                exc_renderer = logger.exc_renderer
+                fields.update(exception_fields(exc_renderer.fields(exc_type, exc_value, tb)))
+                end = exception(exc_renderer.text(exc_type, exc_value, tb))
+                del tb
+
+            # If any of the merged fields collide with a reserved key, the key
+            # is prefixed with an underscore. Fields rarely collide, so this is
+            # checked once for all of the fields, with a single set operation.
+            if fields:
+                keys = reserved if frame is None else reserved_callsite
+                if not keys.isdisjoint(fields):
+                    fields = {f"_{k}" if k in keys else k: v for k, v in fields.items()}
+
+            callsite = ""
+            if frame is not None:
+                code = frame.f_code
+                parts = callsite_cache.get(code)
+                if parts is None:
+                    parts = render_callsite(frame.f_globals.get("__name__", ""), code.co_name)
+                    callsite_cache[code] = parts
+                callsite = f"{parts[0]}{frame.f_lineno}{parts[1]}"
+
+            # The timestamp may be rendered once for a batch of events.
+            if stamp is None:
+                stamp = timestamp(logger.utcnow() if ts is None else ts)
+
+            return f"{stamp}{prefixes[loglevel]}{message(msg)}{callsite}{render_fields(fields)}{end}"  # noqa
+
+        return render
+
+
+class KeyValueRenderer(Renderer):
+    """Render log events in the key='value' format.
+
+    String values are wrapped in single quotes. Other values are rendered
+    with their __str__ (or __repr__). Single quotes in the message are
+    escaped.
+
+        timestamp='2020-01-01T00:00:00Z' logger='app' level='info' event='msg' key='value' n=1
+    """
+
+    def timestamp(self, ts: datetime.datetime) -> str:
+        return f"timestamp='{ts.isoformat('T')}Z'"
+
+    def prefix(self, name: str, level: int) -> str:
+        return f" logger='{name}' level='{LEVEL_NAMES[level]}' event="
+
+    def message(self, msg: str) -> str:
+        # Since log message are output in the format: event='message', any single
+        # quotes within the message should be escaped.
+        if "'" in msg:
+            msg = msg.replace("'", "\\'")
+        return f"'{msg}' "
+
+    def callsite(self, module: str, func: str) -> Tuple[str, str]:
+        return f"module='{module}' func='{func}' line=", " "
+
+    def fields(self, fields: EventContext) -> str:
+        # For extra kv items, if the value is a string, wrap it in single quotes.
+        # Otherwise let the object's __str__ or __repr__ deal with it.
+        return " ".join(
+            [f"{k}='{v}'" if isinstance(v, str) else f"{k}={v}" for k, v in fields.items()]
+        )
+
+    def key(self, key: str, first: bool) -> str:
+        return f"{key}=" if first else f" {key}="
+
+    def exception_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        # Exception messages and stacks often contain quotes and newlines, so
+        # they are escaped to keep the event on a single, parseable line.
+        return {k: _escape(v) if isinstance(v, str) else v for k, v in fields.items()}
+
+    def value(self, value: Any) -> str:
+        return f"'{value}'" if isinstance(value, str) else f"{value}"
+
+
+class LogfmtRenderer(Renderer):
+    """Render log events in strict logfmt.
+
+    Values are only quoted if needed: if they are empty or contain spaces,
+    '=', '"', or '\\'. Quoted values are wrapped in double quotes, with
+    backslashes, double quotes, and control characters escaped. None is
+    rendered as null, and booleans as true and false. Other values are
+    rendered with their __str__ (or __repr__), quoted if needed. Characters
+    which are not valid in a key are replaced with '_'.
+
+        timestamp=2020-01-01T00:00:00Z logger=app level=info event="a message" tags="[1, 2]"
+
+    Since logfmt is a single-line format, exception text from the Logger's
+    exception renderer is escaped into an `exc_text` field rather than
+    appended after the line.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Caches the rendered form of each key and message. Messages are
+        # almost always constant strings, so most are rendered only once.
+        self._keys: Dict[str, str] = {}
+        self._messages: Dict[str, str] = {}
+
+    def timestamp(self, ts: datetime.datetime) -> str:
+        return f"timestamp={ts.isoformat('T')}Z"
+
+    def prefix(self, name: str, level: int) -> str:
+        return f" logger={_logfmt_value(name)} level={LEVEL_NAMES[level]} event="
+
+    def message(self, msg: str) -> str:
+        rendered = self._messages.get(msg)
+        if rendered is None:
+            rendered = _logfmt_value(msg)
+            if len(self._messages) < _MAX_CACHE_SIZE:
+                self._messages[msg] = rendered
+        return rendered
+
+    def callsite(self, module: str, func: str) -> Tuple[str, str]:
+        return f" module={_logfmt_value(module)} func={_logfmt_value(func)} line=", ""
+
+    def fields(self, fields: EventContext) -> str:
+        keys = self._keys
+        needs_quote = _needs_quote
+        parts: List[str] = []
+        append = parts.append
+        for k, v in fields.items():
+            key = keys.get(k)
+            if key is None:
+                key = self._key(k)
+
+            # Most string values are alphanumeric, which is checked much faster
+            # than the characters which require quoting.
+            t = type(v)
+            if t is str:
+                if not v.isalnum() and (not v or needs_quote(v)):
+                    v = _logfmt_quote(v)
+            elif t is int or t is float:
+                pass
+            elif v is None:
+                v = "null"
+            elif v is True:
+                v = "true"
+            elif v is False:
+                v = "false"
+            else:
+                v = str(v)
+                if not v or needs_quote(v):
+                    v = _logfmt_quote(v)
+            append(f" {key}={v}")
+        return "".join(parts)
+
+    def key(self, key: str, first: bool) -> str:
+        rendered = self._keys.get(key)
+        if rendered is None:
+            rendered = self._key(key)
+        return f" {rendered}="
+
+    def value(self, value: Any) -> str:
+        t = type(value)
+        if t is str:
+            if not value.isalnum() and (not value or _needs_quote(value)):
+                return _logfmt_quote(value)
+            return value
+        if t is int or t is float:
+            return f"{value}"
+        if value is None:
+            return "null"
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        value = str(value)
+        if not value or _needs_quote(value):
+            return _logfmt_quote(value)
+        return value
+
+    def exception(self, text: str) -> str:
+        if not text:
+            return "\n"
+        return f" exc_text={_logfmt_quote(text.rstrip())}\n"
+
+    def _key(self, key: str) -> str:
+        """Render a key, replacing any invalid characters, and cache it."""
+        rendered = _invalid_key_chars.sub("_", key) or "_"
+        if len(self._keys) < _MAX_CACHE_SIZE:
+            self._keys[key] = rendered
+        return rendered
+
+
+class CompactRenderer(LogfmtRenderer):
+    """Render log events in logfmt, with short keys.
+
+    The built-in keys (timestamp, logger, level, event, and the callsite
+    keys) are replaced with short keys, by default those in COMPACT_KEYS.
+    Levels may be rendered as a single character (see COMPACT_LEVELS), and
+    the logger name may be left out for a root logger. Values are rendered
+    as with LogfmtRenderer.
+
+        ts=2020-01-01T00:00:00Z lg=app lv=I msg="a message" key=value
+
+    Use `mapping` to get the mapping needed to expand compact lines back to
+    their full form, e.g. in a log collector. Fields named after a short or
+    a full built-in key are prefixed with an underscore, so expanding a line
+    never produces duplicate keys.
+
+    Args:
+        keys: Short keys to use, by full key. These override the defaults in
+            COMPACT_KEYS, so only keys which differ need to be set.
+        short_levels: Whether to render levels as a single character. This is
+            enabled by default.
+        root: The name of the root logger. The logger name is left out of log
+            lines for the root logger. By default, the logger name is always
+            rendered.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[Dict[str, str]] = None,
+        short_levels: bool = True,
+        root: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        self.keys: Dict[str, str] = dict(COMPACT_KEYS)
+        if keys:
+            unknown = set(keys) - set(COMPACT_KEYS)
+            if unknown:
+                raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+            self.keys.update(keys)
+        if len(set(self.keys.values())) != len(self.keys):
+            raise ValueError("short keys must be unique")
+        for short in self.keys.values():
+            if not short or _invalid_key_chars.search(short):
+                raise ValueError(f"invalid key: {short!r}")
+        self.short_levels: bool = short_levels
+        self.root: Optional[str] = root
+        self._timestamp_key = f"{self.keys['timestamp']}="
+        # Lines are expanded by mapping short keys to full keys, so fields
+        # named after either (including the callsite keys, even without the
+        # callsite) are renamed, to keep the expansion unambiguous.
+        self.reserved = frozenset(self.keys) | frozenset(self.keys.values())
+        self.callsite_keys = self.reserved
+
+    @property
+    def mapping(self) -> Dict[str, Any]:
+        """The mapping from compact log lines to their full form.
+
+        This is a dict with "keys", mapping each short key to its full key,
+        and "levels", mapping each rendered level to its full level name.
+        """
+        levels = COMPACT_LEVELS if self.short_levels else LEVEL_NAMES
+        return {
+            "keys": {short: full for full, short in self.keys.items()},
+            "levels": dict(zip(levels, LEVEL_NAMES)),
+        }
+
+    def timestamp(self, ts: datetime.datetime) -> str:
+        return f"{self._timestamp_key}{ts.isoformat('T')}Z"
+
+    def prefix(self, name: str, level: int) -> str:
+        keys = self.keys
+        levelname = COMPACT_LEVELS[level] if self.short_levels else LEVEL_NAMES[level]
+        logger = "" if name == self.root else f" {keys['logger']}={_logfmt_value(name)}"
+        return f"{logger} {keys['level']}={levelname} {keys['event']}="
+
+    def callsite(self, module: str, func: str) -> Tuple[str, str]:
+        keys = self.keys
+        return (
+            f" {keys['module']}={_logfmt_value(module)} {keys['func']}={_logfmt_value(func)}"
+            f" {keys['line']}=",
+            "",
+        )
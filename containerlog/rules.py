@@ -0,0 +1,285 @@
+"""Rules for configuring loggers by name or glob.
+
+Rules are created by calls like `containerlog.disable('foo.*')`. They are
+kept in an ordered table so that they can be applied to loggers created
+after the rule was added, not just to loggers which existed at the time.
+
+Patterns are compiled when a rule is added. Exact names are looked up in a
+dict, patterns which are a literal prefix followed by a single trailing '*'
+(the common case, e.g. 'foo.*') are stored in a prefix trie, and any other
+glob is compiled to a regular expression. Matching a logger name against
+the table is therefore proportional to the length of the name, plus the
+number of complex globs, rather than the number of rules.
+"""
+
+import fnmatch
+import itertools
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+__all__ = [
+    "Rule",
+    "RuleTable",
+]
+
+# Rule actions.
+DISABLE = "disable"
+ENABLE = "enable"
+LEVEL = "level"
+BOOST = "boost"
+ROUTE = "route"
+
+# Rule kinds. Enable and disable rules both change the enabled state of a
+# logger, so they are the same kind of rule. Level, boost, and route rules
+# are each their own kind.
+STATE = "state"
+
+# Characters which have special meaning in an fnmatch glob.
+_GLOB_CHARS = frozenset("*?[")
+
+
+class Rule:
+    """A configuration action applied to loggers matching a name or glob.
+
+    Args:
+        pattern: The name or glob that logger names are matched against.
+        action: The action to apply to matching loggers. One of "enable",
+            "disable", "level", "boost", or "route".
+        level: The log level to set, for "level" rules.
+        boost: The containerlog.adaptive.Boost to set, for "boost" rules. This
+            may be None, to stop boosting matching loggers.
+        sink: The name of the sink to route to, for "route" rules.
+        levels: The (lowest, highest) log levels to route, for "route" rules.
+            Defaults to all levels.
+    """
+
+    __slots__ = (
+        "pattern",
+        "action",
+        "level",
+        "boost",
+        "sink",
+        "levels",
+        "seq",
+        "prefix",
+        "regex",
+    )
+
+    def __init__(
+        self,
+        pattern: str,
+        action: str,
+        level: Optional[int] = None,
+        boost=None,
+        sink: Optional[str] = None,
+        levels: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        if action not in (DISABLE, ENABLE, LEVEL, BOOST, ROUTE):
+            raise ValueError(f"unknown rule action: {action}")
+        if action == LEVEL and level is None:
+            raise ValueError("a level must be specified for level rules")
+        if action == ROUTE:
+            if sink is None:
+                raise ValueError("a sink must be specified for route rules")
+            if levels is None:
+                levels = (0, 5)
+
+        self.pattern: str = pattern
+        self.action: str = action
+        self.level: Optional[int] = level
+        self.boost = boost
+        self.sink: Optional[str] = sink
+        self.levels: Optional[Tuple[int, int]] = levels
+        self.seq: int = 0
+
+        # Compile the pattern. Exact names have neither a prefix nor a regex,
+        # a literal prefix followed by a trailing '*' has only a prefix, and
+        # all other globs are compiled to a regex.
+        self.prefix: Optional[str] = None
+        self.regex: Optional[Pattern[str]] = None
+        if _GLOB_CHARS.intersection(pattern):
+            if pattern.endswith("*") and not _GLOB_CHARS.intersection(pattern[:-1]):
+                self.prefix = pattern[:-1]
+            else:
+                self.regex = re.compile(fnmatch.translate(pattern))
+
+    @property
+    def kind(self) -> str:
+        """The kind of rule, used to determine which rules supersede which."""
+        if self.action == DISABLE or self.action == ENABLE:
+            return STATE
+        return self.action
+
+    def matches(self, name: str) -> bool:
+        """Check whether the logger name matches the rule's pattern.
+
+        Args:
+            name: The logger name to check.
+        """
+        if self.prefix is not None:
+            return name.startswith(self.prefix)
+        if self.regex is not None:
+            return self.regex.match(name) is not None
+        return name == self.pattern
+
+    def apply(self, logger) -> None:
+        """Apply the rule's action to a logger.
+
+        Args:
+            logger: The containerlog.Logger to apply the rule to.
+        """
+        if self.action == DISABLE:
+            logger.disable()
+        elif self.action == ENABLE:
+            logger.enable()
+        elif self.action == BOOST:
+            logger.boost = self.boost
+        elif self.action == ROUTE:
+            logger.set_sink(logger.manager.sinks[self.sink], *self.levels)  # type: ignore
+        else:
+            logger.level = self.level
+
+
+class _TrieNode:
+    """A node in the prefix trie for prefix-glob rules."""
+
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.rules: List[Rule] = []
+
+
+class RuleTable:
+    """An ordered table of logger configuration rules.
+
+    Rules are applied in the order they were added. When a rule is added,
+    any earlier rule of the same kind for the same pattern (and for route
+    rules, the same level range) is dropped, as the new rule supersedes it.
+    This keeps the table from growing when the same loggers are repeatedly
+    reconfigured.
+    """
+
+    __slots__ = (
+        "_rules",
+        "_exact",
+        "_trie",
+        "_globs",
+        "_seq",
+    )
+
+    def __init__(self) -> None:
+        self._rules: List[Rule] = []
+        self._exact: Dict[str, List[Rule]] = {}
+        self._trie: _TrieNode = _TrieNode()
+        self._globs: List[Rule] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def add(self, rule: Rule) -> Rule:
+        """Add a rule to the end of the table.
+
+        Args:
+            rule: The rule to add.
+
+        Returns:
+            The added rule.
+        """
+        kind = rule.kind
+        superseded = [
+            r
+            for r in self._rules
+            if r.pattern == rule.pattern and r.kind == kind and r.levels == rule.levels
+        ]
+        if superseded:
+            self._rebuild([r for r in self._rules if r not in superseded])
+
+        rule.seq = next(self._seq)
+        self._rules.append(rule)
+        self._index(rule)
+        return rule
+
+    def mark(self) -> int:
+        """Get a sequence number ordering a change made outside of the table
+        (e.g. a global disable) after all rules added so far.
+
+        Returns:
+            A sequence number greater than that of any rule added so far, and
+            less than that of any rule added later on.
+        """
+        return next(self._seq)
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """Remove rules from the table.
+
+        Args:
+            kind: The kind of rule to remove (STATE, LEVEL, BOOST, or ROUTE). If not
+                specified, all rules are removed.
+        """
+        if kind is None:
+            self._rebuild([])
+        else:
+            self._rebuild([r for r in self._rules if r.kind != kind])
+
+    def match(self, name: str) -> List[Rule]:
+        """Get all rules which match a logger name, in the order they were added.
+
+        Args:
+            name: The logger name to match.
+
+        Returns:
+            The matching rules.
+        """
+        if not self._rules:
+            return []
+
+        matched: List[Rule] = []
+        exact = self._exact.get(name)
+        if exact:
+            matched.extend(exact)
+
+        node = self._trie
+        matched.extend(node.rules)
+        for char in name:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            matched.extend(node.rules)
+
+        for rule in self._globs:
+            if rule.matches(name):
+                matched.append(rule)
+
+        matched.sort(key=lambda r: r.seq)
+        return matched
+
+    def _index(self, rule: Rule) -> None:
+        """Add a rule to the lookup structure for its pattern type."""
+        if rule.prefix is not None:
+            node = self._trie
+            for char in rule.prefix:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode()
+                node = child
+            node.rules.append(rule)
+        elif rule.regex is not None:
+            self._globs.append(rule)
+        else:
+            self._exact.setdefault(rule.pattern, []).append(rule)
+
+    def _rebuild(self, rules: List[Rule]) -> None:
+        """Rebuild the lookup structures from the given rules."""
+        self._rules = []
+        self._exact = {}
+        self._trie = _TrieNode()
+        self._globs = []
+        for rule in rules:
+            self._rules.append(rule)
+            self._index(rule)
@@ -0,0 +1,163 @@
+"""Samplers for reducing the volume of high-frequency log events.
+
+A sampler can be set on a Logger, so it applies to all of the logger's
+log calls, or passed to a single log call via the `sampler` keyword.
+
+    logger.sampler = sampling.EveryN(100)
+    logger.debug("cache miss", key=key)
+
+    every_10 = sampling.EveryN(10)
+    logger.info("request", sampler=every_10, path=path)
+
+Events which are kept at a rate below 1 get a `sampled` field holding
+the (possibly estimated) sample rate, so that downstream counts can be
+scaled back up by dividing by it.
+
+Samplers which keep per-key state track at most `max_keys` keys, so
+sampling by message with many distinct messages cannot grow without
+bound. When the limit is reached, stale keys are dropped.
+
+Sampler state is not locked. Under concurrent use from multiple threads,
+sampling decisions may be slightly off, which is acceptable for reducing
+log volume.
+"""
+
+import random
+import time
+from typing import Dict, Hashable, List
+
+from .types import Sampler
+
+__all__ = [
+    "EveryN",
+    "Probability",
+    "RateLimit",
+]
+
+_BY_VALUES = ("callsite", "message")
+
+
+def _by_callsite(by: str) -> bool:
+    """Validate the `by` argument for a sampler.
+
+    Args:
+        by: What to sample by, either "callsite" or "message".
+
+    Returns:
+        True if sampling by callsite, False if sampling by message.
+    """
+    if by not in _BY_VALUES:
+        raise ValueError(f"sampler 'by' must be one of {_BY_VALUES}, got: {by}")
+    return by == "callsite"
+
+
+class EveryN(Sampler):
+    """Keep the first of every N events for each callsite or message.
+
+    Args:
+        n: Keep 1 in every `n` events.
+        by: Whether to count events per "callsite" (default) or per "message".
+        max_keys: The maximum number of callsites or messages to count. When
+            exceeded, all counts are reset, so the next event for each key
+            is kept.
+    """
+
+    def __init__(self, n: int, by: str = "callsite", max_keys: int = 10000) -> None:
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got: {n}")
+        self.n: int = n
+        self.rate: float = 1.0 / n
+        self.by_callsite: bool = _by_callsite(by)
+        self.max_keys: int = max_keys
+        self._counts: Dict[Hashable, int] = {}
+
+    def sample(self, key: Hashable) -> float:
+        counts = self._counts
+        count = counts.get(key)
+        if count is None:
+            if len(counts) >= self.max_keys:
+                counts.clear()
+            count = 0
+        counts[key] = count + 1
+        if count % self.n:
+            return 0.0
+        return self.rate
+
+
+class Probability(Sampler):
+    """Keep each event with a fixed probability.
+
+    Since this does not keep any per-key state, it does not matter whether
+    it samples by callsite or by message.
+
+    Args:
+        p: The probability (0 to 1) that an event is kept.
+    """
+
+    def __init__(self, p: float) -> None:
+        if not 0 <= p <= 1:
+            raise ValueError(f"p must be between 0 and 1, got: {p}")
+        self.p: float = p
+        self.by_callsite: bool = False
+        self._random = random.random
+
+    def sample(self, key: Hashable) -> float:
+        if self._random() < self.p:
+            return self.p
+        return 0.0
+
+
+class RateLimit(Sampler):
+    """Keep at most N events per second for each callsite or message.
+
+    The sample rate for a kept event is estimated from the previous
+    one-second window (the ratio of events kept to events seen), since the
+    rate for the current window is not known until it ends.
+
+    Args:
+        per_second: The maximum number of events to keep per second.
+        by: Whether to limit events per "callsite" (default) or per "message".
+        max_keys: The maximum number of callsites or messages to track. When
+            exceeded, keys whose window has ended are dropped from tracking.
+    """
+
+    def __init__(self, per_second: int, by: str = "callsite", max_keys: int = 10000) -> None:
+        if per_second < 1:
+            raise ValueError(f"per_second must be at least 1, got: {per_second}")
+        self.per_second: int = per_second
+        self.by_callsite: bool = _by_callsite(by)
+        self.max_keys: int = max_keys
+        self._clock = time.monotonic
+
+        # Maps each key to its current window, as a list of: the window start
+        # time, events seen in the window, and the estimated sample rate.
+        self._windows: Dict[Hashable, List] = {}
+
+    def sample(self, key: Hashable) -> float:
+        now = self._clock()
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= self.max_keys:
+                self._prune(now)
+            window = self._windows[key] = [now, 0, 1.0]
+        elif now - window[0] >= 1.0:
+            seen = window[1]
+            window[0] = now
+            window[1] = 0
+            window[2] = 1.0 if seen <= self.per_second else self.per_second / seen
+
+        window[1] += 1
+        if window[1] > self.per_second:
+            return 0.0
+        return window[2]
+
+    def _prune(self, now: float) -> None:
+        """Stop tracking keys whose window has ended.
+
+        If every window is still current, all keys are dropped.
+        """
+        expired = [k for k, w in list(self._windows.items()) if now - w[0] >= 1.0]
+        for key in expired:
+            del self._windows[key]
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
@@ -0,0 +1,138 @@
+"""Pre-declared event schemas for the hottest log statements.
+
+Most of the work in logging an event is generic: collecting the keyword
+arguments into a dict, checking them for reserved keys, merging them with
+context processor fields, and joining the rendered fields. For the handful
+of log statements which make up most of a program's log volume, the shape
+of the event is always the same. Declaring it once lets all of that be
+done up front:
+
+    request_done = schemas.event(
+        logger, containerlog.INFO, "request done", ("route", "status", "duration_ms")
+    )
+
+    request_done("/items", 200, 12.5)
+
+`event` generates a function for exactly that shape. It takes the field
+values positionally, and renders them between the keys and static text
+rendered when the schema was declared, so an event costs little more than
+rendering its timestamp and values.
+
+The generated function still honors the Logger's configuration. If the
+Logger has any per-event feature which the fast path does not implement
+(callsite, sampling, duplicate suppression, a budget, an active boost,
+context processors, or a renderer other than the one the schema was
+declared with), the event is passed to the Logger's regular log method, so
+it is logged exactly as `logger.info("request done", route=...)` would log
+it. Events below the Logger's level are dropped, or recorded by its flight
+recorder. Events at ERROR level and above always take the regular path.
+"""
+
+import keyword
+import sys
+from typing import Any, Callable, Dict, Sequence
+
+from .renderers import LEVEL_NAMES
+
+__all__ = [
+    "event",
+]
+
+# The arguments of the Logger's log method, which may not be used as fields of
+# a schema, along with the keys reserved by the Logger's renderer.
+_ARGUMENTS = frozenset(("loglevel", "msg", "exc", "sampler", "exc_info", "stacklevel"))
+
+
+def event(logger: Any, level: int, msg: str, fields: Sequence[str]) -> Callable[..., None]:
+    """Declare an event schema, and get a function which logs it.
+
+    Args:
+        logger: The containerlog.Logger to log the events to.
+        level: The log level of the events.
+        msg: The message of the events.
+        fields: The keys of the event fields, in the order they are rendered.
+            The returned function takes the values of the fields positionally,
+            in this order.
+
+    Returns:
+        A function which logs an event with the given field values.
+
+    Raises:
+        ValueError: A field is reserved or duplicated, or the level is invalid.
+    """
+    if level not in range(len(LEVEL_NAMES)):
+        raise ValueError(f"invalid log level: {level}")
+    fields = tuple(fields)
+    if len(set(fields)) != len(fields):
+        raise ValueError("fields must be unique")
+
+    renderer = logger.renderer
+    reserved = (renderer.reserved | _ARGUMENTS).intersection(fields)
+    if reserved:
+        raise ValueError(f"reserved fields: {', '.join(sorted(reserved))}")
+
+    namespace: Dict[str, Any] = {
+        # The module declaring the schema is the module of the generated function.
+        "__name__": sys._getframe(1).f_globals.get("__name__", ""),
+        "logger": logger,
+        "renderer": renderer,
+        "LEVEL": level,
+        "METHOD": LEVEL_NAMES[level],
+        "MSG": msg,
+        "FIELDS": fields,
+        "HEAD": f"{renderer.prefix(logger.name, level)}{renderer.message(msg)}",
+        "timestamp": renderer.timestamp,
+        "value": renderer.value,
+        # The builtins the function calls are bound under private names, so a
+        # function named for its message (e.g. "dict") cannot shadow them.
+        "_dict": dict,
+        "_zip": zip,
+        "_getattr": getattr,
+    }
+    for i, key in enumerate(fields):
+        namespace[f"K{i}"] = renderer.key(key, i == 0)
+
+    # The values are passed as positional arguments, named by index rather than
+    # by key, since keys need not be valid identifiers.
+    args = ", ".join(f"a{i}" for i in range(len(fields)))
+    values = "".join(f"{{K{i}}}{{value(a{i})}}" for i in range(len(fields)))
+    kwargs = f"**_dict(_zip(FIELDS, ({args}{',' if len(fields) == 1 else ''})))"
+
+    # The generated function is named for the message where possible, so it is
+    # recognizable in profiles. Its name must not be a global the function uses.
+    # Events on the regular path are logged with stacklevel=2, so their callsite
+    # is the caller of the function.
+    name = "_".join(msg.split())
+    if not name.isidentifier() or keyword.iskeyword(name) or name in namespace:
+        name = "emit"
+
+    lines = [
+        f"def {name}({args}):",
+        "    if LEVEL < logger._level:",
+        "        if logger._recorder is not None:",
+        f"            _getattr(logger, METHOD)(MSG, stacklevel=2, {kwargs})",
+        "        return",
+    ]
+    if level >= 4:
+        lines.append(f"    logger._log(LEVEL, MSG, stacklevel=2, {kwargs})")
+    else:
+        lines.extend(
+            [
+                "    manager = logger.manager",
+                "    if (",
+                "        logger._renderer is not renderer",
+                "        or logger.callsite",
+                "        or logger.sampler is not None",
+                "        or logger.dedup is not None",
+                "        or logger.budget is not None",
+                "        or logger._boost_until",
+                "        or manager.budget is not None",
+                "        or manager.context_processors",
+                "    ):",
+                f"        logger._log(LEVEL, MSG, stacklevel=2, {kwargs})",
+                "        return",
+                f'    logger._writers[LEVEL](f"{{timestamp(logger.utcnow())}}{{HEAD}}{values}\\n")',
+            ]
+        )
+    exec(compile("\n".join(lines), f"<event {msg!r}>", "exec"), namespace)
+    return namespace[name]
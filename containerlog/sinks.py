@@ -0,0 +1,941 @@
+"""Sinks which log lines are written to.
+
+By default, loggers write events below ERROR level to stdout, and events at
+ERROR level and above to stderr. Sinks are registered with the Manager by
+name, and loggers are routed to them by name or glob, and by level range:
+
+    containerlog.add_sink("audit", sinks.FileSink("/var/log/app/audit.log"))
+    containerlog.route("audit", "app.audit.*", min_level=containerlog.INFO)
+
+Routing is resolved when the configuration changes, not when events are
+logged. Each Logger holds the write function for each log level, so a
+routed logger writes to its sink just as directly as an unrouted logger
+writes to stdout, and routing one logger costs nothing for the others.
+
+The built-in "stdout" and "stderr" sinks write to `sys.stdout` and
+`sys.stderr` as they are when routing is resolved. After replacing either
+stream (e.g. to capture output), call `containerlog.manager.reroute()` to
+resolve routing against the new stream.
+"""
+
+import atexit
+import errno
+import os
+import sys
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import IO, TYPE_CHECKING, Any, Callable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: nocover
+    # fcntl is not available on Windows.
+    fcntl = None  # type: ignore
+
+if TYPE_CHECKING:  # pragma: nocover
+    # socket is imported by SocketSink when it first connects.
+    import socket
+
+__all__ = [
+    "AppendFileSink",
+    "BufferedSink",
+    "CompressedFileSink",
+    "FdSink",
+    "FileSink",
+    "MemorySink",
+    "Sink",
+    "SocketSink",
+    "StdSink",
+    "StreamSink",
+    "WriteFn",
+    "read_compressed",
+]
+
+# A function which writes rendered log lines.
+WriteFn = Callable[[str], Any]
+
+
+class Sink:
+    """Base class for log sinks.
+
+    A sink provides the function that loggers routed to it call to write
+    rendered log lines. The function may be called with more than one line
+    at a time, e.g. for a batch of events.
+    """
+
+    def writer(self) -> WriteFn:
+        """Get the function which writes to the sink.
+
+        This is called when routing is resolved, and the function is held by
+        each Logger routed to the sink, so it should be as direct as possible.
+        By default, this is the sink's `write` method.
+        """
+        return self.write
+
+    def write(self, data: str) -> None:
+        """Write rendered log lines to the sink.
+
+        Args:
+            data: One or more rendered log lines.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Flush any buffered lines."""
+
+    def close(self) -> None:
+        """Flush and close the sink."""
+        self.flush()
+
+
+class StreamSink(Sink):
+    """A sink which writes to a text stream.
+
+    Args:
+        stream: The stream to write to.
+    """
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream: IO[str] = stream
+
+    def writer(self) -> WriteFn:
+        return self.stream.write
+
+    def write(self, data: str) -> None:
+        self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class StdSink(Sink):
+    """A sink which writes to `sys.stdout` or `sys.stderr`.
+
+    The stream is looked up when routing is resolved, rather than when the
+    sink is created, so it follows replacements of the stream.
+
+    Args:
+        name: The name of the stream in the sys module: "stdout" or "stderr".
+    """
+
+    def __init__(self, name: str) -> None:
+        if name not in ("stdout", "stderr"):
+            raise ValueError(f"unknown stream: {name}")
+        self.name: str = name
+
+    def writer(self) -> WriteFn:
+        return getattr(sys, self.name).write
+
+    def write(self, data: str) -> None:
+        getattr(sys, self.name).write(data)
+
+    def flush(self) -> None:
+        getattr(sys, self.name).flush()
+
+
+class FileSink(Sink):
+    """A sink which appends to a file.
+
+    The file is line buffered, so each write reaches the file as soon as it
+    is made.
+
+    Args:
+        path: The path of the file. It is created if it does not exist.
+        encoding: The encoding of the file.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8") -> None:
+        self.path: str = path
+        self.file: IO[str] = open(path, "a", buffering=1, encoding=encoding)
+
+    def writer(self) -> WriteFn:
+        return self.file.write
+
+    def write(self, data: str) -> None:
+        self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class BufferedSink(Sink):
+    """Base class for sinks which buffer lines and write them in batches.
+
+    Writes append the line to a buffer. The buffer is flushed by a background
+    thread at least every `flush_interval` seconds, and sooner once
+    `buffer_lines` writes are buffered. Subclasses implement `_write_batch`
+    to write the flushed lines.
+
+    Appending to the buffer is atomic, so writes do not take the sink's lock.
+    Flushing removes only the lines it takes from the buffer, so lines
+    appended while the buffer is being flushed are kept for the next flush.
+
+    If the background thread falls behind, e.g. it cannot write as fast as
+    lines are logged, the buffer holds at most `max_buffered` writes. Further
+    writes are dropped, and counted in `dropped`, until it catches up. If
+    `max_buffered` is 0 (the default, for subclasses which do not set it),
+    the buffer is not limited.
+
+    The sink is flushed and closed at interpreter exit. Lines logged once the
+    sink is closing are dropped.
+
+    Args:
+        buffer_lines: The number of writes (usually one line each) to buffer
+            before the background thread is woken to flush them.
+        flush_interval: The maximum number of seconds lines are buffered.
+    """
+
+    # The maximum number of writes held in the buffer. Subclasses which limit
+    # the buffer set this before initializing the base class.
+    max_buffered: int = 0
+
+    def __init__(self, buffer_lines: int, flush_interval: float) -> None:
+        if flush_interval <= 0:
+            raise ValueError(f"flush_interval must be positive: {flush_interval}")
+
+        self.buffer_lines: int = buffer_lines
+        self.flush_interval: float = flush_interval
+        self.dropped: int = 0
+
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._closing = False
+        self._closed = False
+
+        self._start()
+        _buffered_sinks.add(self)
+        atexit.register(self.close)
+
+    def _start(self) -> None:
+        """Start the background thread."""
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"containerlog-{type(self).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, data: str) -> None:
+        if self._closing:
+            return
+        buffer = self._buffer
+        n = len(buffer)
+        if self.max_buffered and n >= self.max_buffered:
+            # The newest line is dropped, rather than the oldest, since the
+            # background thread may be flushing a prefix of the buffer.
+            self.dropped += 1
+            return
+        buffer.append(data)
+        if n + 1 >= self.buffer_lines and not self._wake.is_set():
+            self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._closed:
+                # The sink is closed, so lines are dropped.
+                self._buffer.clear()
+            else:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Write the buffered lines. The lock must be held."""
+        buffer = self._buffer
+        n = len(buffer)
+        if not n:
+            return
+        data = "".join(buffer[:n])
+        del buffer[:n]
+        self._write_batch(data)
+
+    def _write_batch(self, data: str) -> None:
+        """Write a batch of flushed lines. The lock is held.
+
+        Args:
+            data: The lines to write.
+        """
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        """Run the background thread until the sink is closed."""
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._background()
+
+    def _background(self) -> None:
+        """Do the background thread's periodic work, flushing by default."""
+        self.flush()
+
+    def _release(self) -> None:
+        """Release the sink's resources once it is flushed for the last time.
+
+        The lock is held.
+        """
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+        with self._lock:
+            self._flush()
+            self._release()
+            self._closed = True
+        _buffered_sinks.discard(self)
+        atexit.unregister(self.close)
+
+    def _before_fork(self) -> None:
+        """Flush the sink, and hold its lock across a fork."""
+        try:
+            self.flush()
+        except OSError:
+            # A failed flush must not keep the process from forking.
+            pass
+        self._lock.acquire()
+
+    def _after_fork_in_parent(self) -> None:
+        """Release the sink's lock after a fork."""
+        self._lock.release()
+
+    def _after_fork_in_child(self) -> None:
+        """Reset the sink's per-process state in a forked child process.
+
+        The lock is replaced, since it was held when the process forked.
+        Lines logged by the parent's other threads since the sink was flushed
+        are dropped, since the parent writes them. The background thread is
+        not copied into the child, so a new one is started.
+        """
+        self._lock = threading.Lock()
+        self._buffer.clear()
+        if not self._closing:
+            self._start()
+
+
+# Open buffered sinks, so their state can be handled when the process forks.
+_buffered_sinks: "weakref.WeakSet[BufferedSink]" = weakref.WeakSet()
+
+# The buffered sinks whose locks are held while the process forks.
+_forking: List[BufferedSink] = []
+
+
+def _before_fork() -> None:
+    _forking[:] = list(_buffered_sinks)
+    for sink in _forking:
+        sink._before_fork()
+
+
+def _after_fork_in_parent() -> None:
+    for sink in _forking:
+        sink._after_fork_in_parent()
+    _forking.clear()
+
+
+def _after_fork_in_child() -> None:
+    for sink in _forking:
+        sink._after_fork_in_child()
+    _forking.clear()
+
+
+# os.register_at_fork is not available on Windows, or before Python 3.7.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_after_fork_in_child,
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_fallocate() -> Optional[Callable[[int, int, int, int], int]]:
+    """Load fallocate(2) from libc, if it is available.
+
+    `os.posix_fallocate` extends the size of the file, so lines appended
+    to the file would be written after the preallocated space. fallocate(2)
+    with FALLOC_FL_KEEP_SIZE reserves the space without changing the size,
+    but it is only available on Linux, and only through ctypes.
+
+    Importing ctypes is slow, so it is loaded on first use, by the first sink
+    which preallocates, rather than when containerlog is imported.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fallocate = getattr(libc, "fallocate64", None) or libc.fallocate
+    except (ImportError, OSError, AttributeError):
+        return None
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+# fallocate(2) mode which reserves space without changing the file size.
+_FALLOC_FL_KEEP_SIZE = 1
+
+
+class AppendFileSink(BufferedSink):
+    """A buffered sink which appends to a file, with size-based rotation.
+
+    The file is opened with O_APPEND, so each write lands at the end of the
+    file even if other processes append to it too. Lines are buffered and
+    written as a single batch of encoded bytes once `buffer_lines` writes
+    are buffered, and at least every `flush_interval` seconds by a background
+    thread.
+
+    When the file reaches `max_bytes`, the background thread rotates it: the
+    file is renamed to "<path>.1" (shifting older backups up by one), a new
+    file is opened at the path, and the sink switches over to it. Callers
+    are never blocked on rotation. Lines written while the file is being
+    renamed go to the renamed file, since the sink holds the file open, so
+    no lines are lost in the handover.
+
+    Several processes (e.g. forked workers) may append to and rotate the same
+    file, if they all set `max_bytes`. Before each batch, the sink checks that
+    the file at its path is still the one it writes to, and takes the size of
+    the file, including what other processes wrote, from it. The first
+    process to reach `max_bytes` rotates the file. The others switch to the
+    new file once they see it was rotated, rather than rotating it again. A
+    batch being written as the file is rotated goes to the renamed file, so
+    it is kept with the lines written just before it.
+
+    Args:
+        path: The path of the file. It is created if it does not exist.
+        encoding: The encoding of the file.
+        buffer_lines: The number of writes (usually one line each) to buffer
+            before writing them to the file. If 1, each write is written to
+            the file immediately.
+        flush_interval: The maximum number of seconds lines are buffered.
+        max_bytes: The size, in bytes, at which the file is rotated. If 0, the
+            file is never rotated.
+        backups: The number of rotated files to keep.
+        preallocate: The number of bytes of disk space to reserve for each
+            file when it is opened, so appends do not fail if the disk fills
+            up, and the file is less fragmented. The size of the file is not
+            changed. This is only supported on Linux, and is ignored elsewhere.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        buffer_lines: int = 256,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        backups: int = 5,
+        preallocate: int = 0,
+    ) -> None:
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must not be negative: {max_bytes}")
+        if max_bytes and backups < 1:
+            raise ValueError(f"backups must be at least 1 to rotate: {backups}")
+
+        self.path: str = path
+        self.encoding: str = encoding
+        self.max_bytes: int = max_bytes
+        self.backups: int = backups
+        self.preallocate: int = preallocate
+
+        self._fd = self._open()
+        self._size = os.fstat(self._fd).st_size
+        self._rotate_pending = False
+        super().__init__(buffer_lines, flush_interval)
+
+    def _open(self) -> int:
+        """Open the file at the sink's path for appending."""
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fallocate = _load_fallocate() if self.preallocate else None
+        if fallocate is not None:
+            # Preallocation is advisory, so failures (e.g. the filesystem does
+            # not support it) are ignored.
+            fallocate(fd, _FALLOC_FL_KEEP_SIZE, 0, self.preallocate)
+        return fd
+
+    def write(self, data: str) -> None:
+        # Batches are written on the caller's thread once the buffer is full,
+        # since appending to a file is cheap.
+        if self._closing:
+            return
+        buffer = self._buffer
+        buffer.append(data)
+        if len(buffer) >= self.buffer_lines:
+            self.flush()
+
+    def _write_batch(self, data: str) -> None:
+        if self.max_bytes and not self._rotate_pending:
+            self._check_file()
+
+        buf = self._encode(data)
+        written = os.write(self._fd, buf)
+        while written < len(buf):
+            written += os.write(self._fd, buf[written:])
+
+        self._size += len(buf)
+        if self.max_bytes and self._size >= self.max_bytes and not self._rotate_pending:
+            self._rotate_pending = True
+            self._wake.set()
+
+    def _check_file(self) -> None:
+        """Check whether the file was rotated or grown by another process.
+
+        If the file at the sink's path is no longer the one the sink writes
+        to, the background thread is woken to switch to it. Otherwise, the
+        sink's size is updated from the file. The lock is held.
+        """
+        opened = os.fstat(self._fd)
+        try:
+            current: Optional[os.stat_result] = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if current is not None and os.path.samestat(current, opened):
+            self._size = opened.st_size
+        else:
+            self._rotate_pending = True
+            self._wake.set()
+
+    def _encode(self, data: str) -> bytes:
+        """Encode buffered lines into the bytes written to the file."""
+        return data.encode(self.encoding)
+
+    def _background(self) -> None:
+        self.flush()
+        if self._rotate_pending:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Rotate the file, switching the sink over to a new file."""
+        try:
+            # Other processes appending to the file (e.g. forked workers) may
+            # rotate it too, so rotations are serialized with a lock on the
+            # file. Record locks are per-process, so this holds across forks.
+            if fcntl is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                if self._is_current():
+                    for n in range(self.backups - 1, 0, -1):
+                        backup = f"{self.path}.{n}"
+                        if os.path.exists(backup):
+                            os.replace(backup, f"{self.path}.{n + 1}")
+                    os.replace(self.path, f"{self.path}.1")
+                # Otherwise, another process has already rotated the file, so
+                # only switch to the new file.
+                fd = self._open()
+                size = os.fstat(fd).st_size
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        except OSError:
+            # Keep appending to the current file. Rotation is attempted again
+            # on the next flush.
+            self._rotate_pending = False
+            return
+
+        with self._lock:
+            old, self._fd = self._fd, fd
+            self._size = size
+            self._rotate_pending = False
+        os.close(old)
+
+    def _is_current(self) -> bool:
+        """Check whether the file at the sink's path is the one it writes to."""
+        try:
+            return os.path.samestat(os.stat(self.path), os.fstat(self._fd))
+        except FileNotFoundError:
+            return False
+
+    def _after_fork_in_child(self) -> None:
+        # Leave a rotation the parent was about to do to the parent.
+        self._rotate_pending = False
+        super()._after_fork_in_child()
+
+    def _release(self) -> None:
+        os.close(self._fd)
+
+
+# The zlib wbits for each compression format which zlib writes.
+_ZLIB_WBITS = {"gzip": 31, "zlib": 15}
+
+
+class CompressedFileSink(AppendFileSink):
+    """A sink which appends compressed frames to a file.
+
+    Lines are compressed off the caller's thread: the background thread
+    compresses everything buffered every `flush_interval` seconds, or sooner
+    if `buffer_lines` writes are buffered, and appends it to the file as a
+    frame. Each frame is a complete compressed stream, so the file can be
+    read as a whole (concatenated gzip members and xz streams are valid gzip
+    and xz files, e.g. for `zcat` and `xzcat`), and every frame before a
+    crash can be recovered with `read_compressed`. A crash loses at most the
+    lines buffered since the last flush.
+
+    Each frame is compressed independently, so longer flush intervals give
+    better compression. If compression falls behind the rate lines are
+    logged, at most `max_buffered` writes are buffered; further writes are
+    dropped and counted in `dropped`.
+
+    Args:
+        path: The path of the file. It is created if it does not exist.
+        compression: The compression format: "gzip", "zlib" or "lzma" (xz).
+        level: The compression level, or the lzma preset. If None, the
+            default for the format is used.
+        encoding: The encoding of lines before they are compressed.
+        buffer_lines: The number of writes to buffer before the background
+            thread is woken to compress them.
+        flush_interval: The maximum number of seconds lines are buffered.
+        max_bytes: The compressed size, in bytes, at which the file is
+            rotated. If 0, the file is never rotated.
+        backups: The number of rotated files to keep.
+        preallocate: The number of bytes of disk space to reserve for each
+            file when it is opened. This is only supported on Linux.
+        max_buffered: The maximum number of writes buffered while waiting to
+            be compressed. If 0, the buffer is not limited.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: str = "gzip",
+        level: Optional[int] = None,
+        encoding: str = "utf-8",
+        buffer_lines: int = 4096,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        backups: int = 5,
+        preallocate: int = 0,
+        max_buffered: int = 65536,
+    ) -> None:
+        if compression == "lzma":
+            # lzma is an optional part of the standard library.
+            import lzma  # noqa: F401
+        elif compression not in _ZLIB_WBITS:
+            raise ValueError(f"unknown compression: {compression}")
+
+        self.compression: str = compression
+        self.level: Optional[int] = level
+        self.max_buffered = max_buffered
+        super().__init__(
+            path,
+            encoding=encoding,
+            buffer_lines=buffer_lines,
+            flush_interval=flush_interval,
+            max_bytes=max_bytes,
+            backups=backups,
+            preallocate=preallocate,
+        )
+
+    # Wake the background thread to compress full buffers, rather than
+    # compressing them on the caller's thread.
+    write = BufferedSink.write
+
+    def _encode(self, data: str) -> bytes:
+        return _compress(data.encode(self.encoding), self.compression, self.level)
+
+
+def _compress(data: bytes, compression: str, level: Optional[int] = None) -> bytes:
+    """Compress data into a single complete frame.
+
+    Args:
+        data: The data to compress.
+        compression: The compression format: "gzip", "zlib" or "lzma".
+        level: The compression level, or the lzma preset.
+
+    Returns:
+        The compressed frame.
+    """
+    if compression == "lzma":
+        import lzma
+
+        return lzma.compress(data, preset=level)
+    # zlib is imported on first use, rather than when containerlog is imported.
+    import zlib
+
+    compressor = zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+        zlib.DEFLATED,
+        _ZLIB_WBITS[compression],
+    )
+    return compressor.compress(data) + compressor.flush()
+
+
+def read_compressed(path: str, compression: str = "gzip", encoding: str = "utf-8") -> str:
+    """Read the lines written to a file by a CompressedFileSink.
+
+    Frames are decompressed in order, up to the end of the file or the first
+    incomplete or corrupt frame, e.g. one being written when the process
+    crashed.
+
+    Args:
+        path: The path of the file.
+        compression: The compression format the file was written with.
+        encoding: The encoding of the lines.
+
+    Returns:
+        The lines in every complete frame.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    frames = []
+    while data:
+        if compression == "lzma":
+            import lzma
+
+            decompressor: Any = lzma.LZMADecompressor()
+            errors: Any = (lzma.LZMAError, EOFError)
+        else:
+            import zlib
+
+            decompressor = zlib.decompressobj(_ZLIB_WBITS[compression])
+            errors = zlib.error
+        try:
+            frame = decompressor.decompress(data)
+        except errors:
+            break
+        if not decompressor.eof:
+            break
+        frames.append(frame)
+        data = decompressor.unused_data
+    return b"".join(frames).decode(encoding)
+
+
+# Errors sending to a socket which mean the connection is broken, or the peer
+# is not currently accepting data, rather than that the data cannot be sent.
+_RETRY_ERRNOS = frozenset((errno.ENOTCONN, errno.ENOBUFS))
+
+
+def _is_connection_error(e: OSError) -> bool:
+    """Check whether a socket error should be retried on a new connection."""
+    import socket
+
+    return (
+        isinstance(e, (ConnectionError, BlockingIOError, socket.timeout))
+        or e.errno in _RETRY_ERRNOS
+    )
+
+
+class SocketSink(BufferedSink):
+    """A sink which sends lines to a Unix domain socket, e.g. a local agent.
+
+    The sink keeps a persistent connection to the socket, and sends buffered
+    lines from its background thread, so callers are never blocked on the
+    socket. For a stream socket, each flush sends its lines as one batch.
+    For a datagram socket, each write (usually one line) is sent as its own
+    datagram.
+
+    If the socket cannot be connected to, or a send fails, lines are kept in
+    the buffer and the sink reconnects on a later flush, backing off
+    exponentially from `backoff` up to `max_backoff` seconds between
+    attempts. While disconnected, at most `max_buffered` writes are kept;
+    further writes are dropped and counted in `dropped`.
+
+    Lines fully sent before a stream connection fails are not sent again. A
+    line which was only partly sent is sent again in full after reconnecting.
+    A datagram which cannot be sent for a reason other than the connection,
+    e.g. a line larger than the maximum datagram size, is dropped and counted
+    in `dropped`, rather than retried.
+
+    Args:
+        path: The path of the Unix domain socket.
+        kind: The kind of socket: "stream" or "datagram".
+        encoding: The encoding to send lines in.
+        buffer_lines: The number of writes to buffer before the background
+            thread is woken to send them.
+        flush_interval: The maximum number of seconds lines are buffered.
+        max_buffered: The maximum number of writes kept while disconnected.
+        backoff: The initial number of seconds to wait between reconnects.
+        max_backoff: The maximum number of seconds to wait between reconnects.
+        timeout: The timeout, in seconds, for connecting and sending.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        kind: str = "stream",
+        encoding: str = "utf-8",
+        buffer_lines: int = 256,
+        flush_interval: float = 0.1,
+        max_buffered: int = 10000,
+        backoff: float = 0.1,
+        max_backoff: float = 30.0,
+        timeout: float = 1.0,
+    ) -> None:
+        if kind not in ("stream", "datagram"):
+            raise ValueError(f"unknown socket kind: {kind}")
+
+        self.path: str = path
+        self.kind: str = kind
+        self.encoding: str = encoding
+        self.max_buffered = max_buffered
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.timeout: float = timeout
+
+        self._sock: Optional["socket.socket"] = None
+        self._retry_at = 0.0
+        self._retry_backoff = backoff
+        super().__init__(buffer_lines, flush_interval)
+
+    @property
+    def connected(self) -> bool:
+        """Whether the sink is connected to the socket."""
+        return self._sock is not None
+
+    def _connect(self) -> Optional["socket.socket"]:
+        """Connect to the socket, unless still backing off from a failure.
+
+        Returns:
+            The connected socket, or None if it could not be connected to.
+        """
+        now = time.monotonic()
+        if now < self._retry_at:
+            return None
+
+        import socket
+
+        sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_STREAM if self.kind == "stream" else socket.SOCK_DGRAM
+        )
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            self._retry_at = now + self._retry_backoff
+            self._retry_backoff = min(self._retry_backoff * 2, self.max_backoff)
+            return None
+
+        self._sock = sock
+        self._retry_backoff = self.backoff
+        return sock
+
+    def _disconnect(self) -> None:
+        """Close the connection, to reconnect on the next flush."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _flush(self) -> None:
+        buffer = self._buffer
+        n = len(buffer)
+        if not n:
+            return
+
+        # While disconnected, lines are kept for the next connection, up to
+        # max_buffered (see BufferedSink.write).
+        sock = self._sock or self._connect()
+        if sock is None:
+            return
+        sent = self._send(sock, buffer[:n])
+        del buffer[:sent]
+        if sent < n:
+            self._disconnect()
+
+    def _send(self, sock: "socket.socket", lines: List[str]) -> int:
+        """Send lines to the socket.
+
+        Args:
+            sock: The connected socket.
+            lines: The lines to send.
+
+        Returns:
+            The number of lines which were sent in full, or for a datagram
+            socket, dropped because they cannot be sent.
+        """
+        encoding = self.encoding
+
+        if self.kind == "datagram":
+            sent = 0
+            for line in lines:
+                try:
+                    sock.send(line.encode(encoding))
+                except OSError as e:
+                    if _is_connection_error(e):
+                        break
+                    # The line itself cannot be sent, e.g. it is larger than
+                    # the maximum datagram size, so retrying would only hold
+                    # up the lines behind it.
+                    self.dropped += 1
+                sent += 1
+            return sent
+
+        data = "".join(lines).encode(encoding)
+        view = memoryview(data)
+        offset = 0
+        try:
+            while offset < len(data):
+                offset += sock.send(view[offset:])
+        except OSError:
+            # Count the lines which were sent in full before the failure.
+            sent = 0
+            end = 0
+            for line in lines:
+                end += len(line.encode(encoding))
+                if end > offset:
+                    break
+                sent += 1
+            return sent
+        return len(lines)
+
+    def _release(self) -> None:
+        self._disconnect()
+
+    def _after_fork_in_child(self) -> None:
+        # The connection is shared with the parent, so the child makes its
+        # own, rather than interleaving its lines with the parent's. Closing
+        # the child's copy of the socket leaves the parent's connection open.
+        self._disconnect()
+        self._retry_at = 0.0
+        self._retry_backoff = self.backoff
+        super()._after_fork_in_child()
+
+
+class FdSink(Sink):
+    """A sink which writes to a file descriptor.
+
+    Each write is a single unbuffered write to the descriptor (retried if
+    only partially written), so lines reach e.g. a pipe without delay.
+
+    Args:
+        fd: The file descriptor to write to. It is not closed by the sink.
+        encoding: The encoding to write lines in.
+    """
+
+    def __init__(self, fd: int, encoding: str = "utf-8") -> None:
+        self.fd: int = fd
+        self.encoding: str = encoding
+
+    def write(self, data: str) -> None:
+        buf = data.encode(self.encoding)
+        written = os.write(self.fd, buf)
+        while written < len(buf):
+            written += os.write(self.fd, buf[written:])
+
+
+class MemorySink(Sink):
+    """A sink which keeps written lines in memory, e.g. for tests."""
+
+    def __init__(self) -> None:
+        self.writes: List[str] = []
+
+    def writer(self) -> WriteFn:
+        return self.writes.append
+
+    def write(self, data: str) -> None:
+        self.writes.append(data)
+
+    def getvalue(self) -> str:
+        """Get everything written to the sink."""
+        return "".join(self.writes)
+
+    def clear(self) -> None:
+        """Clear everything written to the sink."""
+        self.writes.clear()
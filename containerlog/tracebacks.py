@@ -0,0 +1,356 @@
+"""Rendering of exceptions for log events.
+
+By default, `Logger.exception` appends the full multi-line traceback after
+the event line, as rendered by a TextRenderer. This is what Python prints
+for an uncaught exception, but formatting it is slow, and it breaks the
+one-event-per-line output that log collectors expect. A StructuredRenderer
+set on a Logger instead renders the exception as fields of the event itself:
+
+    logger.exc_renderer = tracebacks.StructuredRenderer(fingerprint=True)
+
+    ... event='request failed' exc_type='KeyError' exc_msg='\\'id\\''
+        exc_stack='app/api.py:40 in handle | app/db.py:12 in get' exc_fingerprint='5a1c7e02'
+
+The stack is rendered on a single line, outermost frame first. Field
+values are raw strings; the Logger's renderer escapes them for its format
+(e.g. quotes and newlines for the key='value' format). Each frame's text is cached by its code
+object and line number, and the rendered stack is cached by the exception
+type and the frames it passed through, so repeated identical tracebacks only
+cost a walk of the traceback and a dict lookup.
+
+The optional fingerprint is a short, stable hash of the exception type and
+stack which can be used to group occurrences of the same error. It does not
+depend on the exception message, so it is the same for e.g. a KeyError raised
+from the same place for different keys.
+
+Deep stacks (e.g. in async code) and long chains of exceptions raised while
+handling other exceptions can make a single traceback very large. Both
+renderers take a frame `limit`, which keeps only the most recent frames of
+each exception, and a `chain_depth`, which caps the number of chained
+exceptions (causes and contexts) rendered, so the worst-case cost of
+rendering an exception is bounded.
+"""
+
+import sys
+import traceback
+from types import CodeType, TracebackType
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+__all__ = [
+    "ExcInfo",
+    "ExceptionRenderer",
+    "StructuredRenderer",
+    "TextRenderer",
+    "get_exc_info",
+]
+
+# The exc_info tuple, as returned by sys.exc_info().
+ExcInfo = Tuple[Optional[Type[BaseException]], Optional[BaseException], Optional[TracebackType]]
+
+# The separators Python prints between chained exceptions.
+_CAUSE = "\nThe above exception was the direct cause of the following exception:\n\n"
+_CONTEXT = "\nDuring handling of the above exception, another exception occurred:\n\n"
+
+# The maximum number of entries to keep in each cache. If exceeded, the cache
+# is cleared. Code locations in a program are finite, so this is only reached
+# by programs which generate code at runtime.
+_MAX_CACHE_SIZE = 10000
+
+# Caches the rendered text for a frame, by code object and line number.
+_frame_cache: Dict[Tuple[CodeType, int], str] = {}
+
+# Caches the rendered type name for an exception type.
+_type_cache: Dict[type, str] = {}
+
+# Caches the rendered stack and fingerprint for an exception, by exception
+# type, whether the stack was truncated, and the (code object, line number)
+# of each rendered frame in its traceback.
+_stack_cache: Dict[tuple, Tuple[str, str]] = {}
+
+
+def get_exc_info(exc: Union[bool, BaseException, ExcInfo]) -> ExcInfo:
+    """Get the exc_info tuple for an exception argument to a log call.
+
+    Args:
+        exc: An exception instance, an exc_info tuple, or any other truthy
+            value (e.g. True) to use the exception currently being handled.
+
+    Returns:
+        The exc_info tuple for the exception.
+    """
+    if isinstance(exc, BaseException):
+        return type(exc), exc, exc.__traceback__
+    if isinstance(exc, tuple) and len(exc) == 3:
+        return exc
+    return sys.exc_info()
+
+
+def _chain(exc: Optional[BaseException], depth: Optional[int]) -> Tuple[List, bool]:
+    """Get the exceptions chained to an exception, most recent first.
+
+    Args:
+        exc: The exception to get the chain of.
+        depth: The maximum number of chained exceptions to get.
+
+    Returns:
+        A list of (exception, separator) for each chained exception, where the
+        separator is the text which goes between it and the exception it is
+        chained to, and whether the chain was truncated.
+    """
+    chain: List[Tuple[BaseException, str]] = []
+    seen = {id(exc)}
+    while exc is not None:
+        if exc.__cause__ is not None:
+            exc, sep = exc.__cause__, _CAUSE
+        elif exc.__context__ is not None and not exc.__suppress_context__:
+            exc, sep = exc.__context__, _CONTEXT
+        else:
+            break
+        if id(exc) in seen:
+            break
+        if depth is not None and len(chain) >= depth:
+            return chain, True
+        seen.add(id(exc))
+        chain.append((exc, sep))
+    return chain, False
+
+
+def _type_name(exc_type: type) -> str:
+    """Get the rendered name of an exception type.
+
+    Builtin exceptions are rendered by name alone. Other exceptions are
+    qualified with their module.
+    """
+    name = _type_cache.get(exc_type)
+    if name is None:
+        module = exc_type.__module__
+        if module == "builtins":
+            name = exc_type.__qualname__
+        else:
+            name = f"{module}.{exc_type.__qualname__}"
+        if len(_type_cache) >= _MAX_CACHE_SIZE:
+            _type_cache.clear()
+        _type_cache[exc_type] = name
+    return name
+
+
+def _frame_text(code: CodeType, lineno: int) -> str:
+    """Get the rendered text for a traceback frame."""
+    key = (code, lineno)
+    text = _frame_cache.get(key)
+    if text is None:
+        text = f"{code.co_filename}:{lineno} in {code.co_name}"
+        if len(_frame_cache) >= _MAX_CACHE_SIZE:
+            _frame_cache.clear()
+        _frame_cache[key] = text
+    return text
+
+
+class ExceptionRenderer:
+    """Base class for exception renderers.
+
+    An exception may be rendered as fields of the log event, as text
+    appended after the log event, or both.
+
+    Args:
+        limit: The maximum number of frames to render per exception. The most
+            recent frames are kept. By default, all frames are rendered.
+        chain_depth: The maximum number of chained exceptions (causes and
+            contexts) to render. By default, the whole chain is rendered.
+    """
+
+    __slots__ = ("limit", "chain_depth")
+
+    def __init__(self, limit: Optional[int] = None, chain_depth: Optional[int] = None) -> None:
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1, got: {limit}")
+        if chain_depth is not None and chain_depth < 0:
+            raise ValueError(f"chain_depth must be at least 0, got: {chain_depth}")
+        self.limit: Optional[int] = limit
+        self.chain_depth: Optional[int] = chain_depth
+
+    def fields(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> Dict[str, Any]:
+        """Render an exception as log event fields.
+
+        Args:
+            exc_type: The type of the exception.
+            exc_value: The exception.
+            tb: The traceback of the exception.
+
+        Returns:
+            The rendered fields. Values are not escaped, since that depends on
+            the format the event is rendered in.
+        """
+        return {}
+
+    def text(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> str:
+        """Render an exception as text to append after the log event.
+
+        Args:
+            exc_type: The type of the exception.
+            exc_value: The exception.
+            tb: The traceback of the exception.
+
+        Returns:
+            The rendered text, ending in a newline, or an empty string.
+        """
+        return ""
+
+
+class TextRenderer(ExceptionRenderer):
+    """Render exceptions as a multi-line traceback, as Python prints them.
+
+    This is the default exception renderer.
+
+    Args:
+        limit: The maximum number of frames to render per exception. The most
+            recent frames are kept. By default, all frames are rendered.
+        chain_depth: The maximum number of chained exceptions (causes and
+            contexts) to render. By default, the whole chain is rendered.
+    """
+
+    __slots__ = ()
+
+    def text(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> str:
+        limit = None if self.limit is None else -self.limit
+        if self.limit is None and self.chain_depth is None:
+            parts = traceback.format_exception(exc_type, exc_value, tb)
+        else:
+            chain, truncated = _chain(exc_value, self.chain_depth)
+            parts = []
+            if truncated:
+                parts.append("[earlier chained exceptions omitted]\n\n")
+            for exc, sep in reversed(chain):
+                parts.extend(
+                    traceback.format_exception(
+                        type(exc), exc, exc.__traceback__, limit=limit, chain=False
+                    )
+                )
+                parts.append(sep)
+            parts.extend(traceback.format_exception(exc_type, exc_value, tb, limit, chain=False))
+
+        s = "".join(parts)
+        if s[-1] != "\n":
+            s += "\n"
+        return s
+
+
+class StructuredRenderer(ExceptionRenderer):
+    """Render exceptions as single-line log event fields.
+
+    The rendered fields are:
+
+        exc_type: The exception type name.
+        exc_msg: The exception message.
+        exc_stack: The frames of the traceback, outermost first, separated by
+            " | ". Each frame is rendered as "<file>:<line> in <function>".
+        exc_fingerprint: A hash of the exception type and stack, as 8 hex
+            characters. Only rendered if `fingerprint` is enabled.
+        exc_chain: The type and message of each chained exception (cause or
+            context), most recent first, separated by " <- ". Only rendered
+            if the exception is chained. Chained exception stacks are not
+            rendered.
+
+    If the stack is truncated by the frame limit, it starts with "...". If
+    the chain is truncated by the chain depth, it ends with "...".
+
+    Args:
+        fingerprint: Whether to add a fingerprint field for grouping
+            occurrences of the same error. This is disabled by default.
+        limit: The maximum number of frames to render. The most recent frames
+            are kept. By default, all frames are rendered.
+        chain_depth: The maximum number of chained exceptions to render. By
+            default, the whole chain is rendered.
+    """
+
+    __slots__ = ("fingerprint",)
+
+    def __init__(
+        self,
+        fingerprint: bool = False,
+        limit: Optional[int] = None,
+        chain_depth: Optional[int] = None,
+    ) -> None:
+        super().__init__(limit, chain_depth)
+        self.fingerprint: bool = fingerprint
+
+    def fields(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> Dict[str, Any]:
+        """Render an exception as log event fields.
+
+        Args:
+            exc_type: The type of the exception.
+            exc_value: The exception.
+            tb: The traceback of the exception.
+
+        Returns:
+            The rendered fields. If there is no exception, this is empty.
+        """
+        if exc_type is None:
+            return {}
+
+        # Collect the frame keys first, so the rendered stack can be looked up
+        # without rendering (or even looking up) each frame.
+        frames: List[Tuple[CodeType, int]] = []
+        while tb is not None:
+            frames.append((tb.tb_frame.f_code, tb.tb_lineno))
+            tb = tb.tb_next
+        limit = self.limit
+        truncated = limit is not None and len(frames) > limit
+        if truncated:
+            frames = frames[-limit:]  # type: ignore
+
+        key = (exc_type, truncated, tuple(frames))
+        cached = _stack_cache.get(key)
+        if cached is None:
+            texts = [_frame_text(code, lineno) for code, lineno in frames]
+            if truncated:
+                texts.insert(0, "...")
+            stack = " | ".join(texts)
+            # zlib is imported on first use, rather than when containerlog is
+            # imported. Stacks are cached, so this is rarely reached.
+            import zlib
+
+            digest = zlib.crc32(f"{_type_name(exc_type)} {stack}".encode("utf-8"))
+            cached = (stack, f"{digest:08x}")
+            if len(_stack_cache) >= _MAX_CACHE_SIZE:
+                _stack_cache.clear()
+            _stack_cache[key] = cached
+
+        fields: Dict[str, Any] = {
+            "exc_type": _type_name(exc_type),
+            "exc_msg": str(exc_value),
+            "exc_stack": cached[0],
+        }
+        if self.fingerprint:
+            fields["exc_fingerprint"] = cached[1]
+
+        if exc_value is not None and (
+            exc_value.__cause__ is not None or exc_value.__context__ is not None
+        ):
+            chain, chain_truncated = _chain(exc_value, self.chain_depth)
+            if chain or chain_truncated:
+                links = [f"{_type_name(type(exc))}: {exc}" for exc, _ in chain]
+                if chain_truncated:
+                    links.append("...")
+                fields["exc_chain"] = " <- ".join(links)
+        return fields
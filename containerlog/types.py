@@ -1,7 +1,7 @@
 """"""
 
 import sys
-from typing import Any, MutableMapping
+from typing import Any, Hashable, MutableMapping
 
 if sys.version_info < (3, 8):
     from typing_extensions import Protocol, runtime_checkable  # pragma: nocover
@@ -12,6 +12,7 @@ else:
 __all__ = [
     "ContextProcessor",
     "EventContext",
+    "Sampler",
 ]
 
 # EventContext contains the key-value pairs providing contextualized information
@@ -36,3 +37,19 @@ class ContextProcessor(Protocol):
 
     def clear(self) -> None:
         ...  # pragma: nocover
+
+
+@runtime_checkable
+class Sampler(Protocol):
+    """A sampler decides whether a log event should be kept or dropped.
+
+    Sampling happens before a log event is formatted, so dropped events
+    cost very little. Events are sampled per key, where the key is either
+    the callsite of the log call or the log message itself.
+    """
+
+    # Whether to sample by callsite (True) or by message (False).
+    by_callsite: bool
+
+    def sample(self, key: Hashable) -> float:
+        ...  # pragma: nocover
@@ -2,6 +2,10 @@
 
 import datetime
 import io
+import os
+import signal
+import time
+import warnings
 
 import pytest
 
@@ -30,3 +34,52 @@ def test_logger():
 
     err.close()
     out.close()
+
+
+@pytest.fixture()
+def clock():
+    """Fixture for a controllable monotonic clock."""
+
+    class Clock:
+        now = 100.0
+
+        def __call__(self):
+            return self.now
+
+    return Clock()
+
+
+@pytest.fixture()
+def fork():
+    """Fixture to run a function in a forked child process.
+
+    The function passes by returning True. The fixture returns whether it
+    passed, since failures in the child are not reported by pytest.
+    """
+    if not hasattr(os, "register_at_fork"):
+        pytest.skip("fork handlers are not supported")
+
+    def run(child):
+        with warnings.catch_warnings():
+            # Forking a process with threads is deprecated, but supported.
+            warnings.simplefilter("ignore", DeprecationWarning)
+            pid = os.fork()
+        if pid == 0:
+            try:
+                passed = child()
+            except BaseException:
+                passed = False
+            os._exit(0 if passed else 1)
+
+        # Fail rather than hang if the child deadlocks.
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return status == 0
+            time.sleep(0.01)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        return False
+
+    return run
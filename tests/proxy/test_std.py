@@ -7,6 +7,7 @@ from unittest import mock
 import pytest
 
 import containerlog
+from containerlog import sampling
 from containerlog.proxy import std
 
 
@@ -25,6 +26,33 @@ class TestStdLoggerProxy:
         assert logger.level == logging.WARN
         assert logger.containerlog.level == containerlog.WARN
 
+    def test_level_guards(self):
+        logger = std.StdLoggerProxy("foo")
+        assert logger.trace_enabled is False
+        assert logger.debug_enabled is True
+        assert logger.info_enabled is True
+
+        logger.setLevel(logging.WARN)
+        assert logger.debug_enabled is False
+        assert logger.info_enabled is False
+        assert logger.warn_enabled is True
+        assert logger.error_enabled is True
+        assert logger.critical_enabled is True
+
+        containerlog.disable("foo")
+        assert logger.critical_enabled is False
+
+    def test_is_enabled_for(self):
+        logger = std.StdLoggerProxy("foo")
+        logger.setLevel(logging.INFO)
+
+        assert logger.isEnabledFor(logging.DEBUG) is False
+        assert logger.isEnabledFor(logging.INFO) is True
+        assert logger.isEnabledFor(logging.ERROR) is True
+
+        logger.containerlog.disable()
+        assert logger.isEnabledFor(logging.CRITICAL) is False
+
     def test_get_set_writeout(self):
         logger = std.StdLoggerProxy("foo")
 
@@ -266,6 +294,24 @@ class TestStdLoggerProxy:
         assert std_proxy_logger.out.getvalue() == ""
         assert std_proxy_logger.err.getvalue() == out
 
+    def test_exception_exc_info(self, std_proxy_logger):
+        std_proxy_logger.setLevel(logging.ERROR)
+        std_proxy_logger.exception("message", exc_info=ValueError("test"))
+
+        assert std_proxy_logger.err.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='message' \n"
+            "ValueError: test\n"
+        )
+
+    def test_error_exc_info(self, std_proxy_logger):
+        std_proxy_logger.setLevel(logging.ERROR)
+        std_proxy_logger.error("message", exc_info=ValueError("test"))
+
+        assert std_proxy_logger.err.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='message' \n"
+            "ValueError: test\n"
+        )
+
     @pytest.mark.parametrize(
         "msg,args,kwargs,out",
         [
@@ -342,6 +388,45 @@ class TestStdLoggerProxy:
             == "timestamp='2020-01-01T00:00:00Z' logger='test' level='critical' event='message' \n"
         )  # noqa
 
+    def test_callsite(self, std_proxy_logger):
+        std_proxy_logger.containerlog.callsite = True
+        std_proxy_logger.setLevel(logging.DEBUG)
+        line = sys._getframe().f_lineno + 1
+        std_proxy_logger.info("message", extra={"a": 1})
+        std_proxy_logger.log(logging.INFO, "message")
+
+        # The callsite is the caller of the proxy, not the proxy itself.
+        assert std_proxy_logger.out.getvalue() == (
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='message' module='{__name__}' func='test_callsite' line={line} a=1\n"  # noqa
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='message' module='{__name__}' func='test_callsite' line={line + 1} \n"  # noqa
+        )
+
+    def test_callsite_stacklevel(self, std_proxy_logger):
+        def wrapper(msg):
+            std_proxy_logger.warning(msg, stacklevel=2)
+
+        std_proxy_logger.containerlog.callsite = True
+        line = sys._getframe().f_lineno + 1
+        wrapper("message")
+
+        assert std_proxy_logger.out.getvalue() == (
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='message' module='{__name__}' func='test_callsite_stacklevel' line={line} \n"  # noqa
+        )
+
+    def test_sample_by_callsite(self, std_proxy_logger):
+        std_proxy_logger.containerlog.sampler = sampling.EveryN(2)
+        std_proxy_logger.setLevel(logging.DEBUG)
+        for i in range(2):
+            std_proxy_logger.info("a %d", i)
+            std_proxy_logger.info("b %d", i)
+
+        # Each call site is sampled separately, rather than all proxied calls
+        # being counted as one callsite in the proxy.
+        assert std_proxy_logger.out.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a 0' sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b 0' sampled=0.5\n"
+        )
+
 
 @mock.patch("containerlog.proxy.std._patch_all")
 def test_patch_no_loggers(mock_patch):
@@ -0,0 +1,21 @@
+"""Unit tests for containerlog adaptive verbosity."""
+
+import pytest
+
+from containerlog import adaptive
+
+
+class TestBoost:
+    def test_init(self):
+        boost = adaptive.Boost()
+        assert boost.level == 1
+        assert boost.duration == 60.0
+        assert boost.cooldown == 300.0
+
+    def test_init_invalid_duration(self):
+        with pytest.raises(ValueError):
+            adaptive.Boost(duration=0)
+
+    def test_init_cooldown_less_than_duration(self):
+        with pytest.raises(ValueError):
+            adaptive.Boost(duration=60.0, cooldown=30.0)
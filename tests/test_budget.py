@@ -0,0 +1,137 @@
+"""Unit tests for containerlog log budgets."""
+
+import pytest
+
+from containerlog import budget
+
+
+class TestTokenBucket:
+    def test_init(self):
+        bucket = budget.TokenBucket(10)
+        assert bucket.rate == 10
+        assert bucket.capacity == 10
+        assert bucket.tokens == 10
+
+    def test_init_capacity(self):
+        bucket = budget.TokenBucket(10, capacity=50)
+        assert bucket.capacity == 50
+        assert bucket.tokens == 50
+
+    def test_init_invalid_rate(self):
+        with pytest.raises(ValueError):
+            budget.TokenBucket(0)
+
+    def test_take(self, clock):
+        bucket = budget.TokenBucket(2)
+        bucket._clock = clock
+        bucket._last = clock.now
+
+        assert bucket.take() is True
+        assert bucket.take() is True
+        assert bucket.take() is False
+
+        # Half a second refills one token.
+        clock.now += 0.5
+        assert bucket.take() is True
+        assert bucket.take() is False
+
+        # Refilling does not go over capacity.
+        clock.now += 60
+        assert bucket.take(2) is True
+        assert bucket.take() is False
+
+    def test_take_amount(self, clock):
+        bucket = budget.TokenBucket(100)
+        bucket._clock = clock
+        bucket._last = clock.now
+
+        assert bucket.take(60) is True
+        assert bucket.take(60) is False
+        assert bucket.take(40) is True
+
+    def test_take_over_capacity(self, clock):
+        bucket = budget.TokenBucket(100)
+        bucket._clock = clock
+        bucket._last = clock.now
+
+        # An amount over capacity is taken from a full bucket, emptying it.
+        assert bucket.take(150) is True
+        assert bucket.tokens == 0
+        assert bucket.take(150) is False
+
+        clock.now += 0.5
+        assert bucket.take(150) is False
+        clock.now += 0.5
+        assert bucket.take(150) is True
+
+
+class TestBudget:
+    def test_init(self):
+        b = budget.Budget()
+        assert b.lines is None
+        assert b.bytes is None
+        assert b.exempt_level == 4
+        assert b.report_interval == 10.0
+        assert b.dropped_lines == 0
+        assert b.dropped_bytes == 0
+
+    def test_init_burst(self):
+        b = budget.Budget(lines_per_second=10, bytes_per_second=100, burst=2.0)
+        assert b.lines.rate == 10
+        assert b.lines.capacity == 20
+        assert b.bytes.rate == 100
+        assert b.bytes.capacity == 200
+
+    def test_allow_unlimited(self):
+        b = budget.Budget()
+        assert b.allow_line() is True
+        assert b.allow_bytes(1000000) is True
+
+    def test_allow_line(self, clock):
+        b = budget.Budget(lines_per_second=1)
+        b.lines._clock = clock
+        b.lines._last = clock.now
+
+        assert b.allow_line() is True
+        assert b.allow_line() is False
+        assert b.allow_line() is False
+        assert b.dropped_lines == 2
+        assert b.dropped_bytes == 0
+
+    def test_allow_bytes(self, clock):
+        b = budget.Budget(bytes_per_second=100)
+        b.bytes._clock = clock
+        b.bytes._last = clock.now
+
+        assert b.allow_bytes(80) is True
+        assert b.allow_bytes(30) is False
+        assert b.dropped_lines == 1
+        assert b.dropped_bytes == 30
+
+    def test_allow_bytes_over_capacity(self, clock):
+        b = budget.Budget(bytes_per_second=100)
+        b.bytes._clock = clock
+        b.bytes._last = clock.now
+
+        assert b.allow_bytes(500) is True
+        assert b.allow_bytes(1) is False
+        assert b.dropped_lines == 1
+
+    def test_report(self, clock):
+        b = budget.Budget(lines_per_second=1, report_interval=10.0)
+        b._clock = clock
+        assert b.report() is None
+
+        # The first report is due as soon as something is dropped.
+        b.dropped_lines = 3
+        b.dropped_bytes = 100
+        assert b.report() == (3, 100)
+        assert b.dropped_lines == 0
+        assert b.dropped_bytes == 0
+
+        # The next report is not due until the interval has elapsed.
+        b.dropped_lines = 1
+        clock.now += 5
+        assert b.report() is None
+        clock.now += 5
+        assert b.report() == (1, 0)
@@ -1,11 +1,27 @@
 """Unit tests for containerlog."""
 
+import datetime
+import gc
+import io
 import sys
+import threading
+import time
+import weakref
 from unittest import mock
 
 import pytest
 
 import containerlog
+from containerlog import (
+    adaptive,
+    budget,
+    dedup,
+    recorder,
+    renderers,
+    sampling,
+    sinks,
+    tracebacks,
+)
 
 
 class TestManager:
@@ -44,6 +60,57 @@ class TestManager:
         assert logger.level == containerlog.ERROR
         assert manager.level == containerlog.ERROR
 
+    def test_init_weak(self):
+        manager = containerlog.Manager(weak=True)
+        assert isinstance(manager.loggers, weakref.WeakValueDictionary)
+        assert len(manager.loggers) == 0
+
+    def test_use_weak_registry(self):
+        manager = containerlog.Manager()
+        logger = containerlog.Logger(name="test", manager=manager)
+        manager.loggers["test"] = logger
+
+        manager.use_weak_registry()
+        assert isinstance(manager.loggers, weakref.WeakValueDictionary)
+        assert manager.loggers["test"] is logger
+
+        del logger
+        gc.collect()
+        assert len(manager.loggers) == 0
+
+    def test_new_logger(self):
+        manager = containerlog.Manager(level=containerlog.WARN)
+        logger = manager.new_logger("test")
+
+        assert logger.name == "test"
+        assert logger.level == containerlog.WARN
+        assert logger.manager is manager
+        assert len(manager.loggers) == 0
+
+    def test_new_logger_disabled(self):
+        manager = containerlog.Manager(level=containerlog.WARN)
+        manager.disable()
+        logger = manager.new_logger("test")
+
+        assert logger.disabled is True
+        logger.enable()
+        assert logger.level == containerlog.WARN
+
+    def test_disable_enable(self):
+        manager = containerlog.Manager(level=containerlog.INFO)
+        logger = containerlog.Logger(name="test", level=containerlog.WARN, manager=manager)
+        manager.loggers = {"test": logger}
+
+        manager.disable()
+        assert manager.disabled is True
+        assert manager.level == 99
+        assert logger.disabled is True
+
+        manager.enable()
+        assert manager.disabled is False
+        assert manager.level == containerlog.INFO
+        assert logger.level == containerlog.WARN
+
 
 class TestLogger:
     def test_init(self):
@@ -126,6 +193,79 @@ class TestLogger:
         assert logger.level == loglevel
         assert logger._previous_level is None
 
+    @pytest.mark.parametrize(
+        "loglevel,enabled",
+        [
+            (containerlog.TRACE, ["trace", "debug", "info", "warn", "error", "critical"]),
+            (containerlog.DEBUG, ["debug", "info", "warn", "error", "critical"]),
+            (containerlog.INFO, ["info", "warn", "error", "critical"]),
+            (containerlog.WARN, ["warn", "error", "critical"]),
+            (containerlog.ERROR, ["error", "critical"]),
+            (containerlog.CRITICAL, ["critical"]),
+            (99, []),
+        ],
+    )
+    def test_level_methods(self, loglevel, enabled):
+        logger = containerlog.Logger(name="test", level=loglevel, manager=containerlog.manager)
+
+        for method in ("trace", "debug", "info", "warn", "error", "critical"):
+            if method in enabled:
+                assert getattr(logger, method) is not containerlog._noop
+            else:
+                assert getattr(logger, method) is containerlog._noop
+
+        assert logger.warning is logger.warn
+        assert (logger.exception is containerlog._noop) is ("error" not in enabled)
+
+    def test_level_methods_swapped(self):
+        logger = containerlog.Logger(
+            name="test", level=containerlog.INFO, manager=containerlog.manager
+        )
+        assert logger.debug is containerlog._noop
+        assert logger.info is not containerlog._noop
+
+        logger.level = containerlog.DEBUG
+        assert logger.debug is not containerlog._noop
+
+        logger.disable()
+        assert logger.debug is containerlog._noop
+        assert logger.critical is containerlog._noop
+
+        logger.enable()
+        assert logger.debug is not containerlog._noop
+
+        containerlog.manager.loggers["test"] = logger
+        containerlog.set_level(containerlog.ERROR)
+        assert logger.warn is containerlog._noop
+        assert logger.error is not containerlog._noop
+
+    def test_level_guards(self):
+        logger = containerlog.Logger(
+            name="test", level=containerlog.INFO, manager=containerlog.manager
+        )
+        assert logger.trace_enabled is False
+        assert logger.debug_enabled is False
+        assert logger.info_enabled is True
+        assert logger.warn_enabled is True
+        assert logger.error_enabled is True
+        assert logger.critical_enabled is True
+
+        logger.level = containerlog.TRACE
+        assert logger.trace_enabled is True
+        assert logger.debug_enabled is True
+
+        logger.disable()
+        assert logger.trace_enabled is False
+        assert logger.critical_enabled is False
+
+        logger.enable()
+        assert logger.trace_enabled is True
+
+        containerlog.manager.loggers["test"] = logger
+        containerlog.set_level(containerlog.ERROR)
+        assert logger.warn_enabled is False
+        assert logger.error_enabled is True
+
     def test_disabled_false(self):
         logger = containerlog.Logger(name="test", manager=containerlog.manager)
         assert logger.disabled is False
@@ -266,6 +406,758 @@ class TestLogger:
         )
         assert e.getvalue() == ""
 
+    def test_log_callsite(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.info("test", a=1)
+
+        assert (
+            o.getvalue()
+            == f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' module='test_containerlog' func='test_log_callsite' line={line} a=1\n"
+        )
+        assert e.getvalue() == ""
+
+    def test_log_callsite_stacklevel(self, test_logger):
+        logger, o, e = test_logger
+
+        def wrapper(msg):
+            logger.info(msg, stacklevel=2)
+
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        wrapper("test")
+
+        assert (
+            o.getvalue()
+            == f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' module='test_containerlog' func='test_log_callsite_stacklevel' line={line} \n"
+        )
+
+    def test_log_callsite_no_fields(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.exception("test")
+
+        assert o.getvalue() == ""
+        assert e.getvalue().startswith(
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='test' module='test_containerlog' func='test_log_callsite_no_fields' line={line} \n"
+        )
+
+    def test_log_callsite_reserved_keys(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.info("test", module="a", func="b", line=3)
+
+        assert (
+            o.getvalue()
+            == f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' module='test_containerlog' func='test_log_callsite_reserved_keys' line={line} _module='a' _func='b' _line=3\n"
+        )
+
+    def test_log_callsite_keys_not_reserved(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.info("test", module="a")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' module='a'\n"
+        )
+
+    def test_log_reserved_keys_order(self, test_logger):
+        logger, o, e = test_logger
+
+        kwargs = {"a": 1, "event": 2, "b": 3}
+        logger.info("test", **kwargs)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' a=1 _event=2 b=3\n"  # noqa
+        )
+
+    def test_log_reserved_keys_context_processor(self, test_logger):
+        logger, o, e = test_logger
+
+        class Processor:
+            def merge(self, event):
+                event["level"] = "bound"
+
+        logger.manager = containerlog.Manager()
+        logger.manager.context_processors.append(Processor())
+        logger.info("test", a=1)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' _level='bound' a=1\n"  # noqa
+        )
+
+    def test_log_callsite_cached(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.callsite = True
+        cache = logger.renderer._callsite_cache
+        cache.clear()
+        for _ in range(3):
+            logger.info("test")
+
+        assert len(cache) == 1
+        lines = o.getvalue().splitlines()
+        assert len(lines) == 3
+        assert lines[0] == lines[1] == lines[2]
+
+    def test_log_sampler(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.sampler = sampling.EveryN(2)
+        for i in range(4):
+            logger.info("test", i=i)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=0 sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=2 sampled=0.5\n"
+        )
+
+    def test_log_sampler_per_callsite(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.sampler = sampling.EveryN(2)
+        for _ in range(2):
+            logger.info("a")
+            logger.info("b")
+
+        # Each callsite is sampled independently.
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b' sampled=0.5\n"
+        )
+
+    def test_log_sampler_per_message(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.sampler = sampling.EveryN(2, by="message")
+        logger.info("a")
+        logger.info("a")
+        logger.info("b")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b' sampled=0.5\n"
+        )
+
+    def test_log_sampler_per_call(self, test_logger):
+        logger, o, e = test_logger
+
+        sampler = sampling.EveryN(3)
+        for _ in range(3):
+            logger.info("sampled", sampler=sampler)
+            logger.info("not sampled")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='sampled' sampled=0.3333333333333333\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='not sampled' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='not sampled' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='not sampled' \n"
+        )
+
+    def test_log_sampler_rate_one(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.sampler = sampling.EveryN(1)
+        logger.info("test")
+
+        assert (
+            o.getvalue()
+            == "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' \n"
+        )
+
+    def test_log_dedup(self, test_logger):
+        logger, o, e = test_logger
+
+        now = [100.0]
+        logger.dedup = dedup.Deduplicator(window=1.0)
+        logger.dedup._clock = lambda: now[0]
+
+        for _ in range(5):
+            logger.error("connection failed", host="db")
+        logger.error("other error")
+
+        now[0] = 101.0
+        logger.error("connection failed", host="db")
+
+        assert o.getvalue() == ""
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='connection failed' host='db'\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='other error' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='connection failed' host='db' suppressed=4\n"
+        )
+
+    def test_log_dedup_due(self, test_logger):
+        logger, o, e = test_logger
+
+        now = [100.0]
+        logger.dedup = dedup.Deduplicator(window=1.0)
+        logger.dedup._clock = lambda: now[0]
+
+        for _ in range(3):
+            logger.warn("retrying")
+        logger.info("other")
+
+        # The burst has stopped, so its count is logged with the next event
+        # once its window has ended.
+        now[0] = 101.0
+        logger.info("done")
+        logger.info("done")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='retrying' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='other' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='retrying' suppressed=2\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='done' \n"
+        )
+
+    def test_flush_suppressed(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.dedup = dedup.Deduplicator(window=60.0)
+        for _ in range(3):
+            logger.warn("retrying")
+        logger.flush_suppressed()
+        logger.flush_suppressed()
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='retrying' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='retrying' suppressed=2\n"
+        )
+
+    def test_flush_suppressed_no_dedup(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.flush_suppressed()
+        assert o.getvalue() == ""
+
+    def test_log_budget_lines(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.budget = budget.Budget(lines_per_second=2, report_interval=60.0)
+        logger.budget.lines.rate = 1e-9
+        for i in range(4):
+            logger.info("test", i=i)
+        logger.error("exempt")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=0\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=1\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='logger' dropped_lines=1 dropped_bytes=0\n"
+        )
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='exempt' \n"
+        )
+        assert logger.budget.dropped_lines == 1
+
+    def test_log_budget_bytes(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.budget = budget.Budget(bytes_per_second=100, exempt_level=99)
+        logger.budget.bytes.rate = 1e-9
+        logger.info("test")
+        logger.error("test")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='logger' dropped_lines=1 dropped_bytes=75\n"
+        )
+        assert e.getvalue() == ""
+
+    def test_log_budget_report_on_log(self, test_logger, clock):
+        logger, o, e = test_logger
+
+        logger.budget = budget.Budget(lines_per_second=1, report_interval=10.0)
+        logger.budget._clock = clock
+        logger.budget.lines._clock = clock
+        logger.budget.lines._last = clock.now
+        for i in range(4):
+            logger.info("test", i=i)
+
+        # Once the burst stops, the pending count is reported with the next
+        # logged event after the report interval.
+        clock.now += 10
+        logger.info("test", i=4)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=0\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='logger' dropped_lines=1 dropped_bytes=0\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='logger' dropped_lines=2 dropped_bytes=0\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=4\n"
+        )
+        assert logger.budget.dropped_lines == 0
+
+    def test_log_budget_bytes_oversize(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.budget = budget.Budget(bytes_per_second=10)
+        logger.budget.bytes.rate = 1e-9
+        logger.info("longer than the budget")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='longer than the budget' \n"
+        )
+
+    def test_log_budget_global(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.manager = containerlog.Manager()
+        logger.manager.budget = budget.Budget(lines_per_second=1)
+        logger.manager.budget.lines.rate = 1e-9
+        logger.info("test")
+        logger.info("test")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='global' dropped_lines=1 dropped_bytes=0\n"
+        )
+
+    def test_log_recorder(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.recorder = recorder.FlightRecorder()
+        logger.trace("not recorded")
+        logger.debug("recorded", i=1)
+        logger.info("recorded", i=2)
+        assert o.getvalue() == ""
+
+        logger.error("failed")
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='debug' event='recorded' i=1\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='recorded' i=2\n"
+        )
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' \n"
+        )
+        assert logger.recorder.drain() == []
+
+    def test_log_recorder_level_methods(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.ERROR
+        logger.recorder = recorder.FlightRecorder(level=containerlog.INFO)
+        assert logger.trace is containerlog._noop
+        assert logger.debug is containerlog._noop
+        assert logger.info.func == logger._record
+        assert logger.warn.func == logger._record
+        assert logger.error.func == logger._log
+        assert logger.info_enabled is False
+
+        logger.recorder = None
+        assert logger.info is containerlog._noop
+        assert logger.warn is containerlog._noop
+
+    def test_log_recorder_disabled(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.recorder = recorder.FlightRecorder()
+        logger.disable()
+        logger.debug("test")
+        assert logger.recorder.drain() == []
+
+    def test_log_recorder_exception(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.INFO
+        logger.recorder = recorder.FlightRecorder()
+        logger.debug("recorded")
+        try:
+            raise ValueError("test")
+        except ValueError:
+            logger.exception("failed")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='debug' event='recorded' \n"
+        )
+        assert "ValueError: test" in e.getvalue()
+
+    def test_log_boost(self, test_logger, clock):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.boost = adaptive.Boost(level=containerlog.DEBUG, duration=10.0, cooldown=60.0)
+        logger.boost._clock = clock
+        logger.debug("dropped")
+        logger.error("failed")
+
+        # Boosted to DEBUG, holding the configured level.
+        assert logger.level == containerlog.DEBUG
+        assert logger.debug_enabled is True
+        logger.debug("kept")
+
+        # The boost expires on the first event after its duration.
+        clock.now += 10.0
+        logger.debug("dropped")
+        assert logger.level == containerlog.WARN
+        logger.warn("kept")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='debug' event='kept' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='kept' \n"
+        )
+
+    def test_log_boost_cooldown(self, test_logger, clock):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.boost = adaptive.Boost(duration=10.0, cooldown=60.0)
+        logger.boost._clock = clock
+        logger.error("failed")
+        assert logger.level == containerlog.DEBUG
+
+        # Errors during a boost do not extend it.
+        clock.now += 5.0
+        logger.error("failed")
+        clock.now += 5.0
+        logger.info("test")
+        assert logger.level == containerlog.WARN
+
+        # Errors within the cooldown do not start a new boost.
+        clock.now += 30.0
+        logger.error("failed")
+        assert logger.level == containerlog.WARN
+
+        clock.now += 20.0
+        logger.error("failed")
+        assert logger.level == containerlog.DEBUG
+
+    def test_log_boost_not_lower(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.DEBUG
+        logger.boost = adaptive.Boost(level=containerlog.INFO)
+        logger.error("failed")
+        assert logger.level == containerlog.DEBUG
+
+    def test_log_boost_set_level(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.boost = adaptive.Boost()
+        logger.error("failed")
+        assert logger.level == containerlog.DEBUG
+
+        # An explicitly set level ends the boost.
+        logger.level = containerlog.INFO
+        assert logger._boost_until == 0.0
+        logger.debug("test")
+        assert logger.level == containerlog.INFO
+
+    def test_log_boost_disable(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.boost = adaptive.Boost()
+        logger.error("failed")
+        logger.disable()
+        logger.enable()
+        assert logger.level == containerlog.WARN
+
+    def test_log_boost_unset(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.boost = adaptive.Boost()
+        logger.error("failed")
+        logger.boost = None
+        assert logger.level == containerlog.WARN
+
+    def test_log_exc_renderer(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        try:
+            raise ValueError("test")
+        except ValueError:
+            logger.exception("failed", key="value")
+
+        line = e.getvalue()
+        assert line.count("\n") == 1
+        assert line.startswith(
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' "
+            "key='value' exc_type='ValueError' exc_msg='test' exc_stack='"
+        )
+        assert line.endswith(" in test_log_exc_renderer'\n")
+
+    @pytest.mark.parametrize("exc", ["x", 1])
+    def test_log_exc_truthy(self, test_logger, exc):
+        logger, o, e = test_logger
+
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        try:
+            raise ValueError("test")
+        except ValueError:
+            logger.error("failed", exc=exc)
+
+        assert e.getvalue().startswith(
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' "
+            "exc_type='ValueError' exc_msg='test' exc_stack='"
+        )
+
+    def test_log_exc_renderer_no_exception(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        logger.exception("failed")
+
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' \n"
+        )
+
+    def test_log_exc_info_instance(self, test_logger):
+        logger, o, e = test_logger
+
+        try:
+            raise ValueError("test")
+        except ValueError as err:
+            exc = err
+
+        # The exception is logged outside of its handler.
+        logger.exception("failed", exc_info=exc)
+
+        lines = e.getvalue().splitlines()
+        assert lines[0] == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' "
+        )
+        assert lines[1] == "Traceback (most recent call last):"
+        assert lines[-1] == "ValueError: test"
+
+    def test_log_exc_info_other_level(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.warn("failed", exc_info=ValueError("test"))
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='failed' \n"
+            "ValueError: test\n"
+        )
+
+    def test_log_exc_info_false(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.exception("failed", exc_info=False)
+
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' \n"
+        )
+
+    def test_log_exc_info_recorded(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.ERROR
+        logger.recorder = recorder.FlightRecorder()
+        logger.info("recorded", exc_info=ValueError("test"))
+        logger.error("failed")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='recorded' \n"
+        )
+
+    def test_log_option_names_as_fields(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.info("options", sampler="round-robin", exc_info="n/a", stacklevel=3.0)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='options' sampler='round-robin' exc_info='n/a' stacklevel=3.0\n"
+        )
+
+    def test_log_option_names_as_fields_recorded(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.ERROR
+        logger.recorder = recorder.FlightRecorder()
+        logger.info("recorded", sampler="round-robin")
+        logger.error("failed")
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='recorded' sampler='round-robin'\n"
+        )
+
+    def test_renderer_default(self, test_logger):
+        logger, o, e = test_logger
+
+        assert logger.renderer is containerlog._default_renderer
+        assert isinstance(logger.renderer, renderers.KeyValueRenderer)
+
+    def test_renderer_custom(self, test_logger):
+        logger, o, e = test_logger
+
+        class Renderer(renderers.KeyValueRenderer):
+            def timestamp(self, ts):
+                return f"ts={ts:%Y}"
+
+            def prefix(self, name, level):
+                return f" {name}.{level} "
+
+        logger.renderer = Renderer()
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.info("test", a=1)
+
+        assert o.getvalue() == (
+            f"ts=2020 test.2 'test' module='test_containerlog' func='test_renderer_custom' "
+            f"line={line} a=1\n"
+        )
+
+    def test_writeout_writeerr(self, test_logger):
+        logger, o, e = test_logger
+
+        assert logger.writeout == o.write
+        assert logger.writeerr == e.write
+        assert logger._writers == [o.write] * 4 + [e.write] * 2
+
+    def test_set_sink(self, test_logger):
+        logger, o, e = test_logger
+
+        sink = sinks.MemorySink()
+        logger.set_sink(sink, containerlog.INFO, containerlog.ERROR)
+        for level in range(6):
+            logger._log(level, "test")
+
+        assert sink.getvalue().count("event='test'") == 3
+        assert o.getvalue().count("event='test'") == 2
+        assert e.getvalue().count("event='test'") == 1
+
+        logger.set_sink(sink)
+        assert logger._writers == [sink.writes.append] * 6
+
+    def test_log_many(self, test_logger):
+        logger, o, e = test_logger
+
+        writes = []
+        logger.writeout = writes.append
+        fields = {"i": 1, "level": "x"}
+        logger.log_many(containerlog.INFO, [("first", fields), ("second", {"i": 2})])
+
+        assert writes == [
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='first' i=1 _level='x'\n"  # noqa
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='second' i=2\n"
+        ]
+        assert fields == {"i": 1, "level": "x"}
+
+    def test_log_many_one_timestamp(self, test_logger):
+        logger, o, e = test_logger
+
+        times = iter([datetime.datetime(2020, 1, 1), datetime.datetime(2021, 1, 1)])
+        logger.utcnow = lambda: next(times)
+        logger.log_many(containerlog.INFO, [("a", {}), ("b", {})])
+
+        assert o.getvalue().count("2020-01-01") == 2
+
+    def test_log_many_context_processors(self, test_logger):
+        logger, o, e = test_logger
+
+        merges = []
+
+        class Processor:
+            def merge(self, event):
+                merges.append(1)
+                event["request_id"] = "abc"
+
+        logger.manager = containerlog.Manager()
+        logger.manager.context_processors.append(Processor())
+        logger.log_many(containerlog.INFO, [("a", {"i": 1}), ("b", {})])
+
+        assert merges == [1]
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' request_id='abc' i=1\n"  # noqa
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b' request_id='abc'\n"  # noqa
+        )
+
+    def test_log_many_error(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.recorder = recorder.FlightRecorder()
+        logger.info("recorded")
+        logger.log_many(containerlog.ERROR, [("a", {}), ("b", {})])
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='recorded' \n"
+        )
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='a' \n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='b' \n"
+        )
+
+    def test_log_many_below_level(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.level = containerlog.WARN
+        logger.log_many(containerlog.INFO, [("a", {})])
+        assert o.getvalue() == ""
+
+        logger.recorder = recorder.FlightRecorder()
+        logger.log_many(containerlog.INFO, [("a", {"i": 1})])
+        assert o.getvalue() == ""
+        logger.error("failed")
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' i=1\n"
+        )
+
+    def test_log_many_empty(self, test_logger):
+        logger, o, e = test_logger
+
+        writes = []
+        logger.writeout = writes.append
+        logger.log_many(containerlog.INFO, [])
+
+        assert writes == []
+
+    @pytest.mark.parametrize("level", [-1, 6, 99])
+    def test_log_many_invalid_level(self, test_logger, level):
+        logger, o, e = test_logger
+
+        with pytest.raises(ValueError):
+            logger.log_many(level, [("a", {})])
+
+    def test_log_many_filtered(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.dedup = dedup.Deduplicator(window=60)
+        logger.sampler = sampling.EveryN(2, by="message")
+        logger.log_many(containerlog.INFO, [("a", {}), ("a", {}), ("b", {}), ("b", {}), ("c", {})])
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b' sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='c' sampled=0.5\n"
+        )
+
+    def test_log_many_budget(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.budget = budget.Budget(lines_per_second=2)
+        logger.budget.lines.rate = 1e-9
+        logger.log_many(containerlog.INFO, [("test", {"i": i}) for i in range(3)])
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='warn' event='log budget exceeded' budget='logger' dropped_lines=1 dropped_bytes=0\n"  # noqa
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=0\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='test' i=1\n"
+        )
+
+    def test_log_many_callsite(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.log_many(containerlog.INFO, [("a", {"line": 1}), ("b", {})])
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='a' "
+            f"module='test_containerlog' func='test_log_many_callsite' line={line} _line=1\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='b' "
+            f"module='test_containerlog' func='test_log_many_callsite' line={line} \n"
+        )
+
     def test_trace(self, test_logger):
         logger, o, e = test_logger
 
@@ -421,11 +1313,151 @@ def test_get_logger_new_no_name():
     assert len(containerlog.manager.loggers) == 1
 
 
+def test_get_logger_concurrent():
+    names = [f"logger-{i}" for i in range(50)]
+    barrier = threading.Barrier(8)
+    results = [[] for _ in range(8)]
+
+    def worker(idx):
+        barrier.wait()
+        for name in names:
+            results[idx].append(containerlog.get_logger(name))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every thread should have gotten the same Logger instance for each name.
+    assert len(containerlog.manager.loggers) == len(names)
+    for i, name in enumerate(names):
+        expected = containerlog.manager.loggers[name]
+        for r in results:
+            assert r[i] is expected
+
+
+def test_get_logger_concurrent_set_level():
+    barrier = threading.Barrier(5)
+
+    def create(idx):
+        barrier.wait()
+        for i in range(200):
+            containerlog.get_logger(f"logger-{idx}-{i}")
+
+    def set_levels():
+        barrier.wait()
+        for level in (containerlog.INFO, containerlog.WARN, containerlog.ERROR):
+            containerlog.set_level(level)
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(4)]
+    threads.append(threading.Thread(target=set_levels))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Loggers created while the level was changing should all end up with
+    # the last level set, whether they were created before or after it.
+    assert len(containerlog.manager.loggers) == 800
+    for logger in containerlog.manager.loggers.values():
+        assert logger.level == containerlog.ERROR
+
+
+def test_get_logger_weak_registry():
+    containerlog.manager = containerlog.Manager(weak=True)
+    containerlog.set_level(containerlog.WARN)
+
+    logger = containerlog.get_logger("job-1")
+    assert containerlog.get_logger("job-1") is logger
+    assert len(containerlog.manager.loggers) == 1
+
+    del logger
+    gc.collect()
+    assert len(containerlog.manager.loggers) == 0
+
+    # Global configuration still applies to a logger re-created after eviction.
+    containerlog.disable()
+    logger = containerlog.get_logger("job-1")
+    assert logger.disabled is True
+
+    containerlog.enable()
+    assert logger.level == containerlog.WARN
+
+
+def test_get_logger_weak_registry_collected():
+    containerlog.manager = containerlog.Manager(weak=True)
+
+    gc.disable()
+    try:
+        containerlog.get_logger("job-1")
+
+        # A Logger is a reference cycle, so it is evicted once it is collected.
+        assert len(containerlog.manager.loggers) == 1
+        gc.collect()
+        assert len(containerlog.manager.loggers) == 0
+    finally:
+        gc.enable()
+
+
+def test_get_logger_globally_disabled():
+    containerlog.disable()
+    logger = containerlog.get_logger("test")
+    assert logger.disabled is True
+
+    containerlog.enable()
+    assert logger.disabled is False
+    assert logger.level == containerlog.DEBUG
+
+
 def test_caller_name():
     name = containerlog._caller_name(skip=1)
     assert name == "test_containerlog.test_caller_name"
 
 
+def test_caller_name_method():
+    class Foo:
+        def bar(self):
+            return containerlog._caller_name(skip=1)
+
+    assert Foo().bar() == "test_containerlog.Foo.bar"
+
+
+def test_caller_name_method_subclass():
+    class Foo:
+        def bar(self):
+            return containerlog._caller_name(skip=1)
+
+    class Baz(Foo):
+        pass
+
+    # The code object for Foo.bar is cached after the first lookup, but the
+    # class name should still be resolved from the bound instance.
+    assert Foo().bar() == "test_containerlog.Foo.bar"
+    assert Baz().bar() == "test_containerlog.Baz.bar"
+
+
+def test_caller_name_module_level():
+    code = compile("result = _caller_name(skip=1)", "<test>", "exec")
+    scope = {"__name__": "some.module", "_caller_name": containerlog._caller_name}
+    exec(code, scope)
+    assert scope["result"] == "some.module"
+
+
+def test_caller_name_cached():
+    containerlog._caller_cache.clear()
+
+    def get_name():
+        return containerlog._caller_name(skip=1)
+
+    assert get_name() == "test_containerlog.get_name"
+    assert get_name.__code__ in containerlog._caller_cache
+
+
+def test_caller_name_skip_too_deep():
+    assert containerlog._caller_name(skip=10000) == ""
+
+
 def test_set_level():
     containerlog.manager.loggers = {
         "test": containerlog.Logger("test", manager=containerlog.manager),
@@ -529,6 +1561,266 @@ def test_enable_all():
     assert loggers["other"].disabled is False
 
 
+def test_set_level_glob():
+    loggers = {
+        "test": containerlog.Logger("test", manager=containerlog.manager),
+        "foo": containerlog.Logger("foo", manager=containerlog.manager),
+        "foo.bar": containerlog.Logger("foo.bar", manager=containerlog.manager),
+    }
+
+    containerlog.manager.loggers = loggers
+    containerlog.set_level(containerlog.WARN, "foo*")
+
+    assert containerlog.manager.level == containerlog.DEBUG
+    assert loggers["test"].level == containerlog.DEBUG
+    assert loggers["foo"].level == containerlog.WARN
+    assert loggers["foo.bar"].level == containerlog.WARN
+
+    # Loggers created later should also have the level applied.
+    assert containerlog.get_logger("foo.baz").level == containerlog.WARN
+    assert containerlog.get_logger("other").level == containerlog.DEBUG
+
+
+def test_disable_glob_later_loggers():
+    containerlog.disable("foo.*", "exact")
+
+    assert containerlog.get_logger("foo.bar").disabled is True
+    assert containerlog.get_logger("exact").disabled is True
+    assert containerlog.get_logger("foo").disabled is False
+    assert containerlog.get_logger("exact.child").disabled is False
+
+
+def test_enable_glob_later_loggers():
+    containerlog.disable("foo.*")
+    containerlog.enable("foo.bar")
+
+    assert containerlog.get_logger("foo.bar").disabled is False
+    assert containerlog.get_logger("foo.baz").disabled is True
+
+    containerlog.enable("foo.*")
+    assert containerlog.get_logger("foo.qux").disabled is False
+    assert len(containerlog.manager.rules) == 2
+
+
+def test_disable_rules_applied_in_order():
+    containerlog.set_level(containerlog.ERROR, "foo.*")
+    containerlog.disable("foo.*")
+    containerlog.enable("foo.bar")
+
+    logger = containerlog.get_logger("foo.bar")
+    assert logger.disabled is False
+    assert logger.level == containerlog.ERROR
+
+
+def test_global_enable_clears_rules():
+    containerlog.disable("foo.*")
+    containerlog.enable()
+
+    assert len(containerlog.manager.rules) == 0
+    assert containerlog.get_logger("foo.bar").disabled is False
+
+
+def test_global_disable_later_loggers_with_level_rule():
+    containerlog.set_level(containerlog.INFO, "foo.*")
+    containerlog.disable()
+
+    logger = containerlog.get_logger("foo.bar")
+    assert logger.disabled is True
+
+    containerlog.enable()
+    assert logger.level == containerlog.INFO
+    assert containerlog.get_logger("foo.baz").level == containerlog.INFO
+
+
+def test_global_disable_rules_added_after():
+    containerlog.disable()
+    containerlog.set_level(containerlog.WARN, "foo.*")
+    containerlog.enable("bar")
+
+    assert containerlog.get_logger("foo.bar").level == containerlog.WARN
+    assert containerlog.get_logger("bar").disabled is False
+    assert containerlog.get_logger("baz").disabled is True
+
+
+def test_global_set_level_clears_rules():
+    containerlog.set_level(containerlog.ERROR, "foo.*")
+    containerlog.disable("bar")
+    containerlog.set_level(containerlog.INFO)
+
+    assert len(containerlog.manager.rules) == 0
+    assert containerlog.get_logger("foo.bar").level == containerlog.INFO
+    assert containerlog.get_logger("bar").level == containerlog.INFO
+
+
+def test_set_renderer():
+    logger = containerlog.get_logger("foo")
+    renderer = renderers.KeyValueRenderer()
+    containerlog.set_renderer(renderer)
+
+    assert containerlog.manager.renderer is renderer
+    assert logger.renderer is renderer
+    assert containerlog.get_logger("bar").renderer is renderer
+
+    # A disabled logger created later also gets the renderer.
+    containerlog.disable()
+    assert containerlog.get_logger("baz").renderer is renderer
+
+
+def test_set_boost():
+    logger = containerlog.get_logger("foo")
+    boost = adaptive.Boost()
+    containerlog.set_boost(boost)
+
+    assert containerlog.manager.boost is boost
+    assert logger.boost is boost
+    assert containerlog.get_logger("bar").boost is boost
+
+    containerlog.set_boost(None)
+    assert logger.boost is None
+    assert containerlog.get_logger("baz").boost is None
+
+
+def test_set_boost_glob():
+    logger = containerlog.get_logger("foo.bar")
+    boost = adaptive.Boost()
+    containerlog.set_boost(boost, "foo.*")
+
+    assert logger.boost is boost
+    assert containerlog.get_logger("foo.baz").boost is boost
+    assert containerlog.get_logger("other").boost is None
+
+    # Global level changes do not clear boost rules.
+    containerlog.set_level(containerlog.INFO)
+    assert containerlog.get_logger("foo.qux").boost is boost
+
+    # A global boost supersedes boost rules.
+    containerlog.set_boost(None)
+    assert len(containerlog.manager.rules) == 0
+    assert logger.boost is None
+
+
+def test_route():
+    audit = sinks.MemorySink()
+    out = sinks.MemorySink()
+    containerlog.add_sink("audit", audit)
+    containerlog.add_sink("stdout", out)
+
+    logger = containerlog.get_logger("app.audit")
+    containerlog.route("audit", "app.audit*", min_level=containerlog.INFO)
+    other = containerlog.get_logger("app.other")
+    created = containerlog.get_logger("app.audit.login")
+
+    for log in (logger, other, created):
+        log.debug("debug")
+        log.info("info")
+
+    assert audit.getvalue().count("event='info'") == 2
+    assert "event='debug'" not in audit.getvalue()
+    assert out.getvalue().count("event='debug'") == 3
+    assert out.getvalue().count("event='info'") == 1
+
+
+def test_route_all():
+    audit = sinks.MemorySink()
+    containerlog.add_sink("audit", audit)
+    logger = containerlog.get_logger("foo")
+
+    containerlog.route("audit", min_level=containerlog.ERROR)
+    logger.error("failed")
+    containerlog.get_logger("bar").critical("failed")
+
+    assert audit.getvalue().count("event='failed'") == 2
+
+
+def test_route_unknown_sink():
+    with pytest.raises(ValueError):
+        containerlog.route("unknown", "foo")
+
+
+def test_add_sink_replaces():
+    first = sinks.MemorySink()
+    second = sinks.MemorySink()
+    containerlog.add_sink("audit", first)
+    containerlog.route("audit", "foo")
+    logger = containerlog.get_logger("foo")
+
+    containerlog.add_sink("audit", second)
+    logger.info("test")
+
+    assert first.getvalue() == ""
+    assert "event='test'" in second.getvalue()
+
+
+def test_reroute(monkeypatch):
+    logger = containerlog.get_logger("foo")
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+
+    logger.info("before")
+    containerlog.manager.reroute()
+    logger.info("after")
+
+    assert "event='before'" not in out.getvalue()
+    assert "event='after'" in out.getvalue()
+
+
+def test_clear_routes(monkeypatch):
+    audit = sinks.MemorySink()
+    containerlog.add_sink("audit", audit)
+    containerlog.route("audit", "foo")
+    logger = containerlog.get_logger("foo")
+
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    containerlog.manager.clear_routes()
+    logger.info("test")
+
+    assert audit.getvalue() == ""
+    assert "event='test'" in out.getvalue()
+    assert len(containerlog.manager.rules) == 0
+
+
+def test_fork_flushes_sinks(tmp_path, monkeypatch, fork):
+    path = tmp_path / "test.log"
+    # A block buffered stdout, as when stdout is redirected to a file.
+    out = open(path, "w")
+    monkeypatch.setattr(sys, "stdout", out)
+    containerlog.manager.reroute()
+    logger = containerlog.get_logger("foo")
+
+    logger.info("parent")
+
+    def child():
+        logger.info("child")
+        out.flush()
+        return True
+
+    assert fork(child)
+    out.close()
+
+    # The parent's buffered line is flushed before the fork, so the child
+    # does not write it out again.
+    assert path.read_text().count("event='parent'") == 1
+    assert path.read_text().count("event='child'") == 1
+
+
+def test_fork_manager_lock(fork):
+    locked = threading.Event()
+
+    def hold():
+        with containerlog.manager._lock:
+            locked.set()
+            time.sleep(0.1)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    locked.wait()
+
+    # The fork waits for the lock to be released, and the child gets its own.
+    assert fork(lambda: containerlog.get_logger("foo") is not None)
+    t.join()
+
+
 @pytest.mark.skipif(sys.version_info < (3, 7), reason="contextvars requires py37+")
 def test_enable_contextvars():
 
@@ -548,14 +1840,32 @@ def test_setup(
     mock_enable: mock.Mock,
 ) -> None:
 
+    renderer = renderers.KeyValueRenderer()
+    audit = sinks.MemorySink()
     containerlog.setup(
         enable=["foo"],
         disable=["bar"],
         level=containerlog.DEBUG,
         with_contextvars=True,
+        weak_registry=True,
+        budget=budget.Budget(lines_per_second=10),
+        renderer=renderer,
+        sinks={"audit": audit},
     )
 
     mock_enable.assert_called_once_with("foo")
     mock_disable.assert_called_once_with("bar")
     mock_set_level.assert_called_once_with(containerlog.DEBUG)
     mock_ctxvars.assert_called_once()
+    assert isinstance(containerlog.manager.loggers, weakref.WeakValueDictionary)
+    assert containerlog.manager.budget.lines.rate == 10
+    assert containerlog.manager.renderer is renderer
+    assert containerlog.manager.sinks["audit"] is audit
+
+
+def test_setup_rules_apply_to_later_loggers():
+    containerlog.setup(disable=["noisy.*"], level=containerlog.INFO)
+
+    assert containerlog.get_logger("noisy.x").disabled
+    assert not containerlog.get_logger("other").disabled
+    assert containerlog.get_logger("other").level == containerlog.INFO
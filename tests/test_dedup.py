@@ -0,0 +1,141 @@
+"""Unit tests for containerlog duplicate event suppression."""
+
+import pytest
+
+from containerlog import dedup
+
+
+class TestDeduplicator:
+    def test_init(self):
+        d = dedup.Deduplicator()
+        assert d.window == 1.0
+        assert d.by_keys is False
+        assert d.max_events == 10000
+
+    def test_init_invalid_window(self):
+        with pytest.raises(ValueError):
+            dedup.Deduplicator(window=0)
+
+    def test_check(self, clock):
+        d = dedup.Deduplicator(window=5.0)
+        d._clock = clock
+
+        assert d.check("test", 4, "msg", {}) == 0
+        assert d.check("test", 4, "msg", {}) == -1
+        assert d.check("test", 4, "msg", {}) == -1
+
+        clock.now = 104.9
+        assert d.check("test", 4, "msg", {}) == -1
+
+        # The window has ended, so the event is emitted with the suppressed count.
+        clock.now = 105.0
+        assert d.check("test", 4, "msg", {}) == 3
+        assert d.check("test", 4, "msg", {}) == -1
+
+        # No duplicates in the previous window.
+        clock.now = 111.0
+        assert d.check("test", 4, "msg", {}) == 1
+        clock.now = 117.0
+        assert d.check("test", 4, "msg", {}) == 0
+
+    def test_check_distinct_events(self, clock):
+        d = dedup.Deduplicator()
+        d._clock = clock
+
+        assert d.check("test", 4, "msg", {}) == 0
+        assert d.check("other", 4, "msg", {}) == 0
+        assert d.check("test", 3, "msg", {}) == 0
+        assert d.check("test", 4, "other msg", {}) == 0
+
+        # Keys are ignored unless by_keys is set.
+        assert d.check("test", 4, "msg", {"a": 1}) == -1
+
+    def test_check_by_keys(self, clock):
+        d = dedup.Deduplicator(by_keys=True)
+        d._clock = clock
+
+        assert d.check("test", 4, "msg", {"a": 1}) == 0
+        assert d.check("test", 4, "msg", {"a": 2}) == -1
+        assert d.check("test", 4, "msg", {"b": 1}) == 0
+        assert d.check("test", 4, "msg", {}) == 0
+
+        # The order of the keys does not matter.
+        assert d.check("test", 4, "msg", {"a": 1, "b": 2}) == 0
+        assert d.check("test", 4, "msg", {"b": 1, "a": 2}) == -1
+
+    def test_check_max_events(self, clock):
+        d = dedup.Deduplicator(window=1.0, max_events=2)
+        d._clock = clock
+
+        assert d.check("test", 4, "a", {}) == 0
+        assert d.check("test", 4, "a", {}) == -1
+        assert d.check("test", 4, "b", {}) == 0
+
+        # Event "b" has expired with no suppressed count, so it is pruned,
+        # while event "a" is kept since it has a suppressed count.
+        clock.now = 102.0
+        assert d.check("test", 4, "c", {}) == 0
+        assert len(d._events) == 2
+        assert d.check("test", 4, "a", {}) == 1
+
+    def test_drain(self, clock):
+        d = dedup.Deduplicator()
+        d._clock = clock
+
+        d.check("test", 4, "a", {})
+        d.check("test", 4, "a", {})
+        d.check("test", 4, "a", {})
+        d.check("test", 2, "b", {})
+        d.check("other", 4, "a", {})
+        d.check("other", 4, "a", {})
+
+        assert d.drain("test") == [(4, "a", 2)]
+        assert d.drain("test") == []
+
+        # After draining, the next occurrence is emitted.
+        assert d.check("test", 4, "a", {}) == 0
+        assert d.check("other", 4, "a", {}) == -1
+
+    def test_due(self, clock):
+        d = dedup.Deduplicator(window=5.0)
+        d._clock = clock
+
+        # Nothing is pending, so the clock is not checked.
+        d._clock = None
+        assert d.due("test") == []
+        d._clock = clock
+
+        d.check("test", 4, "a", {})
+        d.check("test", 4, "a", {})
+        d.check("test", 2, "b", {})
+        d.check("other", 4, "a", {})
+        d.check("other", 4, "a", {})
+        assert d._next_due == 105.0
+
+        clock.now = 104.0
+        assert d.due("test") == []
+
+        # Only events of the given logger are due, and they stop being tracked.
+        clock.now = 105.0
+        assert d.due("test") == [(4, "a", 1)]
+        assert d.due("test") == []
+        assert ("test", 4, "a") not in d._events
+
+        # The due event of the other logger is checked again after a window.
+        assert d._next_due == 110.0
+        clock.now = 110.0
+        assert d.due("other") == [(4, "a", 1)]
+        assert d._next_due == float("inf")
+
+    def test_due_resumed_burst(self, clock):
+        d = dedup.Deduplicator(window=5.0)
+        d._clock = clock
+
+        d.check("test", 4, "a", {})
+        d.check("test", 4, "a", {})
+
+        # The event occurred again after its window, so its count was returned
+        # by check and nothing is due.
+        clock.now = 106.0
+        assert d.check("test", 4, "a", {}) == 1
+        assert d.due("test") == []
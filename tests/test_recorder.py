@@ -0,0 +1,67 @@
+"""Unit tests for the containerlog flight recorder."""
+
+import threading
+
+import pytest
+
+from containerlog import recorder
+
+
+class TestFlightRecorder:
+    def test_init(self):
+        r = recorder.FlightRecorder()
+        assert r.capacity == 256
+        assert r.level == 1
+
+    def test_init_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            recorder.FlightRecorder(capacity=0)
+
+    def test_record_and_drain(self):
+        r = recorder.FlightRecorder()
+        r.record("logger", 1, 1, "first", {})
+        r.record("logger", 2, 2, "second", {"key": "value"})
+
+        assert r.drain() == [
+            ("logger", 1, 1, "first", {}),
+            ("logger", 2, 2, "second", {"key": "value"}),
+        ]
+        assert r.drain() == []
+
+    def test_capacity(self):
+        r = recorder.FlightRecorder(capacity=2)
+        for i in range(5):
+            r.record("logger", i, 1, "test", {})
+
+        assert [rec[1] for rec in r.drain()] == [3, 4]
+
+    def test_clear(self):
+        r = recorder.FlightRecorder()
+        r.record("logger", 1, 1, "test", {})
+        r.clear()
+        assert r.drain() == []
+
+    def test_per_thread(self):
+        r = recorder.FlightRecorder()
+        r.record("logger", 1, 1, "main", {})
+
+        drained = []
+
+        def run():
+            r.record("logger", 2, 1, "thread", {})
+            drained.extend(r.drain())
+
+        t = threading.Thread(target=run)
+        t.start()
+        t.join()
+
+        assert drained == [("logger", 2, 1, "thread", {})]
+        assert r.drain() == [("logger", 1, 1, "main", {})]
+
+    def test_fork(self, fork):
+        r = recorder.FlightRecorder()
+        r.record("logger", 1, 1, "parent", {})
+
+        # The parent's events are not written out again by an error in the child.
+        assert fork(lambda: r.drain() == [])
+        assert r.drain() == [("logger", 1, 1, "parent", {})]
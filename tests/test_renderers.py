@@ -0,0 +1,440 @@
+"""Unit tests for containerlog renderers."""
+
+import datetime
+import sys
+
+import pytest
+
+import containerlog
+from containerlog import renderers, tracebacks
+
+
+class TestRenderer:
+    @pytest.mark.parametrize(
+        "method,args",
+        [
+            ("timestamp", [datetime.datetime(2020, 1, 1)]),
+            ("prefix", ["test", 1]),
+            ("message", ["test"]),
+            ("callsite", ["module", "func"]),
+            ("fields", [{}]),
+            ("key", ["key", True]),
+            ("value", ["value"]),
+        ],
+    )
+    def test_not_implemented(self, method, args):
+        with pytest.raises(NotImplementedError):
+            getattr(renderers.Renderer(), method)(*args)
+
+    def test_exception(self):
+        assert renderers.Renderer().exception("text\n") == "\ntext\n"
+
+    def test_exception_fields(self):
+        fields = {"exc_msg": "it's"}
+        assert renderers.Renderer().exception_fields(fields) is fields
+
+    def test_compile(self):
+        class Renderer(renderers.Renderer):
+            def timestamp(self, ts):
+                return "T"
+
+            def prefix(self, name, level):
+                return f"|{name}|{level}|"
+
+            def message(self, msg):
+                return msg
+
+            def callsite(self, module, func):
+                return f"|{module}:", "|"
+
+            def fields(self, fields):
+                return ",".join(fields)
+
+        logger = containerlog.Logger("test", manager=containerlog.manager, renderer=Renderer())
+        render = logger.renderer.compile(logger)
+
+        assert render(2, "msg", False, None, {"a": 1, "b": 2}) == "T|test|2|msga,b\n"
+        assert logger._render(4, "msg", False, None, {}) == "T|test|4|msg\n"
+        assert render(2, "msg", False, None, {"a": 1}, None, {"c": 3}) == "T|test|2|msgc,a\n"
+        assert render(2, "msg", False, None, {}, None, None, "S") == "S|test|2|msg\n"
+
+    def test_compile_reads_logger_config(self):
+        logger = containerlog.Logger("test", manager=containerlog.manager)
+        logger.utcnow = lambda: datetime.datetime(2021, 1, 1)
+        logger.manager = containerlog.Manager()
+
+        assert logger._render(1, "msg", False, None, {}) == (
+            "timestamp='2021-01-01T00:00:00Z' logger='test' level='debug' event='msg' \n"
+        )
+
+    def test_compile_reserved(self):
+        class Renderer(renderers.KeyValueRenderer):
+            reserved = frozenset(("ts",))
+            callsite_keys = frozenset(("where",))
+
+        logger = containerlog.Logger("test", manager=containerlog.manager, renderer=Renderer())
+        logger.utcnow = lambda: datetime.datetime(2021, 1, 1)
+        fields = {"ts": 1, "event": 2, "where": 3}
+
+        assert logger._render(1, "msg", False, None, fields) == (
+            "timestamp='2021-01-01T00:00:00Z' logger='test' level='debug' event='msg' "
+            "_ts=1 event=2 where=3\n"
+        )
+        assert fields == {"ts": 1, "event": 2, "where": 3}
+        assert logger._render(1, "msg", False, sys._getframe(), fields).endswith(
+            " _ts=1 event=2 _where=3\n"
+        )
+
+
+class TestKeyValueRenderer:
+    def test_timestamp(self):
+        ts = datetime.datetime(2020, 1, 1, 12, 30, 0, 123)
+        assert (
+            renderers.KeyValueRenderer().timestamp(ts) == "timestamp='2020-01-01T12:30:00.000123Z'"
+        )
+
+    def test_prefix(self):
+        assert (
+            renderers.KeyValueRenderer().prefix("test", 3) == " logger='test' level='warn' event="
+        )
+
+    @pytest.mark.parametrize(
+        "msg,expected",
+        [
+            ("test", "'test' "),
+            ("it's", "'it\\'s' "),
+        ],
+    )
+    def test_message(self, msg, expected):
+        assert renderers.KeyValueRenderer().message(msg) == expected
+
+    def test_callsite(self):
+        assert renderers.KeyValueRenderer().callsite("mod", "fn") == (
+            "module='mod' func='fn' line=",
+            " ",
+        )
+
+    def test_fields(self):
+        fields = {"a": "b", "c": 1, "d": None, "e": [1, 2]}
+        assert renderers.KeyValueRenderer().fields(fields) == "a='b' c=1 d=None e=[1, 2]"
+
+    def test_fields_empty(self):
+        assert renderers.KeyValueRenderer().fields({}) == ""
+
+    def test_key(self):
+        renderer = renderers.KeyValueRenderer()
+        assert renderer.key("a", True) == "a="
+        assert renderer.key("a", False) == " a="
+
+    @pytest.mark.parametrize("value", ["b", "", 1, 1.5, None, [1, 2]])
+    def test_value(self, value):
+        renderer = renderers.KeyValueRenderer()
+        assert f"a={renderer.value(value)}" == renderer.fields({"a": value})
+
+    @pytest.mark.parametrize(
+        "s,expected",
+        [
+            ("test", "test"),
+            ("it's", "it\\'s"),
+            ("a\nb", "a\\nb"),
+            ("a\r\nb", "a\\r\\nb"),
+            ("a\\b", "a\\\\b"),
+        ],
+    )
+    def test_escape(self, s, expected):
+        assert renderers._escape(s) == expected
+
+    def test_exception_fields(self):
+        fields = {"exc_type": "ValueError", "exc_msg": "it's\nbad", "n": 1}
+        assert renderers.KeyValueRenderer().exception_fields(fields) == {
+            "exc_type": "ValueError",
+            "exc_msg": "it\\'s\\nbad",
+            "n": 1,
+        }
+
+    def test_logger_exception_structured(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        logger.exception("failed", exc_info=ValueError("it's\nbad"))
+
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' "
+            "exc_type='ValueError' exc_msg='it\\'s\\nbad' exc_stack=''\n"
+        )
+
+
+class TestLogfmtRenderer:
+    def test_timestamp(self):
+        ts = datetime.datetime(2020, 1, 1, 12, 30, 0, 123)
+        assert renderers.LogfmtRenderer().timestamp(ts) == "timestamp=2020-01-01T12:30:00.000123Z"
+
+    @pytest.mark.parametrize(
+        "name,expected",
+        [
+            ("test", " logger=test level=warn event="),
+            ("foo.bar", " logger=foo.bar level=warn event="),
+            ("a b", ' logger="a b" level=warn event='),
+            ("", ' logger="" level=warn event='),
+        ],
+    )
+    def test_prefix(self, name, expected):
+        assert renderers.LogfmtRenderer().prefix(name, 3) == expected
+
+    @pytest.mark.parametrize(
+        "msg,expected",
+        [
+            ("test", "test"),
+            ("", '""'),
+            ("a message", '"a message"'),
+            ("a=b", '"a=b"'),
+            ('say "hi"', '"say \\"hi\\""'),
+            ("it's", "it's"),
+            ("a\\b", '"a\\\\b"'),
+            ("a\nb", '"a\\nb"'),
+            ("a\tb", '"a\\tb"'),
+        ],
+    )
+    def test_message(self, msg, expected):
+        assert renderers.LogfmtRenderer().message(msg) == expected
+
+    def test_message_cached(self):
+        renderer = renderers.LogfmtRenderer()
+        rendered = renderer.message("a message")
+
+        assert renderer._messages == {"a message": rendered}
+        assert renderer.message("a message") is rendered
+
+    def test_callsite(self):
+        assert renderers.LogfmtRenderer().callsite("mod", "fn") == (
+            " module=mod func=fn line=",
+            "",
+        )
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("value", "value"),
+            ("", '""'),
+            ("two words", '"two words"'),
+            ("/api/v1/items", "/api/v1/items"),
+            ('"quoted"', '"\\"quoted\\""'),
+            ("x\x1b[31mred", '"x\\u001b[31mred"'),
+            ("a\x00b", '"a\\u0000b"'),
+            ("a\x7fb", '"a\\u007fb"'),
+            ("tab\tline\n", '"tab\\tline\\n"'),
+            (1, "1"),
+            (1.5, "1.5"),
+            (None, "null"),
+            (True, "true"),
+            (False, "false"),
+            ([1, 2], '"[1, 2]"'),
+            ({"a": 1}, "\"{'a': 1}\""),
+            ((), "()"),
+        ],
+    )
+    def test_fields_value(self, value, expected):
+        renderer = renderers.LogfmtRenderer()
+        assert renderer.fields({"key": value}) == f" key={expected}"
+        assert renderer.value(value) == expected
+
+    def test_fields(self):
+        fields = {"a": "b", "c": 1, "d": None}
+        assert renderers.LogfmtRenderer().fields(fields) == " a=b c=1 d=null"
+
+    def test_fields_empty(self):
+        assert renderers.LogfmtRenderer().fields({}) == ""
+
+    @pytest.mark.parametrize(
+        "key,expected",
+        [
+            ("key", "key"),
+            ("a key", "a_key"),
+            ('a"b=c', "a_b_c"),
+            ("a\x1bb\x00", "a_b_"),
+            ("", "_"),
+        ],
+    )
+    def test_fields_key(self, key, expected):
+        renderer = renderers.LogfmtRenderer()
+        assert renderer.fields({key: 1}) == f" {expected}=1"
+        assert renderer._keys[key] == expected
+        assert renderer.key(key, True) == f" {expected}="
+
+    def test_exception(self):
+        renderer = renderers.LogfmtRenderer()
+        assert renderer.exception("") == "\n"
+        assert renderer.exception("Traceback:\n  x\nValueError: a b\n") == (
+            ' exc_text="Traceback:\\n  x\\nValueError: a b"\n'
+        )
+
+    def test_logger(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.LogfmtRenderer()
+        logger.callsite = True
+        line = sys._getframe().f_lineno + 1
+        logger.info("a message", user="alice", tags=["a", "b"])
+        logger.callsite = False
+        logger.warn("done")
+
+        assert o.getvalue() == (
+            'timestamp=2020-01-01T00:00:00Z logger=test level=info event="a message" '
+            f"module={__name__} func=test_logger line={line} user=alice tags=\"['a', 'b']\"\n"
+            "timestamp=2020-01-01T00:00:00Z logger=test level=warn event=done\n"
+        )
+
+    def test_logger_exception(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.LogfmtRenderer()
+        logger.exception("failed", exc_info=ValueError("bad value"))
+
+        assert e.getvalue() == (
+            "timestamp=2020-01-01T00:00:00Z logger=test level=error event=failed "
+            'exc_text="ValueError: bad value"\n'
+        )
+
+    def test_logger_exception_structured(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.LogfmtRenderer()
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        logger.exception("failed", exc_info=ValueError("it's\nbad"))
+
+        # The message is escaped once, for logfmt.
+        assert e.getvalue() == (
+            "timestamp=2020-01-01T00:00:00Z logger=test level=error event=failed "
+            'exc_type=ValueError exc_msg="it\'s\\nbad" exc_stack=""\n'
+        )
+
+
+class TestCompactRenderer:
+    def test_init(self):
+        renderer = renderers.CompactRenderer()
+        assert renderer.keys == renderers.COMPACT_KEYS
+        assert renderer.keys is not renderers.COMPACT_KEYS
+        assert renderer.short_levels is True
+        assert renderer.root is None
+
+    def test_init_keys(self):
+        renderer = renderers.CompactRenderer(keys={"event": "m"})
+        assert renderer.keys["event"] == "m"
+        assert renderer.keys["timestamp"] == "ts"
+
+    @pytest.mark.parametrize(
+        "keys",
+        [
+            {"unknown": "u"},
+            {"event": "ts"},
+            {"event": ""},
+            {"event": "a b"},
+        ],
+    )
+    def test_init_invalid_keys(self, keys):
+        with pytest.raises(ValueError):
+            renderers.CompactRenderer(keys=keys)
+
+    def test_timestamp(self):
+        ts = datetime.datetime(2020, 1, 1)
+        assert renderers.CompactRenderer().timestamp(ts) == "ts=2020-01-01T00:00:00Z"
+        assert renderers.CompactRenderer(keys={"timestamp": "t"}).timestamp(ts) == (
+            "t=2020-01-01T00:00:00Z"
+        )
+
+    @pytest.mark.parametrize(
+        "kwargs,name,expected",
+        [
+            ({}, "app", " lg=app lv=W msg="),
+            ({"short_levels": False}, "app", " lg=app lv=warn msg="),
+            ({"root": "app"}, "app", " lv=W msg="),
+            ({"root": "app"}, "app.db", " lg=app.db lv=W msg="),
+            ({"keys": {"logger": "l", "level": "v", "event": "e"}}, "app", " l=app v=W e="),
+        ],
+    )
+    def test_prefix(self, kwargs, name, expected):
+        assert renderers.CompactRenderer(**kwargs).prefix(name, 3) == expected
+
+    def test_callsite(self):
+        assert renderers.CompactRenderer().callsite("mod", "fn") == (
+            " mod=mod fn=fn ln=",
+            "",
+        )
+
+    def test_mapping(self):
+        assert renderers.CompactRenderer(keys={"event": "m"}).mapping == {
+            "keys": {
+                "ts": "timestamp",
+                "lg": "logger",
+                "lv": "level",
+                "m": "event",
+                "mod": "module",
+                "fn": "func",
+                "ln": "line",
+            },
+            "levels": {
+                "T": "trace",
+                "D": "debug",
+                "I": "info",
+                "W": "warn",
+                "E": "error",
+                "C": "critical",
+            },
+        }
+
+    def test_mapping_long_levels(self):
+        levels = renderers.CompactRenderer(short_levels=False).mapping["levels"]
+        assert levels == {name: name for name in renderers.LEVEL_NAMES}
+
+    def test_reserved(self):
+        renderer = renderers.CompactRenderer(keys={"event": "m"})
+
+        assert renderer.reserved == {
+            "ts",
+            "lg",
+            "lv",
+            "m",
+            "mod",
+            "fn",
+            "ln",
+            "timestamp",
+            "logger",
+            "level",
+            "event",
+            "module",
+            "func",
+            "line",
+        }
+        assert renderer.callsite_keys == renderer.reserved
+
+    def test_logger_reserved(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.CompactRenderer()
+        logger.info("test", lv="a", event="b", timestamp="user", level=3, mod="m")
+
+        # Both short and full keys are renamed, so the line expands losslessly.
+        assert o.getvalue() == (
+            "ts=2020-01-01T00:00:00Z lg=test lv=I msg=test "
+            "_lv=a _event=b _timestamp=user _level=3 _mod=m\n"
+        )
+
+    def test_logger(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.CompactRenderer(root="test")
+        logger.info("a message", user="alice")
+
+        assert o.getvalue() == ('ts=2020-01-01T00:00:00Z lv=I msg="a message" user=alice\n')
+
+    def test_logger_exception_structured(self, test_logger):
+        logger, o, e = test_logger
+
+        logger.renderer = renderers.CompactRenderer(root="test")
+        logger.exc_renderer = tracebacks.StructuredRenderer()
+        logger.exception("failed", exc_info=ValueError("it's\nbad"))
+
+        assert e.getvalue() == (
+            "ts=2020-01-01T00:00:00Z lv=E msg=failed "
+            'exc_type=ValueError exc_msg="it\'s\\nbad" exc_stack=""\n'
+        )
@@ -0,0 +1,164 @@
+"""Unit tests for containerlog logger configuration rules."""
+
+import pytest
+
+import containerlog
+from containerlog import adaptive, rules, sinks
+
+
+class TestRule:
+    def test_init_exact(self):
+        rule = rules.Rule("foo", rules.DISABLE)
+        assert rule.pattern == "foo"
+        assert rule.action == rules.DISABLE
+        assert rule.level is None
+        assert rule.prefix is None
+        assert rule.regex is None
+        assert rule.kind == rules.STATE
+
+    def test_init_prefix(self):
+        rule = rules.Rule("foo.*", rules.ENABLE)
+        assert rule.prefix == "foo."
+        assert rule.regex is None
+        assert rule.kind == rules.STATE
+
+    def test_init_glob(self):
+        rule = rules.Rule("foo.*.bar", rules.LEVEL, containerlog.INFO)
+        assert rule.prefix is None
+        assert rule.regex is not None
+        assert rule.level == containerlog.INFO
+        assert rule.kind == rules.LEVEL
+
+    def test_init_boost(self):
+        boost = adaptive.Boost()
+        rule = rules.Rule("foo.*", rules.BOOST, boost=boost)
+        assert rule.boost is boost
+        assert rule.kind == rules.BOOST
+
+    def test_init_route(self):
+        rule = rules.Rule("foo.*", rules.ROUTE, sink="audit")
+        assert rule.sink == "audit"
+        assert rule.levels == (containerlog.TRACE, containerlog.CRITICAL)
+        assert rule.kind == rules.ROUTE
+
+        rule = rules.Rule("foo.*", rules.ROUTE, sink="audit", levels=(1, 3))
+        assert rule.levels == (1, 3)
+
+    def test_init_route_without_sink(self):
+        with pytest.raises(ValueError):
+            rules.Rule("foo", rules.ROUTE)
+
+    def test_init_unknown_action(self):
+        with pytest.raises(ValueError):
+            rules.Rule("foo", "unknown")
+
+    def test_init_level_without_level(self):
+        with pytest.raises(ValueError):
+            rules.Rule("foo", rules.LEVEL)
+
+    @pytest.mark.parametrize(
+        "pattern,name,expected",
+        [
+            ("foo", "foo", True),
+            ("foo", "foo.bar", False),
+            ("foo*", "foo", True),
+            ("foo*", "foo.bar", True),
+            ("foo*", "bar.foo", False),
+            ("*", "anything", True),
+            ("foo.*", "foo", False),
+            ("foo.*", "foo.bar", True),
+            ("*.bar", "foo.bar", True),
+            ("*.bar", "foo.baz", False),
+            ("foo.?", "foo.a", True),
+            ("foo.?", "foo.ab", False),
+            ("foo.[ab]*", "foo.bar", True),
+            ("foo.[ab]*", "foo.car", False),
+        ],
+    )
+    def test_matches(self, pattern, name, expected):
+        assert rules.Rule(pattern, rules.DISABLE).matches(name) is expected
+
+    def test_apply_disable(self):
+        logger = containerlog.Logger("test", manager=containerlog.manager)
+        rules.Rule("test", rules.DISABLE).apply(logger)
+        assert logger.disabled is True
+
+    def test_apply_enable(self):
+        logger = containerlog.Logger("test", level=containerlog.INFO, manager=containerlog.manager)
+        logger.disable()
+        rules.Rule("test", rules.ENABLE).apply(logger)
+        assert logger.level == containerlog.INFO
+
+    def test_apply_level(self):
+        logger = containerlog.Logger("test", manager=containerlog.manager)
+        rules.Rule("test", rules.LEVEL, containerlog.ERROR).apply(logger)
+        assert logger.level == containerlog.ERROR
+
+    def test_apply_route(self):
+        manager = containerlog.Manager()
+        sink = manager.sinks["audit"] = sinks.MemorySink()
+        logger = containerlog.Logger("test", manager=manager)
+        rules.Rule("test", rules.ROUTE, sink="audit", levels=(2, 3)).apply(logger)
+
+        assert logger._writers[1] != sink.writes.append
+        assert logger._writers[2:4] == [sink.writes.append] * 2
+        assert logger._writers[4] != sink.writes.append
+
+
+class TestRuleTable:
+    def test_init(self):
+        table = rules.RuleTable()
+        assert len(table) == 0
+        assert table.match("foo") == []
+
+    def test_match_ordered(self):
+        table = rules.RuleTable()
+        r1 = table.add(rules.Rule("*.bar", rules.DISABLE))
+        r2 = table.add(rules.Rule("foo*", rules.LEVEL, containerlog.INFO))
+        r3 = table.add(rules.Rule("foo.bar", rules.ENABLE))
+        r4 = table.add(rules.Rule("*", rules.LEVEL, containerlog.WARN))
+        table.add(rules.Rule("baz", rules.DISABLE))
+
+        assert table.match("foo.bar") == [r1, r2, r3, r4]
+        assert table.match("foo") == [r2, r4]
+        assert table.match("other") == [r4]
+
+    def test_add_supersedes_same_kind(self):
+        table = rules.RuleTable()
+        table.add(rules.Rule("foo*", rules.DISABLE))
+        level = table.add(rules.Rule("foo*", rules.LEVEL, containerlog.INFO))
+        enable = table.add(rules.Rule("foo*", rules.ENABLE))
+
+        assert len(table) == 2
+        assert list(table) == [level, enable]
+        assert table.match("foo.bar") == [level, enable]
+
+    def test_add_supersedes_same_route_levels(self):
+        table = rules.RuleTable()
+        table.add(rules.Rule("foo*", rules.ROUTE, sink="a", levels=(0, 3)))
+        errors = table.add(rules.Rule("foo*", rules.ROUTE, sink="b", levels=(4, 5)))
+        info = table.add(rules.Rule("foo*", rules.ROUTE, sink="c", levels=(0, 3)))
+
+        assert list(table) == [errors, info]
+
+    def test_clear(self):
+        table = rules.RuleTable()
+        table.add(rules.Rule("foo", rules.DISABLE))
+        table.add(rules.Rule("bar*", rules.LEVEL, containerlog.INFO))
+        table.add(rules.Rule("*.baz", rules.ENABLE))
+
+        table.clear()
+        assert len(table) == 0
+        assert table.match("foo") == []
+        assert table.match("bar") == []
+        assert table.match("x.baz") == []
+
+    def test_clear_kind(self):
+        table = rules.RuleTable()
+        table.add(rules.Rule("foo", rules.DISABLE))
+        level = table.add(rules.Rule("foo*", rules.LEVEL, containerlog.INFO))
+        table.add(rules.Rule("*.foo", rules.ENABLE))
+
+        table.clear(rules.STATE)
+        assert list(table) == [level]
+        assert table.match("foo") == [level]
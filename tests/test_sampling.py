@@ -0,0 +1,127 @@
+"""Unit tests for containerlog samplers."""
+
+import pytest
+
+from containerlog import sampling
+from containerlog.types import Sampler
+
+
+class TestEveryN:
+    def test_init(self):
+        sampler = sampling.EveryN(4)
+        assert isinstance(sampler, Sampler)
+        assert sampler.n == 4
+        assert sampler.rate == 0.25
+        assert sampler.by_callsite is True
+        assert sampler.max_keys == 10000
+
+    def test_init_by_message(self):
+        sampler = sampling.EveryN(4, by="message")
+        assert sampler.by_callsite is False
+
+    def test_init_invalid_by(self):
+        with pytest.raises(ValueError):
+            sampling.EveryN(4, by="other")
+
+    def test_init_invalid_n(self):
+        with pytest.raises(ValueError):
+            sampling.EveryN(0)
+
+    def test_sample(self):
+        sampler = sampling.EveryN(3)
+        results = [sampler.sample("a") for _ in range(7)]
+        assert results == [1 / 3, 0, 0, 1 / 3, 0, 0, 1 / 3]
+
+    def test_sample_per_key(self):
+        sampler = sampling.EveryN(2)
+        assert sampler.sample("a") == 0.5
+        assert sampler.sample("b") == 0.5
+        assert sampler.sample("a") == 0
+        assert sampler.sample("b") == 0
+
+    def test_sample_max_keys(self):
+        sampler = sampling.EveryN(2, max_keys=2)
+        assert sampler.sample("a") == 0.5
+        assert sampler.sample("b") == 0.5
+        assert sampler.sample("a") == 0
+
+        # A new key over the limit resets the counts.
+        assert sampler.sample("c") == 0.5
+        assert len(sampler._counts) == 1
+        assert sampler.sample("a") == 0.5
+
+
+class TestProbability:
+    def test_init(self):
+        sampler = sampling.Probability(0.1)
+        assert isinstance(sampler, Sampler)
+        assert sampler.p == 0.1
+        assert sampler.by_callsite is False
+
+    @pytest.mark.parametrize("p", [-0.1, 1.1])
+    def test_init_invalid_p(self, p):
+        with pytest.raises(ValueError):
+            sampling.Probability(p)
+
+    def test_sample(self):
+        sampler = sampling.Probability(0.5)
+        sampler._random = iter([0.1, 0.9, 0.5, 0.49]).__next__
+        assert [sampler.sample("a") for _ in range(4)] == [0.5, 0, 0, 0.5]
+
+
+class TestRateLimit:
+    def test_init(self):
+        sampler = sampling.RateLimit(10)
+        assert isinstance(sampler, Sampler)
+        assert sampler.per_second == 10
+        assert sampler.by_callsite is True
+        assert sampler.max_keys == 10000
+
+    def test_init_invalid_per_second(self):
+        with pytest.raises(ValueError):
+            sampling.RateLimit(0)
+
+    def test_sample(self):
+        now = [100.0]
+        sampler = sampling.RateLimit(2)
+        sampler._clock = lambda: now[0]
+
+        # First window: no previous window to estimate the rate from.
+        assert [sampler.sample("a") for _ in range(4)] == [1.0, 1.0, 0, 0]
+
+        # Second window: 2 of 4 events were kept in the previous window.
+        now[0] = 101.0
+        assert [sampler.sample("a") for _ in range(3)] == [0.5, 0.5, 0]
+
+        # Third window: 2 of 3 events were kept in the previous window.
+        now[0] = 102.5
+        assert sampler.sample("a") == 2 / 3
+
+        # Fourth window: all events were kept in the previous window.
+        now[0] = 104.0
+        assert sampler.sample("a") == 1.0
+
+    def test_sample_per_key(self):
+        sampler = sampling.RateLimit(1)
+        sampler._clock = lambda: 100.0
+        assert sampler.sample("a") == 1.0
+        assert sampler.sample("b") == 1.0
+        assert sampler.sample("a") == 0
+        assert sampler.sample("b") == 0
+
+    def test_sample_max_keys(self):
+        now = [100.0]
+        sampler = sampling.RateLimit(1, max_keys=2)
+        sampler._clock = lambda: now[0]
+        assert sampler.sample("a") == 1.0
+        now[0] = 100.5
+        assert sampler.sample("b") == 1.0
+
+        # Key "a" has a window which has ended, so it is dropped for "c".
+        now[0] = 101.0
+        assert sampler.sample("c") == 1.0
+        assert set(sampler._windows) == {"b", "c"}
+
+        # Every window is current, so all keys are dropped for "d".
+        assert sampler.sample("d") == 1.0
+        assert set(sampler._windows) == {"d"}
@@ -0,0 +1,249 @@
+"""Unit tests for containerlog pre-declared event schemas."""
+
+import sys
+
+import pytest
+
+import containerlog
+from containerlog import adaptive, budget, dedup, recorder, renderers, sampling, schemas
+
+
+def log_both(logger, level, msg, **fields):
+    """Log an event through a schema and through the regular log method."""
+    emit = schemas.event(logger, level, msg, tuple(fields))
+    emit(*fields.values())
+    logger._log(level, msg, **fields)
+
+
+class TestEvent:
+    @pytest.mark.parametrize(
+        "renderer",
+        [
+            renderers.KeyValueRenderer(),
+            renderers.LogfmtRenderer(),
+            renderers.CompactRenderer(),
+        ],
+    )
+    @pytest.mark.parametrize(
+        "fields",
+        [
+            {},
+            {"route": "/items"},
+            {"route": "/a b", "status": 200, "duration_ms": 12.5, "user": None},
+            {"a key": "it's", "ok": True, "tags": [1, 2]},
+        ],
+    )
+    def test_matches_log(self, test_logger, renderer, fields):
+        logger, o, e = test_logger
+        logger.renderer = renderer
+
+        log_both(logger, containerlog.INFO, "request done", **fields)
+
+        first, second = o.getvalue().splitlines(keepends=True)
+        assert first == second
+        assert e.getvalue() == ""
+
+    def test_event(self, test_logger):
+        logger, o, e = test_logger
+
+        request_done = schemas.event(
+            logger, containerlog.INFO, "request done", ("route", "status", "duration_ms")
+        )
+        request_done("/items", 200, 12.5)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' "
+            "event='request done' route='/items' status=200 duration_ms=12.5\n"
+        )
+        assert request_done.__name__ == "request_done"
+
+    def test_event_name(self, test_logger):
+        logger, o, e = test_logger
+
+        assert schemas.event(logger, containerlog.INFO, "done!", ()).__name__ == "emit"
+        assert schemas.event(logger, containerlog.INFO, "logger", ()).__name__ == "emit"
+        assert schemas.event(logger, containerlog.INFO, "pass", ()).__name__ == "emit"
+
+    @pytest.mark.parametrize("msg", ["dict", "zip", "getattr"])
+    def test_event_named_for_builtin(self, test_logger, msg):
+        logger, o, e = test_logger
+
+        # The function is named for a builtin it calls on the regular path.
+        emit = schemas.event(logger, containerlog.INFO, msg, ("a",))
+        assert emit.__name__ == msg
+        logger.sampler = sampling.EveryN(1)
+        emit(1)
+        logger.level = containerlog.WARN
+        logger.recorder = recorder.FlightRecorder()
+        emit(2)
+
+        assert o.getvalue() == (
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='{msg}' a=1\n"
+        )
+        assert len(logger.recorder.drain()) == 1
+
+    def test_event_below_level(self, test_logger):
+        logger, o, e = test_logger
+        logger.level = containerlog.WARN
+
+        schemas.event(logger, containerlog.INFO, "msg", ("a",))(1)
+
+        assert o.getvalue() == ""
+        assert e.getvalue() == ""
+
+    def test_event_level_changed(self, test_logger):
+        logger, o, e = test_logger
+        emit = schemas.event(logger, containerlog.INFO, "msg", ("a",))
+
+        logger.disable()
+        emit(1)
+        assert o.getvalue() == ""
+
+        logger.enable()
+        emit(1)
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' a=1\n"
+        )
+
+    def test_event_recorded(self, test_logger):
+        logger, o, e = test_logger
+        logger.level = containerlog.WARN
+        logger.recorder = recorder.FlightRecorder()
+
+        schemas.event(logger, containerlog.INFO, "msg", ("a",))(1)
+        assert o.getvalue() == ""
+
+        logger.error("failed")
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' a=1\n"
+        )
+
+    def test_event_error(self, test_logger):
+        logger, o, e = test_logger
+        logger.level = containerlog.WARN
+        logger.recorder = recorder.FlightRecorder()
+
+        logger.info("recorded")
+        schemas.event(logger, containerlog.ERROR, "failed", ("a",))(1)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='recorded' \n"
+        )
+        assert e.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='error' event='failed' a=1\n"
+        )
+
+    def test_event_renderer_changed(self, test_logger):
+        logger, o, e = test_logger
+        emit = schemas.event(logger, containerlog.INFO, "msg", ("a",))
+
+        logger.renderer = renderers.LogfmtRenderer()
+        emit("b c")
+
+        assert o.getvalue() == (
+            'timestamp=2020-01-01T00:00:00Z logger=test level=info event=msg a="b c"\n'
+        )
+
+    def test_event_callsite(self, test_logger):
+        logger, o, e = test_logger
+        logger.callsite = True
+
+        emit = schemas.event(logger, containerlog.INFO, "msg", ("line",))
+        line = sys._getframe().f_lineno + 1
+        emit(1)
+
+        # The callsite is the caller of the schema function, not the function.
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' "
+            f"module='{__name__}' func='test_event_callsite' line={line} _line=1\n"
+        )
+
+    def test_event_sample_by_callsite(self, test_logger):
+        logger, o, e = test_logger
+        logger.sampler = sampling.EveryN(2)
+
+        emit = schemas.event(logger, containerlog.INFO, "msg", ("i",))
+        for i in range(2):
+            emit(i)
+            emit(i + 10)
+
+        # Each call of the function is sampled separately.
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' i=0 sampled=0.5\n"
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' i=10 sampled=0.5\n"
+        )
+
+    @pytest.mark.parametrize(
+        "setup",
+        [
+            lambda logger: setattr(logger, "sampler", sampling.EveryN(2)),
+            lambda logger: setattr(logger, "dedup", dedup.Deduplicator(window=60)),
+            lambda logger: setattr(logger, "budget", budget.Budget(lines_per_second=1)),
+            lambda logger: setattr(logger.manager, "budget", budget.Budget(lines_per_second=1)),
+        ],
+    )
+    def test_event_features(self, test_logger, setup):
+        logger, o, e = test_logger
+        setup(logger)
+        emit = schemas.event(logger, containerlog.INFO, "msg", ("a",))
+
+        for _ in range(2):
+            emit(1)
+
+        # Each feature drops the second event.
+        assert o.getvalue().count("event='msg'") == 1
+
+    def test_event_boosted(self, test_logger, clock):
+        logger, o, e = test_logger
+        logger.level = containerlog.INFO
+        boost = adaptive.Boost(level=containerlog.DEBUG, duration=10.0)
+        boost._clock = clock
+        logger.boost = boost
+        emit = schemas.event(logger, containerlog.DEBUG, "msg", ("a",))
+
+        logger.error("failed")
+        emit(1)
+        clock.now += 10.0
+        emit(2)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='debug' event='msg' a=1\n"
+        )
+
+    def test_event_context_processors(self, test_logger):
+        logger, o, e = test_logger
+
+        class Processor:
+            def merge(self, event):
+                event["request_id"] = "abc"
+
+        logger.manager.context_processors.append(Processor())
+        schemas.event(logger, containerlog.INFO, "msg", ("a",))(1)
+
+        assert o.getvalue() == (
+            "timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='msg' "
+            "request_id='abc' a=1\n"
+        )
+
+    @pytest.mark.parametrize(
+        "fields", [("a", "a"), ("event",), ("a", "exc"), ("msg",), ("stacklevel",)]
+    )
+    def test_event_invalid_fields(self, test_logger, fields):
+        logger, o, e = test_logger
+        with pytest.raises(ValueError):
+            schemas.event(logger, containerlog.INFO, "msg", fields)
+
+    def test_event_renderer_reserved(self, test_logger):
+        logger, o, e = test_logger
+        logger.renderer = renderers.CompactRenderer()
+
+        schemas.event(logger, containerlog.INFO, "msg", ("user",))
+        for field in ("ts", "event", "mod", "module"):
+            with pytest.raises(ValueError):
+                schemas.event(logger, containerlog.INFO, "msg", (field,))
+
+    @pytest.mark.parametrize("level", [-1, 6, 99])
+    def test_event_invalid_level(self, test_logger, level):
+        logger, o, e = test_logger
+        with pytest.raises(ValueError):
+            schemas.event(logger, level, "msg", ("a",))
@@ -0,0 +1,712 @@
+"""Unit tests for containerlog sinks."""
+
+import gzip
+import io
+import lzma
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+import containerlog
+from containerlog import sinks
+
+
+class TestSink:
+    def test_write_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            sinks.Sink().write("test\n")
+
+    def test_writer(self):
+        sink = sinks.MemorySink()
+        assert sinks.Sink.writer(sink) == sink.write
+
+
+class TestStreamSink:
+    def test_write(self):
+        stream = io.StringIO()
+        sink = sinks.StreamSink(stream)
+
+        sink.write("a\n")
+        sink.writer()("b\n")
+        sink.flush()
+
+        assert stream.getvalue() == "a\nb\n"
+        assert sink.writer() == stream.write
+
+
+class TestStdSink:
+    def test_init_invalid(self):
+        with pytest.raises(ValueError):
+            sinks.StdSink("stdin")
+
+    def test_writer_follows_stream(self, monkeypatch):
+        sink = sinks.StdSink("stdout")
+        stream = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", stream)
+
+        sink.writer()("a\n")
+        sink.write("b\n")
+        sink.flush()
+
+        assert stream.getvalue() == "a\nb\n"
+
+
+class TestFileSink:
+    def test_write(self, tmp_path):
+        path = tmp_path / "test.log"
+        path.write_text("existing\n")
+        sink = sinks.FileSink(str(path))
+
+        sink.write("a\n")
+        sink.writer()("b\n")
+
+        # The file is line buffered, so lines are written without a flush.
+        assert path.read_text() == "existing\na\nb\n"
+        sink.close()
+        assert sink.file.closed
+
+
+def wait_for(condition, timeout=5.0):
+    """Wait for a condition to be met by a sink's background thread."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.01)
+
+
+class TestAppendFileSink:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"max_bytes": -1},
+            {"max_bytes": 100, "backups": 0},
+            {"flush_interval": 0},
+        ],
+    )
+    def test_init_invalid(self, tmp_path, kwargs):
+        with pytest.raises(ValueError):
+            sinks.AppendFileSink(str(tmp_path / "test.log"), **kwargs)
+
+    def test_write_buffered(self, tmp_path):
+        path = tmp_path / "test.log"
+        path.write_text("existing\n")
+        sink = sinks.AppendFileSink(str(path), buffer_lines=3, flush_interval=60)
+
+        sink.write("a\n")
+        sink.writer()("é\n")
+        assert path.read_text() == "existing\n"
+
+        # Lines are written in a batch once the buffer is full.
+        sink.write("b\n")
+        assert path.read_text() == "existing\na\né\nb\n"
+
+        sink.write("c\n")
+        sink.flush()
+        assert path.read_text() == "existing\na\né\nb\nc\n"
+
+        sink.close()
+        sink.close()
+        sink.write("d\n")
+        assert path.read_text() == "existing\na\né\nb\nc\n"
+
+    def test_write_unbuffered(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=1)
+
+        sink.write("a\n")
+        assert path.read_text() == "a\n"
+        sink.close()
+
+    def test_flush_interval(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), flush_interval=0.01)
+
+        sink.write("a\n")
+        wait_for(lambda: path.read_text() == "a\n")
+        sink.close()
+
+    def test_close_flushes(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), flush_interval=60)
+
+        sink.write("a\n")
+        sink.close()
+
+        assert path.read_text() == "a\n"
+        assert not sink._thread.is_alive()
+
+    def test_rotate(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=1, max_bytes=4, backups=2)
+
+        for line in ("a\n", "b\n", "c\n", "d\n", "e\n", "f\n", "g\n"):
+            sink.write(line)
+            # Wait for each rotation to finish, so the file contents are known.
+            wait_for(lambda: not sink._rotate_pending)
+        sink.close()
+
+        assert path.read_text() == "g\n"
+        assert (tmp_path / "test.log.1").read_text() == "e\nf\n"
+        assert (tmp_path / "test.log.2").read_text() == "c\nd\n"
+        assert not (tmp_path / "test.log.3").exists()
+
+    def test_rotate_concurrent(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=16, max_bytes=1024, backups=1000)
+
+        def log(n):
+            for i in range(2000):
+                sink.write(f"{n}-{i}\n")
+
+        threads = [threading.Thread(target=log, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        sink.close()
+
+        # No lines are lost or duplicated across rotations.
+        lines = []
+        for f in tmp_path.iterdir():
+            lines.extend(f.read_text().splitlines())
+        assert len(list(tmp_path.iterdir())) > 1
+        assert sorted(lines) == sorted(f"{n}-{i}" for n in range(4) for i in range(2000))
+
+    @pytest.mark.skipif(sinks._load_fallocate() is None, reason="preallocation is not supported")
+    def test_preallocate(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=1, preallocate=1024 * 1024)
+
+        sink.write("a\n")
+        sink.close()
+
+        # Space is reserved, but lines are still appended at the end of the file.
+        assert path.read_text() == "a\n"
+        assert os.stat(path).st_blocks * 512 >= 1024 * 1024
+
+    def test_fork_under_load(self, tmp_path, fork):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=8, flush_interval=0.01)
+        logger = containerlog.Logger("test", manager=containerlog.manager)
+        logger.set_sink(sink)
+        running = True
+
+        def log(n):
+            i = 0
+            while running:
+                logger.info(f"parent-{n}-{i}")
+                i += 1
+            return i
+
+        counts = {}
+        threads = [
+            threading.Thread(target=lambda n=n: counts.update({n: log(n)})) for n in range(4)
+        ]
+        for t in threads:
+            t.start()
+
+        def child(k):
+            # The child has its own background thread, which flushes lines.
+            logger.info(f"child-{k}")
+            wait_for(lambda: f"child-{k}" in path.read_text())
+            sink.close()
+            return True
+
+        try:
+            for k in range(5):
+                time.sleep(0.01)
+                assert fork(lambda: child(k))
+        finally:
+            running = False
+            for t in threads:
+                t.join()
+        sink.close()
+
+        # Every line logged by the parent is written once, never again by a child.
+        events = [line.split("event='")[1].split("'")[0] for line in path.read_text().splitlines()]
+        assert sorted(events) == sorted(
+            [f"parent-{n}-{i}" for n, count in counts.items() for i in range(count)]
+            + [f"child-{k}" for k in range(5)]
+        )
+
+    def test_fork_rotate(self, tmp_path, fork):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=16, max_bytes=1024, backups=1000)
+
+        def log(name):
+            for i in range(2000):
+                sink.write(f"{name}-{i}\n")
+
+        def child():
+            log("child")
+            sink.close()
+            return True
+
+        pid_ok = []
+        t = threading.Thread(target=lambda: pid_ok.append(fork(child)))
+        t.start()
+        log("parent")
+        t.join()
+        sink.close()
+        assert pid_ok == [True]
+
+        # Both processes rotate the file, without losing lines.
+        lines = []
+        for f in tmp_path.iterdir():
+            lines.extend(f.read_text().splitlines())
+        assert sorted(lines) == sorted(
+            f"{name}-{i}" for name in ("parent", "child") for i in range(2000)
+        )
+
+    def test_rotated_by_other_sink(self, tmp_path):
+        path = tmp_path / "test.log"
+        rotating = sinks.AppendFileSink(str(path), buffer_lines=1, max_bytes=10)
+        other = sinks.AppendFileSink(str(path), buffer_lines=1, max_bytes=10)
+
+        rotating.write("a" * 10 + "\n")
+        wait_for(lambda: not rotating._rotate_pending)
+
+        # The other sink's next batch goes to the renamed file, and it then
+        # switches to the new file rather than rotating it again.
+        other.write("b\n")
+        wait_for(lambda: not other._rotate_pending)
+        other.write("c\n")
+        rotating.close()
+        other.close()
+
+        assert path.read_text() == "c\n"
+        assert (tmp_path / "test.log.1").read_text() == "a" * 10 + "\nb\n"
+        assert not (tmp_path / "test.log.2").exists()
+
+    def test_fork_rotate_rare_writer(self, tmp_path, fork):
+        path = tmp_path / "test.log"
+        sink = sinks.AppendFileSink(str(path), buffer_lines=1, max_bytes=2000, backups=3)
+
+        def child():
+            # The child writes one line for each rotation by the parent.
+            for k in range(6):
+                wait_for(lambda: (tmp_path / f"go-{k}").exists())
+                sink.write(f"child-{k}\n")
+                wait_for(lambda: not sink._rotate_pending)
+                (tmp_path / f"done-{k}").touch()
+            sink.close()
+            return True
+
+        pid_ok = []
+        t = threading.Thread(target=lambda: pid_ok.append(fork(child)))
+        t.start()
+        for k in range(6):
+            for i in range(20):
+                sink.write(f"parent-{k}-{i}".ljust(99) + "\n")
+            wait_for(lambda: not sink._rotate_pending)
+            (tmp_path / f"go-{k}").touch()
+            wait_for(lambda: (tmp_path / f"done-{k}").exists())
+        t.join()
+        sink.close()
+        assert pid_ok == [True]
+
+        # The child follows the parent's rotations, so its recent lines are
+        # kept in the backups rather than in a file rotated out of existence.
+        lines = []
+        for n in ("", ".1", ".2", ".3"):
+            lines.extend((tmp_path / f"test.log{n}").read_text().splitlines())
+        assert {"child-3", "child-4", "child-5"} <= set(lines)
+
+
+class TestCompressedFileSink:
+    def test_init_invalid(self, tmp_path):
+        with pytest.raises(ValueError):
+            sinks.CompressedFileSink(str(tmp_path / "test.log"), compression="bz2")
+
+    @pytest.mark.parametrize("compression", ["gzip", "zlib", "lzma"])
+    def test_write(self, tmp_path, compression):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), compression=compression, flush_interval=60)
+
+        sink.write("a\n")
+        sink.writer()("é\n")
+        sink.flush()
+        sink.write("b\n")
+        sink.close()
+
+        assert sinks.read_compressed(str(path), compression) == "a\né\nb\n"
+
+    @pytest.mark.parametrize(
+        "compression,decompress", [("gzip", gzip.decompress), ("lzma", lzma.decompress)]
+    )
+    def test_frames_concatenated(self, tmp_path, compression, decompress):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), compression=compression, flush_interval=60)
+
+        sink.write("a\n")
+        sink.flush()
+        sink.write("b\n")
+        sink.close()
+
+        # Frames are concatenated into a file the standard tools can read.
+        assert decompress(path.read_bytes()) == b"a\nb\n"
+
+    @pytest.mark.parametrize("compression", ["gzip", "zlib", "lzma"])
+    def test_read_truncated(self, tmp_path, compression):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), compression=compression, flush_interval=60)
+
+        sink.write("a\n")
+        sink.flush()
+        size = path.stat().st_size
+        sink.write("b\n")
+        sink.close()
+
+        # Lose the end of the last frame, as if the process crashed writing it.
+        with open(path, "r+b") as f:
+            f.truncate(path.stat().st_size - 4)
+
+        assert path.stat().st_size > size
+        assert sinks.read_compressed(str(path), compression) == "a\n"
+
+    def test_compressed_off_thread(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), buffer_lines=2, flush_interval=60)
+
+        sink.write("a\n")
+        assert path.stat().st_size == 0
+
+        # A full buffer wakes the background thread, rather than compressing
+        # the lines on the caller's thread.
+        sink.write("b\n")
+        wait_for(lambda: path.stat().st_size > 0)
+        assert sinks.read_compressed(str(path)) == "a\nb\n"
+        sink.close()
+
+    def test_write_after_close(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), flush_interval=60)
+
+        sink.write("a\n")
+        sink.close()
+
+        # Lines written once the sink is closed are dropped, not buffered.
+        sink.write("b\n")
+        assert sink._buffer == []
+        assert sinks.read_compressed(str(path)) == "a\n"
+
+    def test_max_buffered(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), flush_interval=60, max_buffered=2)
+
+        # The background thread has not compressed anything, so once the
+        # buffer is full, new lines are dropped.
+        sink.write("a\n")
+        sink.write("b\n")
+        sink.write("c\n")
+        assert sink.dropped == 1
+
+        sink.flush()
+        sink.write("d\n")
+        sink.close()
+        assert sinks.read_compressed(str(path)) == "a\nb\nd\n"
+
+    def test_fork(self, tmp_path, fork):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), flush_interval=60)
+        sink.write("a\n")
+
+        def child():
+            sink.write("child\n")
+            sink.close()
+            return True
+
+        assert fork(child)
+        sink.write("b\n")
+        sink.close()
+
+        # Each process writes complete frames to the file.
+        assert sinks.read_compressed(str(path)) == "a\nchild\nb\n"
+
+    def test_compression_ratio(self, tmp_path):
+        path = tmp_path / "test.log"
+        sink = sinks.CompressedFileSink(str(path), flush_interval=60)
+        lines = [
+            f"timestamp='2020-01-01T00:00:00Z' logger='test' level='info' event='request' n={n}\n"
+            for n in range(1000)
+        ]
+
+        for line in lines:
+            sink.write(line)
+        sink.close()
+
+        assert path.stat().st_size * 10 < len("".join(lines))
+        assert sinks.read_compressed(str(path)) == "".join(lines)
+
+
+class SocketServer:
+    """A local Unix domain socket server which collects what it receives."""
+
+    def __init__(self, path, kind="stream"):
+        self.path = path
+        self.received = []
+        self.conns = []
+        self.sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_STREAM if kind == "stream" else socket.SOCK_DGRAM
+        )
+        self.sock.bind(path)
+        if kind == "stream":
+            self.sock.listen()
+            target = self._accept
+        else:
+            target = self._read
+        threading.Thread(target=target, args=(self.sock,), daemon=True).start()
+
+    def _accept(self, sock):
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            self.conns.append(conn)
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, sock):
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            self.received.append(data)
+
+    def getvalue(self):
+        return b"".join(self.received).decode("utf-8")
+
+    def stop(self):
+        for sock in self.conns + [self.sock]:
+            sock.shutdown(socket.SHUT_RDWR)
+            sock.close()
+        os.unlink(self.path)
+
+
+@pytest.fixture()
+def socket_path(tmp_path):
+    return str(tmp_path / "log.sock")
+
+
+class TestSocketSink:
+    def test_init_invalid(self, socket_path):
+        with pytest.raises(ValueError):
+            sinks.SocketSink(socket_path, kind="seqpacket")
+
+    def test_write_stream(self, socket_path):
+        server = SocketServer(socket_path)
+        sink = sinks.SocketSink(socket_path, flush_interval=60)
+
+        sink.write("a\n")
+        sink.writer()("é\n")
+        sink.flush()
+
+        wait_for(lambda: server.getvalue() == "a\né\n")
+        assert sink.connected
+        sink.close()
+        assert not sink.connected
+        server.stop()
+
+    def test_write_datagram(self, socket_path):
+        server = SocketServer(socket_path, kind="datagram")
+        sink = sinks.SocketSink(socket_path, kind="datagram", flush_interval=60)
+
+        sink.write("a\n")
+        sink.write("b\nc\n")
+        sink.close()
+
+        # Each write is sent as its own datagram.
+        wait_for(lambda: len(server.received) == 2)
+        assert server.received == [b"a\n", b"b\nc\n"]
+        server.stop()
+
+    def test_write_datagram_too_large(self, socket_path):
+        server = SocketServer(socket_path, kind="datagram")
+        sink = sinks.SocketSink(socket_path, kind="datagram", flush_interval=60)
+
+        sink.write("small1\n")
+        sink.write("x" * 400 * 1024 + "\n")
+        sink.write("small2\n")
+        sink.flush()
+
+        # The oversized line is dropped, without disconnecting or holding up
+        # the lines behind it.
+        wait_for(lambda: len(server.received) == 2)
+        assert server.received == [b"small1\n", b"small2\n"]
+        assert sink.dropped == 1
+        assert sink.connected
+        assert sink._buffer == []
+        sink.close()
+        server.stop()
+
+    def test_write_background(self, socket_path):
+        server = SocketServer(socket_path)
+        sink = sinks.SocketSink(socket_path, buffer_lines=2, flush_interval=60)
+
+        sink.write("a\n")
+        sink.write("b\n")
+
+        # A full buffer wakes the background thread to send it.
+        wait_for(lambda: server.getvalue() == "a\nb\n")
+        sink.close()
+        server.stop()
+
+    def test_connect_later(self, socket_path):
+        sink = sinks.SocketSink(socket_path, flush_interval=0.01, backoff=0.01)
+
+        sink.write("a\n")
+        sink.flush()
+        assert not sink.connected
+
+        server = SocketServer(socket_path)
+        wait_for(lambda: server.getvalue() == "a\n")
+        sink.close()
+        server.stop()
+
+    def test_reconnect(self, socket_path):
+        server = SocketServer(socket_path)
+        sink = sinks.SocketSink(socket_path, flush_interval=0.01, backoff=0.01)
+
+        sink.write("a\n")
+        wait_for(lambda: server.getvalue() == "a\n")
+        server.stop()
+
+        # Lines logged while the server is down are sent after reconnecting.
+        sink.write("b\n")
+        sink.write("c\n")
+        wait_for(lambda: not sink.connected)
+        server = SocketServer(socket_path)
+        sink.write("d\n")
+
+        wait_for(lambda: server.getvalue() == "b\nc\nd\n")
+        assert sink.dropped == 0
+        sink.close()
+        server.stop()
+
+    def test_max_buffered(self, socket_path):
+        sink = sinks.SocketSink(socket_path, flush_interval=60, max_buffered=2)
+
+        sink.write("a\n")
+        sink.flush()
+        sink.write("b\n")
+        sink.write("c\n")
+        assert sink.dropped == 1
+
+        server = SocketServer(socket_path)
+        sink._retry_at = 0.0
+        sink.flush()
+
+        wait_for(lambda: server.getvalue() == "a\nb\n")
+        sink.close()
+        server.stop()
+
+    def test_backoff(self, socket_path):
+        sink = sinks.SocketSink(socket_path, flush_interval=60, backoff=1.0, max_backoff=4.0)
+        sink.write("a\n")
+
+        sink.flush()
+        assert sink._retry_backoff == 2.0
+
+        # No attempt is made to reconnect until the backoff has elapsed.
+        sink.flush()
+        assert sink._retry_backoff == 2.0
+
+        for backoff in (4.0, 4.0):
+            sink._retry_at = 0.0
+            sink.flush()
+            assert sink._retry_backoff == backoff
+        sink.close()
+
+    def test_fork(self, socket_path, fork):
+        server = SocketServer(socket_path)
+        sink = sinks.SocketSink(socket_path, flush_interval=60)
+        sink.write("a\n")
+        sink.flush()
+        wait_for(lambda: server.getvalue() == "a\n")
+
+        def child():
+            sink.write("child\n")
+            sink.close()
+            return True
+
+        assert fork(child)
+        wait_for(lambda: server.getvalue() == "a\nchild\n")
+
+        # The child connected on its own, leaving the parent's connection open.
+        sink.write("b\n")
+        sink.flush()
+        wait_for(lambda: server.getvalue() == "a\nchild\nb\n")
+        assert len(server.conns) == 2
+        sink.close()
+        server.stop()
+
+    def test_send_partial(self, socket_path):
+        class Socket:
+            def __init__(self):
+                self.sent = 0
+
+            def send(self, data):
+                # Send 5 bytes, then fail.
+                if self.sent:
+                    raise BrokenPipeError
+                self.sent = 5
+                return 5
+
+        sink = sinks.SocketSink(socket_path, flush_interval=60)
+
+        # Only the first line was sent in full, so the rest are sent again.
+        assert sink._send(Socket(), ["abc\n", "def\n", "ghi\n"]) == 1
+        sink.close()
+
+
+class TestFdSink:
+    def test_write(self):
+        r, w = os.pipe()
+        try:
+            sink = sinks.FdSink(w)
+            sink.write("a\n")
+            sink.writer()("é\n")
+            assert os.read(r, 100) == "a\né\n".encode("utf-8")
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_write_partial(self, monkeypatch):
+        chunks = []
+
+        def write(fd, data):
+            chunks.append(bytes(data[:2]))
+            return min(len(data), 2)
+
+        monkeypatch.setattr(os, "write", write)
+        sinks.FdSink(99).write("abcde")
+
+        assert chunks == [b"ab", b"cd", b"e"]
+
+
+class TestMemorySink:
+    def test_write(self):
+        sink = sinks.MemorySink()
+
+        sink.write("a\n")
+        sink.writer()("b\nc\n")
+
+        assert sink.writes == ["a\n", "b\nc\n"]
+        assert sink.getvalue() == "a\nb\nc\n"
+
+    def test_clear(self):
+        sink = sinks.MemorySink()
+        write = sink.writer()
+        write("a\n")
+
+        sink.clear()
+        write("b\n")
+
+        assert sink.getvalue() == "b\n"
@@ -0,0 +1,201 @@
+"""Unit tests for containerlog structured exception rendering."""
+
+import sys
+import traceback
+
+import pytest
+
+from containerlog import tracebacks
+
+
+class CustomError(Exception):
+    pass
+
+
+def raise_error(exc):
+    raise exc
+
+
+def get_exc_info(exc):
+    try:
+        raise_error(exc)
+    except BaseException:
+        return sys.exc_info()
+
+
+def chained_error(n):
+    """Get an exception with n chained exceptions, alternating cause and context."""
+    try:
+        if n == 0:
+            raise ValueError("0")
+        try:
+            raise chained_error(n - 1)
+        except ValueError as e:
+            if n % 2:
+                raise ValueError(str(n)) from e
+            raise ValueError(str(n))
+    except ValueError as e:
+        return e
+
+
+def test_type_name():
+    assert tracebacks._type_name(ValueError) == "ValueError"
+    assert tracebacks._type_name(CustomError) == f"{__name__}.CustomError"
+
+
+def test_frame_text_cached():
+    code = test_frame_text_cached.__code__
+    text = tracebacks._frame_text(code, 10)
+
+    assert text == f"{code.co_filename}:10 in test_frame_text_cached"
+    assert tracebacks._frame_cache[(code, 10)] is text
+    assert tracebacks._frame_text(code, 10) is text
+
+
+class TestStructuredRenderer:
+    def test_fields(self):
+        fields = tracebacks.StructuredRenderer().fields(*get_exc_info(ValueError("it's bad")))
+
+        assert list(fields) == ["exc_type", "exc_msg", "exc_stack"]
+        assert fields["exc_type"] == "ValueError"
+        # Values are raw. The Logger's renderer escapes them for its format.
+        assert fields["exc_msg"] == "it's bad"
+
+        frames = fields["exc_stack"].split(" | ")
+        assert len(frames) == 2
+        assert frames[0].startswith(__file__)
+        assert frames[0].endswith(" in get_exc_info")
+        assert frames[1].endswith(" in raise_error")
+
+    def test_fields_no_exception(self):
+        assert tracebacks.StructuredRenderer().fields(None, None, None) == {}
+
+    def test_fields_fingerprint(self):
+        renderer = tracebacks.StructuredRenderer(fingerprint=True)
+        first = renderer.fields(*get_exc_info(KeyError("a")))
+        second = renderer.fields(*get_exc_info(KeyError("b")))
+        other = renderer.fields(*get_exc_info(ValueError("a")))
+
+        assert len(first["exc_fingerprint"]) == 8
+        assert first["exc_fingerprint"] == second["exc_fingerprint"]
+        assert first["exc_fingerprint"] != other["exc_fingerprint"]
+
+    def test_fields_stack_cached(self):
+        renderer = tracebacks.StructuredRenderer()
+        first = renderer.fields(*get_exc_info(KeyError("a")))
+        second = renderer.fields(*get_exc_info(KeyError("b")))
+
+        assert first["exc_stack"] is second["exc_stack"]
+
+    def test_fields_limit(self):
+        renderer = tracebacks.StructuredRenderer(limit=1)
+        fields = renderer.fields(*get_exc_info(ValueError("test")))
+
+        frames = fields["exc_stack"].split(" | ")
+        assert len(frames) == 2
+        assert frames[0] == "..."
+        assert frames[1].endswith(" in raise_error")
+
+    def test_fields_chain(self):
+        renderer = tracebacks.StructuredRenderer()
+        fields = renderer.fields(*get_exc_info(chained_error(3)))
+
+        assert fields["exc_msg"] == "3"
+        assert fields["exc_chain"] == "ValueError: 2 <- ValueError: 1 <- ValueError: 0"
+
+    def test_fields_chain_depth(self):
+        renderer = tracebacks.StructuredRenderer(chain_depth=1)
+        fields = renderer.fields(*get_exc_info(chained_error(3)))
+
+        assert fields["exc_chain"] == "ValueError: 2 <- ..."
+
+    def test_fields_chain_suppressed(self):
+        try:
+            try:
+                raise KeyError("a")
+            except KeyError:
+                raise ValueError("b") from None
+        except ValueError as e:
+            exc = e
+
+        fields = tracebacks.StructuredRenderer().fields(type(exc), exc, exc.__traceback__)
+        assert "exc_chain" not in fields
+
+
+class TestTextRenderer:
+    def test_text(self):
+        exc_info = get_exc_info(ValueError("test"))
+        text = tracebacks.TextRenderer().text(*exc_info)
+
+        assert text == "".join(traceback.format_exception(*exc_info))
+
+    def test_text_no_exception(self):
+        assert tracebacks.TextRenderer().text(None, None, None) == "NoneType: None\n"
+
+    def test_text_limit(self):
+        text = tracebacks.TextRenderer(limit=1).text(*get_exc_info(ValueError("test")))
+
+        assert "in raise_error" in text
+        assert "in get_exc_info" not in text
+        assert text.endswith("ValueError: test\n")
+
+    def test_text_chain(self):
+        exc_info = get_exc_info(chained_error(2))
+        text = tracebacks.TextRenderer(limit=10).text(*exc_info)
+
+        assert text == "".join(traceback.format_exception(*exc_info))
+
+    def test_text_chain_depth(self):
+        text = tracebacks.TextRenderer(chain_depth=1).text(*get_exc_info(chained_error(3)))
+
+        assert text.startswith("[earlier chained exceptions omitted]\n")
+        assert "ValueError: 1" not in text
+        assert "ValueError: 2" in text
+        assert text.endswith("ValueError: 3\n")
+
+    def test_text_chain_depth_zero(self):
+        text = tracebacks.TextRenderer(chain_depth=0).text(*get_exc_info(chained_error(1)))
+
+        assert text.startswith("[earlier chained exceptions omitted]\n")
+        assert "ValueError: 0" not in text
+
+
+class TestExceptionRenderer:
+    def test_init_invalid_limit(self):
+        with pytest.raises(ValueError):
+            tracebacks.ExceptionRenderer(limit=0)
+
+    def test_init_invalid_chain_depth(self):
+        with pytest.raises(ValueError):
+            tracebacks.ExceptionRenderer(chain_depth=-1)
+
+    def test_defaults(self):
+        renderer = tracebacks.ExceptionRenderer()
+        exc_info = get_exc_info(ValueError("test"))
+        assert renderer.fields(*exc_info) == {}
+        assert renderer.text(*exc_info) == ""
+
+
+def test_get_exc_info_current():
+    try:
+        raise ValueError("test")
+    except ValueError:
+        assert tracebacks.get_exc_info(True) == sys.exc_info()
+
+
+@pytest.mark.parametrize("exc", ["x", 1, [1]])
+def test_get_exc_info_truthy(exc):
+    try:
+        raise ValueError("test")
+    except ValueError:
+        assert tracebacks.get_exc_info(exc) == sys.exc_info()
+
+
+def test_get_exc_info_instance():
+    exc_info = get_exc_info(ValueError("test"))
+    assert tracebacks.get_exc_info(exc_info[1]) == exc_info
+
+
+def test_get_exc_info_tuple():
+    exc_info = get_exc_info(ValueError("test"))
+    assert tracebacks.get_exc_info(exc_info) is exc_info